@@ -2,7 +2,9 @@
 Administración de modelos del módulo Catalog en Django Admin.
 """
 from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR
 from .models.products import Productos
+from .services.search import buscar_productos
 
 
 @admin.register(Productos)
@@ -50,7 +52,19 @@ class ProductosAdmin(admin.ModelAdmin):
     )
     
     list_per_page = 25
-    date_hierarchy = 'datetime'
+    
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Búsqueda del listado y del autocompletado (p. ej. producto en Ventas)
+        con el índice de texto completo. Ordena por relevancia salvo que el
+        usuario haya elegido una columna.
+        """
+        if not search_term.strip():
+            return queryset, False
+        queryset = buscar_productos(search_term, queryset)
+        if ORDER_VAR not in request.GET:
+            queryset = queryset.order_by('-relevancia', 'id_producto')
+        return queryset, False
     
     def has_add_permission(self, request):
         """
@@ -3,6 +3,7 @@ Forms del módulo Catalog - Validaciones de productos SmartERP.
 """
 from django import forms
 from .models.products import Productos
+from .services.search import buscar_productos
 
 
 class ProductoForm(forms.ModelForm):
@@ -191,6 +192,7 @@ class ProductoSearchForm(forms.Form):
     orden = forms.ChoiceField(
         required=False,
         choices=[
+            ('relevancia', 'Relevancia'),
             ('title', 'Nombre A-Z'),
             ('-title', 'Nombre Z-A'),
             ('normal_price', 'Precio Menor'),
@@ -200,3 +202,34 @@ class ProductoSearchForm(forms.Form):
         ],
         widget=forms.Select(attrs={'class': 'form-select'})
     )
+    
+    def orden_aplicado(self):
+        """Relevancia por defecto al buscar; nombre A-Z sin búsqueda"""
+        search = self.cleaned_data.get('search')
+        orden = self.cleaned_data.get('orden') or ('relevancia' if search else 'title')
+        if orden == 'relevancia' and not search:
+            return 'title'
+        return orden
+    
+    def filtrar(self, queryset=None):
+        """
+        Aplica búsqueda de texto completo, filtros y orden a un queryset de
+        Productos. Llamar después de is_valid(): los campos inválidos se ignoran.
+        """
+        datos = self.cleaned_data
+        productos = buscar_productos(datos.get('search'), queryset)
+        
+        if datos.get('oferta') == 'true':
+            productos = productos.filter(oferta=True)
+        elif datos.get('oferta') == 'false':
+            productos = productos.filter(oferta=False)
+        
+        if datos.get('stock') == 'disponible':
+            productos = productos.filter(sin_stock=False)
+        elif datos.get('stock') == 'sin_stock':
+            productos = productos.filter(sin_stock=True)
+        
+        orden = self.orden_aplicado()
+        if orden == 'relevancia':
+            return productos.order_by('-relevancia', 'id_producto')
+        return productos.order_by(orden)
@@ -0,0 +1,21 @@
+"""
+Comando: reconstruye el índice de búsqueda del catálogo.
+En SQLite repuebla ProductosFTS desde Productos; en SQL Server inicia una
+población completa del índice full-text. Los triggers / CHANGE_TRACKING
+mantienen el índice al día; usar tras crear el índice o restaurar datos.
+
+Uso:
+    python manage.py reconstruir_indice_busqueda
+"""
+from django.core.management.base import BaseCommand
+
+from catalog.services.search import backend_busqueda
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice de texto completo de Productos'
+
+    def handle(self, *args, **options):
+        backend = backend_busqueda()
+        backend.reconstruir()
+        self.stdout.write(self.style.SUCCESS(f'Índice de búsqueda reconstruido (backend: {backend.nombre})'))
@@ -0,0 +1,241 @@
+"""
+Búsqueda de texto completo del catálogo SmartERP.
+Backend según el motor de la base de datos:
+  - SQLite: tabla virtual FTS5 ProductosFTS (contenido externo sobre
+    Productos, sincronizada por triggers), ranking bm25.
+  - SQL Server: índice full-text sobre Productos (CHANGE_TRACKING AUTO),
+    ranking de CONTAINSTABLE.
+  - Sin índice: OR de icontains sobre los cuatro campos, con una relevancia
+    ponderada por campo (mismo resultado que la búsqueda original).
+Todos filtran un queryset de Productos y lo anotan con `relevancia` (mayor
+es más relevante), así que se combinan con los demás filtros y la
+paginación. Los backends con índice consultan el índice una sola vez: su
+resultado (llave, relevancia) entra como INNER JOIN sobre id_producto. Los términos se buscan por prefijo ("lap" encuentra "Laptop").
+"""
+import operator
+import re
+from functools import reduce
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.db.models import Case, Field, FloatField, IntegerField, Q, QuerySet, Value, When
+from django.db.models.expressions import Expression
+from django.db.models.sql.constants import INNER
+
+from catalog.models.products import Productos
+
+
+CAMPOS_BUSQUEDA = ('title', 'brand', 'categoria1', 'categoria2')
+PESOS_CAMPOS = (4.0, 2.0, 1.0, 1.0)  # title pesa más que marca y categorías
+MAX_TERMINOS = 8
+
+
+def terminos(consulta: str) -> List[str]:
+    """Palabras de la consulta (sin operadores ni comillas del usuario)"""
+    return re.findall(r'\w+', consulta or '')[:MAX_TERMINOS]
+
+
+class JoinTexto:
+    """
+    INNER JOIN de Productos con una subconsulta del índice full-text que
+    retorna (llave, relevancia). Cumple la interfaz que Query.alias_map
+    espera de un Join, así que sobrevive a clones y a usarse de subconsulta.
+    """
+    nullable = False
+    filtered_relation = None
+    table_name = 'busqueda_texto'
+
+    def __init__(self, sql: str, params, parent_alias: str, table_alias: Optional[str] = None,
+                 join_type: str = INNER) -> None:
+        self.sql = sql
+        self.params = tuple(params)
+        self.parent_alias = parent_alias
+        self.table_alias = table_alias
+        self.join_type = join_type
+
+    def as_sql(self, compiler, connection):
+        qn = compiler.quote_name_unless_alias
+        qn2 = connection.ops.quote_name
+        llave = Productos._meta.pk.column
+        return (
+            f'{self.join_type} ({self.sql}) {qn(self.table_alias)} '
+            f'ON ({qn(self.table_alias)}.{qn2("llave")} = {qn(self.parent_alias)}.{qn2(llave)})',
+            self.params,
+        )
+
+    def relabeled_clone(self, change_map):
+        return self.__class__(
+            self.sql, self.params,
+            change_map.get(self.parent_alias, self.parent_alias),
+            change_map.get(self.table_alias, self.table_alias),
+            self.join_type,
+        )
+
+    @property
+    def identity(self):
+        return self.__class__, self.sql, self.params, self.parent_alias
+
+    def __eq__(self, other):
+        if not isinstance(other, JoinTexto):
+            return NotImplemented
+        return self.identity == other.identity
+
+    def __hash__(self):
+        return hash(self.identity)
+
+    def demote(self):
+        return self.relabeled_clone({})
+
+    promote = demote  # Siempre INNER: solo quedan los productos que calzan
+
+
+class RelevanciaTexto(Expression):
+    """Columna `relevancia` de un JoinTexto; sigue al alias si se renombra"""
+
+    def __init__(self, alias: str, output_field: Field) -> None:
+        super().__init__(output_field=output_field)
+        self.alias = alias
+
+    def as_sql(self, compiler, connection):
+        return f'{compiler.quote_name_unless_alias(self.alias)}.{connection.ops.quote_name("relevancia")}', []
+
+    def relabeled_clone(self, change_map):
+        return self.__class__(change_map.get(self.alias, self.alias), self.output_field)
+
+    def get_group_by_cols(self):
+        return [self]
+
+
+def anotar_relevancia(queryset: QuerySet, sql: str, params, output_field: Field) -> QuerySet:
+    """Une el resultado full-text una vez y anota su columna `relevancia`"""
+    queryset = queryset.all()
+    query = queryset.query
+    alias = query.join(JoinTexto(sql, params, query.get_initial_alias()))
+    return queryset.annotate(relevancia=RelevanciaTexto(alias, output_field))
+
+
+class BusquedaContiene:
+    """icontains sobre los campos de búsqueda; sin índice (LIKE '%x%')"""
+    nombre = 'contiene'
+
+    def filtrar(self, queryset: QuerySet, consulta: str) -> QuerySet:
+        filtro = Q()
+        for campo in CAMPOS_BUSQUEDA:
+            filtro |= Q(**{f'{campo}__icontains': consulta})
+        relevancia = reduce(operator.add, (
+            Case(When(**{f'{campo}__icontains': consulta}, then=Value(peso)), default=Value(0.0))
+            for campo, peso in zip(CAMPOS_BUSQUEDA, PESOS_CAMPOS)
+        ))
+        return queryset.filter(filtro).annotate(relevancia=relevancia)
+
+    def reconstruir(self) -> None:
+        pass
+
+
+class BusquedaFTS5:
+    """Tabla virtual FTS5 ProductosFTS (fallback SQLite)"""
+    nombre = 'fts5'
+    TABLA = 'ProductosFTS'
+
+    def expresion(self, consulta: str) -> str:
+        # "termino"* por palabra; FTS5 combina con AND implícito
+        return ' '.join('"{}"*'.format(t.replace('"', '""')) for t in terminos(consulta))
+
+    def filtrar(self, queryset: QuerySet, consulta: str) -> QuerySet:
+        expresion = self.expresion(consulta)
+        if not expresion:
+            return BusquedaContiene().filtrar(queryset, consulta)
+        pesos = ', '.join(str(p) for p in PESOS_CAMPOS)
+        return anotar_relevancia(
+            queryset,
+            # bm25 es negativo: más bajo = más relevante
+            f'SELECT rowid AS llave, -bm25({self.TABLA}, {pesos}) AS relevancia '
+            f'FROM {self.TABLA} WHERE {self.TABLA} MATCH %s',
+            [expresion],
+            FloatField(),
+        )
+
+    def reconstruir(self) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {self.TABLA}({self.TABLA}) VALUES ('rebuild')")
+
+    @classmethod
+    def disponible(cls) -> bool:
+        return cls.TABLA in connection.introspection.table_names()
+
+
+class BusquedaSqlServer:
+    """Índice full-text de SQL Server sobre Productos"""
+    nombre = 'sqlserver'
+
+    def expresion(self, consulta: str) -> str:
+        return ' AND '.join('"{}*"'.format(t.replace('"', '""')) for t in terminos(consulta))
+
+    def filtrar(self, queryset: QuerySet, consulta: str) -> QuerySet:
+        expresion = self.expresion(consulta)
+        if not expresion:
+            return BusquedaContiene().filtrar(queryset, consulta)
+        tabla = Productos._meta.db_table
+        return anotar_relevancia(
+            queryset,
+            f'SELECT [KEY] AS llave, [RANK] AS relevancia '
+            f"FROM CONTAINSTABLE([{tabla}], ({', '.join(CAMPOS_BUSQUEDA)}), %s)",
+            [expresion],
+            IntegerField(),
+        )
+
+    def reconstruir(self) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(f'ALTER FULLTEXT INDEX ON [{Productos._meta.db_table}] START FULL POPULATION')
+
+    @classmethod
+    def disponible(cls) -> bool:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT 1 FROM sys.fulltext_indexes WHERE object_id = OBJECT_ID(%s)',
+                [Productos._meta.db_table],
+            )
+            return cursor.fetchone() is not None
+
+
+BACKENDS = {
+    BusquedaContiene.nombre: BusquedaContiene,
+    BusquedaFTS5.nombre: BusquedaFTS5,
+    BusquedaSqlServer.nombre: BusquedaSqlServer,
+}
+
+_backend = None
+
+
+def _detectar():
+    try:
+        if connection.vendor == 'sqlite' and BusquedaFTS5.disponible():
+            return BusquedaFTS5()
+        if connection.vendor == 'microsoft' and BusquedaSqlServer.disponible():
+            return BusquedaSqlServer()
+    except DatabaseError as e:
+        print(f"[SmartERP] Advertencia detectando índice de búsqueda: {e}")
+    return BusquedaContiene()
+
+
+def backend_busqueda():
+    """Backend configurado en BUSQUEDA_BACKEND ('auto' detecta el índice una vez por proceso)"""
+    global _backend
+    if _backend is None:
+        nombre = getattr(settings, 'BUSQUEDA_BACKEND', 'auto')
+        _backend = BACKENDS[nombre]() if nombre in BACKENDS else _detectar()
+    return _backend
+
+
+def buscar_productos(consulta: str, queryset: Optional[QuerySet] = None) -> QuerySet:
+    """Productos que coinciden con la consulta, anotados con `relevancia`"""
+    queryset = Productos.objects.all() if queryset is None else queryset
+    if not (consulta or '').strip():
+        return queryset
+    return backend_busqueda().filtrar(queryset, consulta.strip())
+
+
+def ids_productos(consulta: str) -> QuerySet:
+    """Subconsulta de id_producto que coinciden (para filtrar Ventas u otras tablas)"""
+    return buscar_productos(consulta).order_by().values('id_producto')
@@ -0,0 +1,90 @@
+"""
+Tests del módulo Catalog.
+La búsqueda FTS5 corre sobre la tabla virtual ProductosFTS que crea el
+runner de pruebas (scripts/init_sqlite_db.py), sincronizada por triggers.
+"""
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .forms import ProductoSearchForm
+from .models.products import Productos
+from .services.search import BusquedaContiene, BusquedaFTS5, backend_busqueda, buscar_productos, ids_productos
+
+
+def crear_producto(**campos):
+    datos = {
+        'title': 'Producto', 'brand': 'Marca', 'categoria1': 'Despensa',
+        'normal_price': Decimal('1000'), 'oferta': False, 'sin_stock': False,
+        'datetime': timezone.localtime().strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    datos.update(campos)
+    return Productos.objects.create(**datos)
+
+
+@override_settings(BUSQUEDA_BACKEND='auto')
+class BusquedaFTS5Tests(TestCase):
+    """Búsqueda por prefijo, ranking bm25 y sincronización por triggers"""
+
+    def setUp(self):
+        patcher = mock.patch('catalog.services.search._backend', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.laptop = crear_producto(title='Laptop Gamer 15', brand='Lenovo', categoria1='Computación')
+        self.mouse = crear_producto(title='Mouse inalámbrico', brand='Logitech', categoria1='Computación')
+        self.bolso = crear_producto(title='Bolso para notebook', brand='Targus', categoria1='Laptop accesorios')
+
+    def _ids(self, consulta):
+        resultados = buscar_productos(consulta).order_by('-relevancia', 'id_producto')
+        return list(resultados.values_list('id_producto', flat=True))
+
+    def test_detecta_el_indice(self):
+        self.assertIsInstance(backend_busqueda(), BusquedaFTS5)
+
+    def test_prefijo_y_ranking_por_titulo(self):
+        # "lap" calza con title del laptop y categoría del bolso; title pesa más
+        self.assertEqual(self._ids('lap'), [self.laptop.id_producto, self.bolso.id_producto])
+
+    def test_terminos_se_combinan_con_and(self):
+        self.assertEqual(self._ids('computación logi'), [self.mouse.id_producto])
+        self.assertEqual(self._ids('laptop logitech'), [])
+
+    def test_comillas_y_operadores_del_usuario(self):
+        self.assertEqual(self._ids('"mouse* (inal'), [self.mouse.id_producto])
+        self.assertEqual(self._ids('mouse OR laptop'), [])  # OR es un término más, no un operador
+        self.assertEqual(buscar_productos('  ').count(), 3)
+
+    def test_triggers_sincronizan_ediciones_y_bajas(self):
+        self.mouse.title = 'Teclado mecánico'
+        self.mouse.save()
+        self.assertEqual(self._ids('mouse'), [])
+        self.assertEqual(self._ids('tecl'), [self.mouse.id_producto])
+        self.laptop.delete()
+        self.assertEqual(self._ids('gamer'), [])
+
+    def test_mismos_resultados_que_contiene(self):
+        for consulta in ('Lenovo', 'notebook', 'Computación'):
+            contiene = BusquedaContiene().filtrar(Productos.objects.all(), consulta)
+            self.assertEqual(set(self._ids(consulta)), set(contiene.values_list('id_producto', flat=True)))
+
+    def test_formulario_ordena_por_relevancia_con_filtros(self):
+        crear_producto(title='Laptop Oficina', brand='HP', oferta=True)
+        form = ProductoSearchForm({'search': 'laptop', 'oferta': 'false'})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(
+            list(form.filtrar().values_list('id_producto', flat=True)),
+            [self.laptop.id_producto, self.bolso.id_producto],
+        )
+
+    def test_indice_se_consulta_una_vez(self):
+        resultados = buscar_productos('lap').order_by('-relevancia')
+        self.assertEqual(str(resultados.query).count('MATCH'), 1)
+        self.assertEqual(resultados.count(), 2)
+
+    def test_como_subconsulta_de_otra_tabla(self):
+        # La subconsulta renombra alias: el join y la relevancia deben seguirlos
+        productos = Productos.objects.filter(id_producto__in=ids_productos('lap')).exclude(
+            id_producto__in=ids_productos('gamer'))
+        self.assertEqual(list(productos.values_list('id_producto', flat=True)), [self.bolso.id_producto])
@@ -6,9 +6,11 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
 from django.core.paginator import Paginator
-from django.db.models import Q
 
+from .forms import ProductoSearchForm
 from .models.products import Productos
+from inventory.models.features import ElasticidadPrecio  # Import cross-app
+from inventory.services.elasticity import factor_precio_oferta  # Import cross-app
 
 
 @login_required
@@ -16,41 +18,23 @@ def lista_productos(request):
     """
     Lista todos los productos con paginación y filtros.
     """
-    productos = Productos.objects.all()
-    total_sin_filtros = productos.count()
+    total_sin_filtros = Productos.objects.count()
     
-    # Filtros de búsqueda
-    search_query = request.GET.get('search', '')
-    if search_query:
-        productos = productos.filter(
-            Q(title__icontains=search_query) |
-            Q(brand__icontains=search_query) |
-            Q(categoria1__icontains=search_query) |
-            Q(categoria2__icontains=search_query)
-        )
-        
-        if productos.count() == 0:
-            messages.info(request, f'No se encontraron productos con "{search_query}"')
-    
-    # Filtros por estado
+    # Búsqueda de texto completo, filtros y orden (ProductoSearchForm)
+    form = ProductoSearchForm(request.GET)
+    form.is_valid()  # Campos opcionales: los valores inválidos se ignoran
+    productos = form.filtrar(Productos.objects.all())
+    search_query = form.cleaned_data.get('search', '')
     oferta_filter = request.GET.get('oferta')
-    if oferta_filter == 'true':
-        productos = productos.filter(oferta=True)
-    elif oferta_filter == 'false':
-        productos = productos.filter(oferta=False)
-        
     stock_filter = request.GET.get('stock')
-    if stock_filter == 'disponible':
-        productos = productos.filter(sin_stock=False)
-    elif stock_filter == 'sin_stock':
-        productos = productos.filter(sin_stock=True)
-        if productos.count() > 0:
-            messages.warning(request, f'Hay {productos.count()} productos sin stock que requieren atención')
+    orden = form.orden_aplicado()
+    total_productos = productos.count()
     
-    # Ordenamiento
-    orden = request.GET.get('orden', 'title')
-    if orden in ['title', '-title', 'normal_price', '-normal_price', 'brand', '-brand']:
-        productos = productos.order_by(orden)
+    if search_query and total_productos == 0:
+        messages.info(request, f'No se encontraron productos con "{search_query}"')
+    
+    if form.cleaned_data.get('stock') == 'sin_stock' and total_productos > 0:
+        messages.warning(request, f'Hay {total_productos} productos sin stock que requieren atención')
     
     # Paginación
     paginator = Paginator(productos, 25)  # 25 productos por página
@@ -64,7 +48,7 @@ def lista_productos(request):
         'productos': page_obj,
         'productos_recientes': productos_recientes,
         'search_query': search_query,
-        'total_productos': productos.count(),
+        'total_productos': total_productos,
         'total_sin_filtros': total_sin_filtros,
         'oferta_filter': oferta_filter,
         'stock_filter': stock_filter,
@@ -147,8 +131,22 @@ def detalle_producto(request, id_producto):
     """
     producto = get_object_or_404(Productos, id_producto=id_producto)
     
+    # Elasticidad precio-demanda (manage.py calcular_elasticidades)
+    elasticidad = ElasticidadPrecio.objects.filter(id_producto=id_producto).first()
+    factor_oferta = factor_precio_oferta(producto)
+    efecto_oferta = None
+    if elasticidad and factor_oferta:
+        variacion = elasticidad.variacion_demanda(factor_oferta)
+        if variacion is not None:
+            efecto_oferta = {
+                'descuento_pct': (1 - factor_oferta) * 100,
+                'variacion_demanda_pct': variacion * 100,
+            }
+    
     context = {
         'producto': producto,
+        'elasticidad': elasticidad,
+        'efecto_oferta': efecto_oferta,
     }
     return render(request, 'catalog/detalle_producto.html', context)
 
@@ -219,6 +219,75 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 _static_dir = os.path.join(BASE_DIR, 'static')
 STATICFILES_DIRS = [_static_dir] if os.path.isdir(_static_dir) else []
 
+# Cache compartido: Redis (django-redis) cuando hay REDIS_URL, así los workers
+# de gunicorn ven las mismas versiones; si no, archivo (CACHE_DIR) o locmem
+_redis_url = os.getenv('REDIS_URL', '')
+_cache_dir = os.getenv('CACHE_DIR', '')
+if _redis_url:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': _redis_url,
+            'KEY_PREFIX': 'smarterp',
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+                # Redis caído = se recalcula, no se bloquean los guardados
+                'IGNORE_EXCEPTIONS': True,
+            },
+        }
+    }
+elif _cache_dir:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': _cache_dir,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'smarterp',
+        }
+    }
+
+# Dashboard - contexto cacheado con versiones por tabla (services.versiones)
+DASHBOARD_CACHE_ALIAS = os.getenv('DASHBOARD_CACHE_ALIAS', 'default')
+DASHBOARD_CACHE_TTL = int(os.getenv('DASHBOARD_CACHE_TTL', '300'))  # segundos
+
+# Vistas async de dashboard e informes (perfil ASGI con uvicorn, ver docker-compose.asgi.yml)
+VISTAS_ASYNC = os.getenv('DJANGO_VISTAS_ASYNC', 'False').lower() in ('1', 'true', 'yes', 'on')
+# Hilos por proceso para consultas concurrentes (cada uno usa su propia conexión)
+VISTAS_ASYNC_HILOS = int(os.getenv('VISTAS_ASYNC_HILOS', '4'))
+
+# Búsqueda del catálogo: auto (FTS5 en SQLite, full-text en SQL Server, si existen),
+# fts5, sqlserver o contiene (icontains sin índice)
+BUSQUEDA_BACKEND = os.getenv('BUSQUEDA_BACKEND', 'auto')
+
+# Predicciones ML - Snapshot persistido (manage.py refrescar_predicciones desde cron)
+# y cacheado, compartido por dashboard, predicciones y CSV
+PREDICCIONES_DIR = Path(os.getenv('PREDICCIONES_DIR', BASE_DIR / 'predicciones'))
+PREDICCIONES_CACHE_ALIAS = os.getenv('PREDICCIONES_CACHE_ALIAS', 'default')
+# Segundos antes de releer el archivo del snapshot (no recalcula el modelo)
+PREDICCIONES_CACHE_TTL = int(os.getenv('PREDICCIONES_CACHE_TTL', '900'))
+# Procesos para predecir el catálogo por shards de id_producto (1 = secuencial)
+PREDICCIONES_WORKERS = int(os.getenv('PREDICCIONES_WORKERS', '1'))
+
+# Motor de reposición (punto de reorden, stock de seguridad y EOQ)
+REPOSICION_LEAD_TIME_DIAS = float(os.getenv('REPOSICION_LEAD_TIME_DIAS', '7'))
+REPOSICION_DESVIACION_LEAD_TIME_DIAS = float(os.getenv('REPOSICION_DESVIACION_LEAD_TIME_DIAS', '0'))
+REPOSICION_NIVEL_SERVICIO = float(os.getenv('REPOSICION_NIVEL_SERVICIO', '0.95'))
+REPOSICION_COSTO_PEDIDO = float(os.getenv('REPOSICION_COSTO_PEDIDO', '25000'))  # CLP por orden
+REPOSICION_TASA_MANTENCION = float(os.getenv('REPOSICION_TASA_MANTENCION', '0.25'))  # anual
+# Lead time por categoría en JSON, p. ej. {"Electrohogar": 21, "Computación": 10}
+REPOSICION_LEAD_TIME_CATEGORIAS = os.getenv('REPOSICION_LEAD_TIME_CATEGORIAS', '{}')
+
+# Artefactos versionados del modelo de predicción (reentrenamiento: manage.py entrenar_modelo)
+MODELOS_DIR = Path(os.getenv('MODELOS_DIR', BASE_DIR / 'modelos'))
+
+# Tests: crea las tablas managed=False en la base de pruebas (manage.py test)
+TEST_RUNNER = 'inventario_web.test_runner.SmartERPTestRunner'
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
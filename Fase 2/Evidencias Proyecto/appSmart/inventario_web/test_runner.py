@@ -0,0 +1,27 @@
+"""
+Runner de tests SmartERP.
+Los modelos son managed=False, así que la base de pruebas no trae las tablas
+del negocio: tras crearla se ejecuta el DDL de scripts/init_sqlite_db.py
+(tablas, índices, FTS5 y triggers), el mismo de la base local de desarrollo.
+"""
+import importlib.util
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+def _crear_tablas_negocio():
+    ruta = settings.BASE_DIR / 'scripts' / 'init_sqlite_db.py'
+    spec = importlib.util.spec_from_file_location('init_sqlite_db', ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    modulo.crear_tablas_sqlite()
+
+
+class SmartERPTestRunner(DiscoverRunner):
+    """DiscoverRunner que crea las tablas no gestionadas en la base de pruebas"""
+
+    def setup_databases(self, **kwargs):
+        configuracion = super().setup_databases(**kwargs)
+        _crear_tablas_negocio()
+        return configuracion
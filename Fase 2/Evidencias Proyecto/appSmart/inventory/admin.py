@@ -2,7 +2,7 @@
 Administración de modelos del módulo Inventory en Django Admin.
 """
 from django.contrib import admin
-from .models.movements import StgProductosRaw
+from .models.movements import MovimientoStock, SaldoStock, StgProductosRaw
 
 
 @admin.register(StgProductosRaw)
@@ -11,17 +11,16 @@ class StgProductosRawAdmin(admin.ModelAdmin):
     
     list_display = [
         'id', 'title', 'brand', 'normal_price', 
-        'categoria1', 'sin_stock', 'fecha_carga'
+        'categoria1', 'sin_stock', 'datetime'
     ]
     
-    list_filter = ['sin_stock', 'fecha_carga', 'categoria1']
+    list_filter = ['sin_stock', 'categoria1']
     
     search_fields = ['title', 'brand', 'categoria1']
     
-    readonly_fields = ['id', 'fecha_carga']
+    readonly_fields = ['id', 'datetime']
     
     list_per_page = 50
-    date_hierarchy = 'fecha_carga'
     
     fieldsets = (
         ('Datos Staging', {
@@ -31,7 +30,7 @@ class StgProductosRawAdmin(admin.ModelAdmin):
             'fields': ('categoria1', 'sin_stock')
         }),
         ('Metadatos ETL', {
-            'fields': ('fecha_carga',),
+            'fields': ('datetime',),
             'classes': ('collapse',)
         }),
     )
@@ -39,3 +38,43 @@ class StgProductosRawAdmin(admin.ModelAdmin):
     def has_change_permission(self, request, obj=None):
         """Solo lectura para datos staging"""
         return False
+
+
+@admin.register(MovimientoStock)
+class MovimientoStockAdmin(admin.ModelAdmin):
+    """Libro de movimientos de stock (solo inserción, vía servicio de stock)"""
+
+    list_display = ['id_movimiento', 'id_producto', 'tipo', 'cantidad', 'saldo_resultante', 'fecha', 'referencia']
+    list_filter = ['tipo', 'fecha']
+    search_fields = ['referencia']
+    raw_id_fields = ['id_producto']
+    list_per_page = 50
+    date_hierarchy = 'fecha'
+
+    def has_add_permission(self, request):
+        """Los movimientos se registran con manage.py ajustar_stock o las ventas"""
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(SaldoStock)
+class SaldoStockAdmin(admin.ModelAdmin):
+    """Saldos vigentes por producto (derivados del libro)"""
+
+    list_display = ['id_producto', 'cantidad', 'id_ultimo_movimiento', 'actualizado']
+    raw_id_fields = ['id_producto']
+    list_per_page = 50
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
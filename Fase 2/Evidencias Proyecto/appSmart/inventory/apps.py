@@ -4,4 +4,12 @@ from django.apps import AppConfig
 class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'inventory'
-    verbose_name = 'SmartERP Inventario'
\ No newline at end of file
+    verbose_name = 'SmartERP Inventario'
+
+    def ready(self):
+        # Cargar el artefacto del modelo una vez al iniciar el worker
+        from .services.model_store import artefacto_actual
+        artefacto_actual()
+
+        # Feature store sincronizado con ventas y productos guardados por el ORM
+        from . import signals  # noqa: F401
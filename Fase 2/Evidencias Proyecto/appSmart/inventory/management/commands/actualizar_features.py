@@ -0,0 +1,31 @@
+"""
+Comando: sincroniza el feature store de predicciones (tabla FeaturesProducto).
+Pensado para ejecutarse al final de cada carga ETL y de ingesta masiva de
+ventas; solo recalcula productos con cambios desde el último checkpoint.
+También incrementa las versiones de cache de Productos, Ventas y SaldosStock,
+porque las cargas masivas no emiten señales y el dashboard quedaría obsoleto.
+
+Uso:
+    python manage.py actualizar_features
+    python manage.py actualizar_features --completo
+"""
+from django.core.management.base import BaseCommand
+
+from inventory.services.feature_store import actualizar_feature_store
+from inventory.services.versiones import PRODUCTOS, SALDOS_STOCK, VENTAS, incrementar_version
+
+
+class Command(BaseCommand):
+    help = 'Actualiza incrementalmente el feature store de predicciones'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--completo',
+            action='store_true',
+            help='Reconstruye la tabla completa en vez de solo los productos modificados',
+        )
+
+    def handle(self, *args, **options):
+        filas = actualizar_feature_store(completo=options['completo'])
+        incrementar_version(PRODUCTOS, VENTAS, SALDOS_STOCK)
+        self.stdout.write(self.style.SUCCESS(f'Feature store actualizado: {filas} productos recalculados'))
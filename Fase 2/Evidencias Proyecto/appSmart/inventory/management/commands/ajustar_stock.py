@@ -0,0 +1,59 @@
+"""
+Comando: registra recepciones o ajustes en el libro de stock.
+Con --archivo carga un CSV (id_producto,cantidad) en una sola transacción;
+útil para el inventario inicial o recepciones masivas de proveedores.
+
+Uso:
+    python manage.py ajustar_stock --producto 15 --cantidad 40 --referencia OC-1234
+    python manage.py ajustar_stock --producto 15 --cantidad -3 --tipo ajuste
+    python manage.py ajustar_stock --archivo inventario_inicial.csv --tipo ajuste
+"""
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.models.movements import MovimientoStock
+from inventory.services.stock import registrar_movimientos
+
+
+class Command(BaseCommand):
+    help = 'Registra recepciones o ajustes de stock en el libro de movimientos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--producto', type=int, help='id_producto a ajustar')
+        parser.add_argument('--cantidad', type=int, help='Unidades (con signo en ajustes)')
+        parser.add_argument(
+            '--tipo',
+            choices=[MovimientoStock.RECEPCION, MovimientoStock.AJUSTE],
+            default=MovimientoStock.RECEPCION,
+        )
+        parser.add_argument('--referencia', default=None, help='Documento de respaldo (OC, guía, conteo)')
+        parser.add_argument('--archivo', default=None, help='CSV con columnas id_producto,cantidad')
+
+    def handle(self, *args, **options):
+        tipo = options['tipo']
+        if options['archivo']:
+            filas = self._leer_archivo(options['archivo'])
+        elif options['producto'] is not None and options['cantidad'] is not None:
+            filas = [(options['producto'], options['cantidad'])]
+        else:
+            raise CommandError('Indique --producto y --cantidad, o --archivo')
+
+        if tipo == MovimientoStock.RECEPCION and any(cantidad < 0 for _, cantidad in filas):
+            raise CommandError('Las recepciones no pueden tener cantidades negativas; use --tipo ajuste')
+
+        movimientos = registrar_movimientos([
+            (id_producto, tipo, cantidad, None, options['referencia'])
+            for id_producto, cantidad in filas
+        ])
+        self.stdout.write(self.style.SUCCESS(f'{len(movimientos)} movimientos registrados ({tipo})'))
+
+    def _leer_archivo(self, ruta):
+        try:
+            with open(ruta, newline='', encoding='utf-8') as archivo:
+                return [
+                    (int(fila['id_producto']), int(fila['cantidad']))
+                    for fila in csv.DictReader(archivo)
+                ]
+        except (OSError, KeyError, ValueError) as e:
+            raise CommandError(f'No se pudo leer {ruta}: {e}')
@@ -0,0 +1,54 @@
+"""
+Comando: backtesting walk-forward del recomendador de compras.
+Reproduce mes a mes las recomendaciones con el historial disponible en cada
+corte y las compara con la demanda real del mes siguiente.
+
+Uso:
+    python manage.py backtest_recomendaciones
+    python manage.py backtest_recomendaciones --meses 24 --workers 8
+    python manage.py backtest_recomendaciones --reglas
+"""
+import os
+
+from django.core.management.base import BaseCommand
+
+from inventory.services.backtesting import MESES_BACKTEST, ejecutar_backtest
+
+
+class Command(BaseCommand):
+    help = 'Evalúa las recomendaciones de compra contra la demanda real (walk-forward)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--meses', type=int, default=MESES_BACKTEST,
+                            help='Meses cerrados a evaluar (un corte por mes)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Procesos para evaluar cortes en paralelo')
+        parser.add_argument('--reglas', action='store_true',
+                            help='Usar reglas de negocio en vez del modelo vigente '
+                                 '(el modelo pudo entrenarse con meses del backtest)')
+
+    def handle(self, *args, **options):
+        resultado = ejecutar_backtest(
+            meses=options['meses'],
+            workers=options['workers'],
+            usar_modelo=not options['reglas'],
+        )
+
+        self.stdout.write(
+            f"{'Mes':<8} {'Comprar':>8} {'Demanda':>8} {'Cubiertos':>10} {'Quiebres':>9} "
+            f"{'Faltante':>10} {'Sobrestock':>11} {'MAPE':>8}"
+        )
+        filas = [(c.periodo.strftime('%Y-%m'), c) for c in resultado.cortes]
+        filas.append(('Total', resultado.total))
+        for etiqueta, corte in filas:
+            self.stdout.write(
+                f"{etiqueta:<8} {corte.comprar:>8} {corte.con_demanda:>8} "
+                f"{corte.quiebres_evitados:>10} {corte.quiebres:>9} {corte.unidades_faltantes:>10.0f} "
+                f"{corte.unidades_sobrestock:>11.0f} {corte.mape:>8.1%}"
+            )
+
+        total = resultado.total
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(resultado.cortes)} cortes: cobertura {total.tasa_cobertura:.1%}, "
+            f"MAPE {total.mape:.1%}, {total.unidades_sobrestock:.0f} unidades de sobrestock"
+        ))
@@ -0,0 +1,72 @@
+"""
+Comando: búsqueda de hiperparámetros del modelo y del recomendador de compras.
+Evalúa en paralelo paso de gradiente, epochs, umbral de compra y factor de
+cobertura sobre un holdout temporal de Ventas, reentrena con la mejor combinación y la
+publica en el artefacto versionado (el recomendador la lee desde ahí).
+
+Uso:
+    python manage.py buscar_hiperparametros
+    python manage.py buscar_hiperparametros --workers 8 --muestras 300 --seed 42
+    python manage.py buscar_hiperparametros --sin-publicar
+"""
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.services.snapshot import refrescar_predicciones
+from inventory.services.training import VENTANAS_ENTRENAMIENTO
+from inventory.services.tuning import MESES_HOLDOUT, PESO_QUIEBRE, buscar_hiperparametros, publicar_mejor
+
+
+class Command(BaseCommand):
+    help = 'Busca la mejor configuración del regresor y del umbral de compra'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--muestras', type=int, default=None,
+                            help='Evaluar una muestra aleatoria de la grilla (random search)')
+        parser.add_argument('--batch-size', type=int, default=256)
+        parser.add_argument('--ventanas', type=int, default=VENTANAS_ENTRENAMIENTO)
+        parser.add_argument('--meses-holdout', type=int, default=MESES_HOLDOUT)
+        parser.add_argument('--peso-quiebre', type=float, default=PESO_QUIEBRE,
+                            help='Costo de una unidad faltante relativo a una de sobrestock')
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--top', type=int, default=5, help='Candidatos a mostrar')
+        parser.add_argument('--sin-publicar', action='store_true',
+                            help='Solo mostrar resultados, sin reentrenar ni publicar')
+
+    def handle(self, *args, **options):
+        try:
+            resultados = buscar_hiperparametros(
+                workers=options['workers'],
+                muestras=options['muestras'],
+                batch_size=options['batch_size'] or None,
+                ventanas=options['ventanas'],
+                meses_holdout=options['meses_holdout'],
+                peso_quiebre=options['peso_quiebre'],
+                seed=options['seed'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f'{len(resultados)} candidatos evaluados')
+        for r in resultados[:options['top']]:
+            c = r.config
+            self.stdout.write(
+                f"  costo {r.costo:>10.0f}  paso {r.paso_gradiente:<5} epochs {r.epochs:<4} "
+                f"umbral {c.umbral_compra:.2f} cobertura {c.factor_cobertura:.2f}  "
+                f"MAPE {r.metricas.mape:.1%} log-loss {r.log_loss:.3f}"
+            )
+
+        if options['sin_publicar'] or not resultados:
+            return
+
+        artefacto = publicar_mejor(
+            resultados[0], len(resultados),
+            batch_size=options['batch_size'] or None,
+            ventanas=options['ventanas'],
+            seed=options['seed'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Modelo v{artefacto.version} publicado con la mejor configuración'))
+        refrescar_predicciones()
+        self.stdout.write('Snapshot de predicciones actualizado')
@@ -0,0 +1,27 @@
+"""
+Comando: recalcula la elasticidad precio-demanda por producto y categoría
+(tabla ElasticidadesPrecio) con todo el historial de Ventas.
+Pensado para ejecutarse después de cada carga ETL o ingesta masiva de ventas.
+
+Uso:
+    python manage.py calcular_elasticidades
+"""
+import numpy as np
+
+from django.core.management.base import BaseCommand
+
+from inventory.services.elasticity import calcular_elasticidades
+
+
+class Command(BaseCommand):
+    help = 'Calcula la elasticidad precio-demanda (log-log) por producto y categoría'
+
+    def handle(self, *args, **options):
+        resultado = calcular_elasticidades()
+        estimados = int(np.count_nonzero(~np.isnan(resultado.elasticidad)))
+        self.stdout.write(self.style.SUCCESS(
+            f'Elasticidades calculadas: {len(resultado)} productos con ventas, '
+            f'{estimados} con estimación propia'
+        ))
+        for categoria, valor in sorted(resultado.categorias.items()):
+            self.stdout.write(f'  {categoria}: {valor:.2f}')
@@ -0,0 +1,78 @@
+"""
+Comando: reentrena el modelo de predicción con el historial de Ventas.
+Publica una nueva versión del artefacto de forma atómica y refresca el
+snapshot de predicciones. Pensado para ejecutarse en segundo plano (cron).
+Con --incremental solo aprende de las ventas insertadas desde el último
+checkpoint (partial_fit), sin recorrer todo el historial.
+
+Uso:
+    python manage.py entrenar_modelo
+    python manage.py entrenar_modelo --epochs 200 --paso-gradiente 2.0 --seed 42
+    python manage.py entrenar_modelo --incremental
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.services.snapshot import refrescar_predicciones
+from inventory.services.training import VENTANAS_ENTRENAMIENTO, actualizar_modelo, entrenar_modelo
+
+
+class Command(BaseCommand):
+    help = 'Entrena el regresor logístico y publica un nuevo artefacto versionado'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--paso-gradiente', type=float, default=4.0,
+                            help='Paso sobre el gradiente promedio de cada lote')
+        parser.add_argument('--epochs', type=int, default=None,
+                            help='Pasadas sobre los datos (450 completo, 1 incremental)')
+        parser.add_argument('--batch-size', type=int, default=256)
+        parser.add_argument('--ventanas', type=int, default=VENTANAS_ENTRENAMIENTO,
+                            help='Cortes mensuales usados como muestras de entrenamiento')
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--sin-refrescar', action='store_true',
+                            help='No recalcular el snapshot de predicciones al terminar')
+        parser.add_argument('--incremental', action='store_true',
+                            help='Actualizar el modelo vigente solo con ventas nuevas')
+
+    def handle(self, *args, **options):
+        if options['incremental']:
+            return self._actualizar(options)
+
+        try:
+            artefacto = entrenar_modelo(
+                paso_gradiente=options['paso_gradiente'],
+                epochs=options['epochs'] or 450,
+                batch_size=options['batch_size'] or None,
+                ventanas=options['ventanas'],
+                seed=options['seed'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        accuracy = artefacto.metadata.get('accuracy_holdout')
+        self.stdout.write(self.style.SUCCESS(
+            f"Modelo v{artefacto.version} publicado: {artefacto.metadata['muestras']} muestras, "
+            f"accuracy holdout {accuracy:.3f}" if accuracy is not None else
+            f"Modelo v{artefacto.version} publicado"
+        ))
+
+        if not options['sin_refrescar']:
+            refrescar_predicciones()
+            self.stdout.write('Snapshot de predicciones actualizado con el nuevo modelo')
+
+    def _actualizar(self, options):
+        try:
+            artefacto = actualizar_modelo(epochs=options['epochs'] or 1, seed=options['seed'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if artefacto is None:
+            self.stdout.write('Sin ventas nuevas de meses cerrados; el modelo vigente no cambia')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Modelo v{artefacto.version} publicado: {artefacto.metadata['muestras_incrementales']} "
+            f"muestras nuevas (checkpoint venta {artefacto.metadata['checkpoint_id_venta']})"
+        ))
+
+        if not options['sin_refrescar']:
+            refrescar_predicciones()
+            self.stdout.write('Snapshot de predicciones actualizado con el nuevo modelo')
@@ -0,0 +1,39 @@
+"""
+Comando: exporta reportes de predicciones a CSV en streaming.
+Procesa el catálogo por lotes con iter_predicciones, sin cargarlo completo
+en memoria (apto para tareas en segundo plano sobre catálogos grandes).
+
+Uso:
+    python manage.py exportar_predicciones compras --salida reporte_compras.csv
+    python manage.py exportar_predicciones stock --salida resumen_stock.csv --chunk-size 5000
+"""
+from django.core.management.base import BaseCommand
+
+from inventory.services.predictions import iter_reporte_compras_csv, iter_reporte_stock_csv
+
+
+REPORTES = {
+    'compras': iter_reporte_compras_csv,
+    'stock': iter_reporte_stock_csv,
+}
+
+
+class Command(BaseCommand):
+    help = 'Exporta el reporte de compras o de stock calculando predicciones por lotes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('reporte', choices=sorted(REPORTES))
+        parser.add_argument('--salida', required=True, help='Ruta del archivo CSV de salida')
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Productos por lote (default: 1000)')
+
+    def handle(self, *args, **options):
+        lineas = REPORTES[options['reporte']](chunk_size=options['chunk_size'])
+        total = 0
+        with open(options['salida'], 'w', encoding='utf-8-sig', newline='') as archivo:
+            for linea in lineas:
+                archivo.write(linea)
+                total += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"Reporte '{options['reporte']}' exportado: {total - 1} filas en {options['salida']}"
+        ))
@@ -0,0 +1,39 @@
+"""
+Comando: genera los cierres diarios de stock (tabla CierresStock).
+Sin argumentos continúa desde el último cierre hasta ayer; pensado para
+ejecutarse cada noche. Con --desde se regeneran días ya cerrados (por
+ejemplo tras registrar un ajuste con fecha retroactiva).
+
+Uso:
+    python manage.py generar_cierres_stock
+    python manage.py generar_cierres_stock --desde 2025-01-01 --hasta 2025-12-31
+"""
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.services.stock import generar_cierres
+
+
+def _fecha(valor):
+    try:
+        return datetime.date.fromisoformat(valor)
+    except ValueError:
+        raise CommandError(f'Fecha inválida: {valor} (formato AAAA-MM-DD)')
+
+
+class Command(BaseCommand):
+    help = 'Genera los cierres diarios de stock para consultas históricas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=str, default=None, help='Primer día a generar (AAAA-MM-DD)')
+        parser.add_argument('--hasta', type=str, default=None, help='Último día a generar (por defecto ayer)')
+
+    def handle(self, *args, **options):
+        desde = _fecha(options['desde']) if options['desde'] else None
+        hasta = _fecha(options['hasta']) if options['hasta'] else None
+        if desde and hasta and desde > hasta:
+            raise CommandError('--desde debe ser anterior a --hasta')
+
+        filas = generar_cierres(desde=desde, hasta=hasta)
+        self.stdout.write(self.style.SUCCESS(f'Cierres de stock generados: {filas} filas'))
@@ -0,0 +1,60 @@
+"""
+Comando: refresca el snapshot de predicciones ML.
+Pensado para ejecutarse periódicamente (cron / tarea programada): las vistas
+solo leen el último snapshot persistido y nunca calculan el modelo.
+
+Uso:
+    python manage.py refrescar_predicciones
+    python manage.py refrescar_predicciones --incremental
+    python manage.py refrescar_predicciones --invalidar
+    python manage.py refrescar_predicciones --desde-features
+"""
+from django.core.management.base import BaseCommand
+
+from inventory.services.snapshot import (
+    guardar_resumen_feature_store, invalidar_predicciones, refrescar_predicciones,
+)
+
+
+class Command(BaseCommand):
+    help = 'Recalcula y guarda el snapshot de predicciones de inventario'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Recalcula solo productos con ventas nuevas o atributos modificados',
+        )
+        parser.add_argument(
+            '--invalidar',
+            action='store_true',
+            help='Solo descarta el snapshot del cache (la próxima lectura relee el archivo)',
+        )
+        parser.add_argument(
+            '--desde-features',
+            action='store_true',
+            help='Solo guarda un resumen puntuado desde el feature store si aún no hay snapshot',
+        )
+
+    def handle(self, *args, **options):
+        if options['invalidar']:
+            invalidar_predicciones()
+            self.stdout.write(self.style.SUCCESS('Snapshot de predicciones descartado del cache'))
+            return
+
+        if options['desde_features']:
+            resumen = guardar_resumen_feature_store()
+            if resumen is None:
+                self.stdout.write('Resumen no guardado: ya hay snapshot o el feature store está vacío')
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Resumen desde features: {resumen['sugerencias']} sugerencias de compra, "
+                    f"{resumen['sobrestock']} sobrestock"
+                ))
+            return
+
+        payload = refrescar_predicciones(incremental=options['incremental'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Snapshot actualizado: {len(payload.items)} productos, '
+            f'{payload.sugerencias} sugerencias de compra, {payload.sobrestock} sobrestock'
+        ))
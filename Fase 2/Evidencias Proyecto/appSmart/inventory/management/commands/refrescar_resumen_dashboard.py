@@ -0,0 +1,28 @@
+"""
+Comando: recalcula el resumen materializado del dashboard (ResumenDashboard).
+Último paso de la carga StgProductosRaw → Productos y de cada ingesta masiva
+de ventas, que no emiten señales. Con --solo-catalogo conserva los totales
+de ventas mantenidos por deltas (carga de productos sin ventas nuevas).
+
+Uso:
+    python manage.py refrescar_resumen_dashboard
+    python manage.py refrescar_resumen_dashboard --solo-catalogo
+"""
+from django.core.management.base import BaseCommand
+
+from inventory.services.resumen import refrescar_resumen
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el resumen materializado del dashboard'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--solo-catalogo',
+            action='store_true',
+            help='No reagrega Ventas (solo conteos y precios del catálogo y saldos)',
+        )
+
+    def handle(self, *args, **options):
+        filas = refrescar_resumen(ventas=not options['solo_catalogo'])
+        self.stdout.write(self.style.SUCCESS(f'Resumen del dashboard actualizado: {filas} filas'))
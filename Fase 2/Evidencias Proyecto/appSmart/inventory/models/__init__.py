@@ -1,4 +1,7 @@
 # Inventory Models - Exportación limpia
-from .movements import StgProductosRaw
+from .movements import StgProductosRaw, MovimientoStock, SaldoStock, CierreStock
+from .features import ElasticidadPrecio, FeaturesProducto, MarcaAguaProceso
+from .dashboard import ResumenDashboard
 
-__all__ = ['StgProductosRaw']
\ No newline at end of file
+__all__ = ['StgProductosRaw', 'MovimientoStock', 'SaldoStock', 'CierreStock', 'FeaturesProducto',
+           'MarcaAguaProceso', 'ElasticidadPrecio', 'ResumenDashboard']
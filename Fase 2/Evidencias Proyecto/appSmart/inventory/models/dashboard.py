@@ -0,0 +1,45 @@
+from django.db import models
+
+
+class ResumenDashboard(models.Model):
+    """
+    Resumen materializado del dashboard: una fila global y una por categoría
+    y por marca con conteos y precios del catálogo. La fila global además
+    lleva los totales de ventas. Ventas y movimientos de stock suman sus
+    deltas; el resto se recalcula al cerrar cada carga.
+    """
+    GLOBAL = 'global'
+    CATEGORIA = 'categoria'
+    MARCA = 'marca'
+    DIMENSIONES = [
+        (GLOBAL, 'Global'),
+        (CATEGORIA, 'Categoría'),
+        (MARCA, 'Marca'),
+    ]
+
+    id_resumen = models.AutoField(primary_key=True)
+    dimension = models.CharField(max_length=10, choices=DIMENSIONES, db_collation='Modern_Spanish_CI_AS')
+    valor = models.CharField(max_length=100, db_collation='Modern_Spanish_CI_AS')  # '' en la fila global
+    productos = models.IntegerField()
+    productos_oferta = models.IntegerField()
+    productos_con_stock = models.IntegerField()  # Saldo del libro o, sin fila de saldo, flag sin_stock
+    productos_sin_stock = models.IntegerField()
+    precio_promedio = models.FloatField(blank=True, null=True)
+    precio_min = models.DecimalField(max_digits=12, decimal_places=2, blank=True, null=True)
+    precio_max = models.DecimalField(max_digits=12, decimal_places=2, blank=True, null=True)
+    # Solo fila global
+    categorias = models.IntegerField(default=0)
+    marcas = models.IntegerField(default=0)
+    ventas = models.IntegerField(default=0)
+    unidades_vendidas = models.BigIntegerField(default=0)
+    ingresos = models.DecimalField(max_digits=23, decimal_places=2, default=0)
+    version = models.IntegerField(default=0)  # +1 en cada delta y refresco (control optimista)
+    actualizado = models.DateTimeField()
+
+    class Meta:
+        managed = False  # CRÍTICO: No permitir migraciones Django
+        db_table = 'ResumenDashboard'
+        unique_together = (('dimension', 'valor'),)
+
+    def __str__(self):
+        return f"Resumen {self.dimension} {self.valor}".strip()
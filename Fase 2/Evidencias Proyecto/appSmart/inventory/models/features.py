@@ -0,0 +1,94 @@
+from django.db import models
+
+from catalog.models.products import Productos  # Import cross-app
+
+
+class FeaturesProducto(models.Model):
+    """
+    Feature store del modelo de predicción: una fila por producto con las
+    features precalculadas (precio, flags) y agregados de ventas de los
+    últimos 12 meses. Se mantiene incrementalmente desde ETL y ventas.
+    """
+    id_producto = models.OneToOneField(
+        Productos, models.DO_NOTHING, primary_key=True, db_column='id_producto', related_name='features'
+    )
+    precio = models.FloatField()
+    sin_stock = models.BooleanField()
+    en_oferta = models.BooleanField()
+    disponible = models.BooleanField()
+    promedio = models.FloatField()
+    varianza = models.FloatField()
+    volatilidad = models.FloatField()
+    tendencia = models.FloatField()
+    ultima_cantidad = models.IntegerField()
+    maxima_cantidad = models.IntegerField()
+    ventas_12m = models.IntegerField()
+    ingresos_12m = models.FloatField()
+    periodo = models.DateField()  # Mes en curso al calcular la ventana
+    id_venta_max = models.IntegerField()  # Última venta al calcular la fila (informativo)
+    datetime_producto = models.CharField(max_length=50, db_collation='Modern_Spanish_CI_AS', blank=True, null=True)
+    actualizado = models.DateTimeField()
+
+    class Meta:
+        managed = False  # CRÍTICO: No permitir migraciones Django
+        db_table = 'FeaturesProducto'
+
+    def __str__(self):
+        return f"Features {self.id_producto_id} ({self.periodo:%Y-%m})"
+
+
+class MarcaAguaProceso(models.Model):
+    """
+    Checkpoint de un proceso batch (p. ej. 'features'): último estado de
+    Ventas, Productos y movimientos de stock que procesó la pasada completa o
+    incremental. Las actualizaciones puntuales de las señales no lo mueven.
+    """
+    FEATURES = 'features'
+
+    proceso = models.CharField(max_length=30, primary_key=True, db_collation='Modern_Spanish_CI_AS')
+    id_venta = models.IntegerField()
+    fecha_venta = models.DateField(blank=True, null=True)
+    datetime_producto = models.DateTimeField(blank=True, null=True)  # Max de Productos.datetime
+    id_producto = models.IntegerField()
+    id_movimiento = models.IntegerField(blank=True, null=True)
+    periodo = models.DateField()
+    actualizado = models.DateTimeField()  # Lectura de la marca (= MarcaAgua.generado)
+
+    class Meta:
+        managed = False  # CRÍTICO: No permitir migraciones Django
+        db_table = 'MarcasAguaProceso'
+
+    def __str__(self):
+        return f"Marca {self.proceso}: venta {self.id_venta}"
+
+
+class ElasticidadPrecio(models.Model):
+    """
+    Elasticidad precio-demanda por producto (pendiente log-log de cantidad
+    mensual vs precio unitario promedio). `elasticidad_aplicada` combina la
+    estimación del SKU con la de su categoría según la variación de precio
+    observada; es la que usan predictor y ficha de producto.
+    """
+    id_producto = models.OneToOneField(
+        Productos, models.DO_NOTHING, primary_key=True, db_column='id_producto', related_name='elasticidad'
+    )
+    elasticidad = models.FloatField(blank=True, null=True)  # Estimación propia (None sin variación de precio)
+    r2 = models.FloatField(blank=True, null=True)
+    observaciones = models.IntegerField()  # Meses con ventas usados en el ajuste
+    variacion_precio = models.FloatField()  # Desviación estándar de log(precio)
+    elasticidad_categoria = models.FloatField(blank=True, null=True)
+    elasticidad_aplicada = models.FloatField(blank=True, null=True)
+    actualizado = models.DateTimeField()
+
+    class Meta:
+        managed = False  # CRÍTICO: No permitir migraciones Django
+        db_table = 'ElasticidadesPrecio'
+
+    def __str__(self):
+        return f"Elasticidad {self.id_producto_id}: {self.elasticidad_aplicada}"
+
+    def variacion_demanda(self, factor_precio: float):
+        """Cambio relativo de demanda si el precio se multiplica por `factor_precio`"""
+        if self.elasticidad_aplicada is None or not factor_precio or factor_precio <= 0:
+            return None
+        return factor_precio ** self.elasticidad_aplicada - 1
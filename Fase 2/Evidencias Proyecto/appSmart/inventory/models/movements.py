@@ -1,5 +1,7 @@
 from django.db import models
 
+from catalog.models.products import Productos  # Import cross-app
+
 
 class StgProductosRaw(models.Model):
     """
@@ -27,4 +29,76 @@ class StgProductosRaw(models.Model):
         db_table = 'stg_Productos_raw'
 
     def __str__(self):
-        return f"Raw: {self.title or 'Sin título'} - {self.brand or 'Sin marca'}"
\ No newline at end of file
+        return f"Raw: {self.title or 'Sin título'} - {self.brand or 'Sin marca'}"
+
+class MovimientoStock(models.Model):
+    """
+    Libro de movimientos de stock (solo inserción): recepciones, ventas y
+    ajustes. `cantidad` es el delta con signo y `saldo_resultante` el saldo
+    del producto después de aplicar el movimiento.
+    """
+    RECEPCION = 'recepcion'
+    VENTA = 'venta'
+    AJUSTE = 'ajuste'
+    TIPOS = [
+        (RECEPCION, 'Recepción'),
+        (VENTA, 'Venta'),
+        (AJUSTE, 'Ajuste'),
+    ]
+
+    id_movimiento = models.AutoField(primary_key=True)
+    id_producto = models.ForeignKey(Productos, models.DO_NOTHING, db_column='id_producto')
+    tipo = models.CharField(max_length=20, choices=TIPOS, db_collation='Modern_Spanish_CI_AS')
+    cantidad = models.IntegerField()
+    saldo_resultante = models.IntegerField()
+    fecha = models.DateTimeField()
+    id_venta = models.IntegerField(blank=True, null=True)  # Venta que originó el movimiento
+    referencia = models.CharField(max_length=100, db_collation='Modern_Spanish_CI_AS', blank=True, null=True)
+
+    class Meta:
+        managed = False  # CRÍTICO: No permitir migraciones Django
+        db_table = 'MovimientosStock'
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} {self.cantidad:+d} - Producto {self.id_producto_id}"
+
+
+class SaldoStock(models.Model):
+    """
+    Saldo vigente por producto (una fila por producto). Se actualiza en la
+    misma transacción que cada movimiento: el stock actual es una lectura
+    por clave, sin sumar el historial.
+    """
+    id_producto = models.OneToOneField(
+        Productos, models.DO_NOTHING, primary_key=True, db_column='id_producto', related_name='saldo_stock'
+    )
+    cantidad = models.IntegerField()
+    id_ultimo_movimiento = models.IntegerField()
+    actualizado = models.DateTimeField()
+
+    class Meta:
+        managed = False  # CRÍTICO: No permitir migraciones Django
+        db_table = 'SaldosStock'
+
+    def __str__(self):
+        return f"Stock producto {self.id_producto_id}: {self.cantidad}"
+
+
+class CierreStock(models.Model):
+    """
+    Saldo de cada producto al cierre de un día. Un cierre incluye todos los
+    productos con movimientos hasta esa fecha (también los de saldo 0), de
+    modo que el stock a una fecha es el último cierre más el delta posterior.
+    """
+    id_cierre = models.AutoField(primary_key=True)
+    id_producto = models.ForeignKey(Productos, models.DO_NOTHING, db_column='id_producto')
+    fecha = models.DateField()
+    cantidad = models.IntegerField()
+
+    class Meta:
+        managed = False  # CRÍTICO: No permitir migraciones Django
+        db_table = 'CierresStock'
+        unique_together = (('fecha', 'id_producto'),)
+
+    def __str__(self):
+        return f"Cierre {self.fecha} - Producto {self.id_producto_id}: {self.cantidad}"
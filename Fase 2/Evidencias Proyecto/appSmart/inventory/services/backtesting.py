@@ -0,0 +1,155 @@
+"""
+Backtesting walk-forward del recomendador de compras SmartERP.
+Para cada mes de corte se ejecuta el pipeline de predicción solo con el
+historial previo al corte y se compara la cantidad sugerida con la demanda
+real de ese mes. Los cortes son independientes y se evalúan en procesos
+separados.
+
+Limitación: en el corte los atributos de Productos (precio, oferta,
+sin_stock) son los vigentes; el entrenamiento en cambio los reconstruye por
+mes con training.atributos_historicos.
+"""
+import datetime
+from dataclasses import dataclass, field, replace
+from typing import List, Optional
+
+import numpy as np
+
+from catalog.models.products import Productos  # Import cross-app
+from .concurrencia import pool_procesos
+from .history import _mes_ordinal, _ordinal_a_mes, cargar_historial_ventas
+from .predictions import (
+    CAMPOS_PREDICCION,
+    ConfiguracionRecomendador,
+    _calcular_metricas,
+    configuracion_recomendador,
+    determinar_acciones,
+)
+from .training import _fin_de_mes, ultimo_mes_cerrado
+
+
+MESES_BACKTEST = 24
+
+
+@dataclass
+class ResultadoCorte:
+    """Métricas de las recomendaciones emitidas en un corte"""
+    periodo: datetime.date  # Mes evaluado (demanda real)
+    productos: int = 0
+    comprar: int = 0
+    reducir: int = 0
+    con_demanda: int = 0            # Productos con ventas en el mes
+    quiebres_evitados: int = 0      # Cantidad sugerida cubrió la demanda
+    quiebres: int = 0               # Cantidad sugerida no alcanzó
+    unidades_faltantes: float = 0.0
+    unidades_sobrestock: float = 0.0
+    suma_error_pct: float = 0.0     # Acumulado de |sugerida - real| / real
+
+    @property
+    def tasa_cobertura(self) -> float:
+        return self.quiebres_evitados / self.con_demanda if self.con_demanda else 0.0
+
+    @property
+    def mape(self) -> float:
+        return self.suma_error_pct / self.con_demanda if self.con_demanda else 0.0
+
+    def sumar(self, otro: 'ResultadoCorte') -> 'ResultadoCorte':
+        """Acumula los contadores de otro corte (MAPE queda ponderado por demanda)"""
+        return replace(self, **{
+            nombre: getattr(self, nombre) + getattr(otro, nombre)
+            for nombre in (
+                'productos', 'comprar', 'reducir', 'con_demanda', 'quiebres_evitados',
+                'quiebres', 'unidades_faltantes', 'unidades_sobrestock', 'suma_error_pct',
+            )
+        })
+
+
+@dataclass
+class ResultadoBacktest:
+    cortes: List[ResultadoCorte] = field(default_factory=list)
+
+    @property
+    def total(self) -> ResultadoCorte:
+        """Suma de todos los cortes"""
+        total = ResultadoCorte(periodo=self.cortes[-1].periodo if self.cortes else None)
+        for corte in self.cortes:
+            total = total.sumar(corte)
+        return total
+
+
+def puntuar_recomendaciones(
+    periodo: datetime.date,
+    acciones: List[str],
+    cantidades: np.ndarray,
+    demanda: np.ndarray,
+) -> ResultadoCorte:
+    """Compara cantidades sugeridas con la demanda real del mes"""
+    cantidades = np.asarray(cantidades, dtype=np.float64)
+    demanda = np.asarray(demanda, dtype=np.float64)
+    con_demanda = demanda > 0
+    cubierto = con_demanda & (cantidades >= demanda)
+    acciones = np.asarray(acciones)
+
+    return ResultadoCorte(
+        periodo=periodo,
+        productos=len(demanda),
+        comprar=int(np.count_nonzero(acciones == 'comprar')),
+        reducir=int(np.count_nonzero(acciones == 'reducir')),
+        con_demanda=int(con_demanda.sum()),
+        quiebres_evitados=int(cubierto.sum()),
+        quiebres=int((con_demanda & ~cubierto).sum()),
+        unidades_faltantes=float(np.maximum(demanda - cantidades, 0).sum()),
+        unidades_sobrestock=float(np.maximum(cantidades - demanda, 0).sum()),
+        suma_error_pct=float(
+            (np.abs(cantidades[con_demanda] - demanda[con_demanda]) / demanda[con_demanda]).sum()
+        ),
+    )
+
+
+def evaluar_corte(argumentos) -> ResultadoCorte:
+    """
+    Ejecuta el pipeline con historial hasta el fin del mes previo a `ordinal`
+    y puntúa contra la demanda real de ese mes.
+    """
+    ordinal, usar_modelo = argumentos
+    productos = list(Productos.objects.order_by('id_producto').only(*CAMPOS_PREDICCION))
+    periodo = _ordinal_a_mes(ordinal)
+    if not productos:
+        return ResultadoCorte(periodo=periodo)
+
+    _, stats, probabilidades, pronostico = _calcular_metricas(
+        productos, hasta=_fin_de_mes(ordinal - 1), usar_modelo=usar_modelo
+    )
+    # Con reglas de negocio el umbral ajustado para el modelo no aplica
+    config = configuracion_recomendador() if usar_modelo else ConfiguracionRecomendador()
+    acciones, cantidades = determinar_acciones(
+        probabilidades, stats.promedio, pronostico.pronostico, pronostico.limite_superior,
+        config=config,
+    )
+
+    real = cargar_historial_ventas(
+        [p.id_producto for p in productos], meses=1, hasta=_fin_de_mes(ordinal)
+    )
+    return puntuar_recomendaciones(periodo, acciones, cantidades, real.cantidades[:, 0])
+
+
+def ejecutar_backtest(
+    meses: int = MESES_BACKTEST,
+    hasta: Optional[datetime.date] = None,
+    workers: int = 1,
+    usar_modelo: bool = True,
+) -> ResultadoBacktest:
+    """
+    Evalúa los últimos `meses` meses cerrados (hasta `hasta`), un corte por
+    mes. Con `workers > 1` los cortes se reparten entre procesos.
+    """
+    ultimo = _mes_ordinal(hasta or ultimo_mes_cerrado())
+    tareas = [(ordinal, usar_modelo) for ordinal in range(ultimo - meses + 1, ultimo + 1)]
+
+    if workers > 1 and len(tareas) > 1:
+        with pool_procesos(min(workers, len(tareas))) as executor:
+            cortes = list(executor.map(evaluar_corte, tareas))
+    else:
+        cortes = [evaluar_corte(tarea) for tarea in tareas]
+
+    return ResultadoBacktest(cortes=cortes)
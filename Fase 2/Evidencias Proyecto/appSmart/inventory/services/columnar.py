@@ -0,0 +1,371 @@
+"""
+Representación columnar (struct-of-arrays) de las predicciones SmartERP.
+Cada métrica es un arreglo NumPy contiguo alineado con `producto_ids`
+(ordenados), de modo que ordenar, filtrar por acción y resumir son
+operaciones vectorizadas. `PredictionView` entrega vistas por fila con los
+mismos atributos de PredictionItem para las plantillas.
+"""
+import datetime
+from dataclasses import dataclass, fields, replace
+from typing import Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from .predictions import MarcaAgua, PredictionItem, PredictionPayload
+
+
+ACCIONES = ('comprar', 'mantener', 'reducir')
+_CODIGO_ACCION = {accion: codigo for codigo, accion in enumerate(ACCIONES)}
+# Alias aceptados en filtros ('evaluar' = productos marcados para reducir stock)
+ALIAS_ACCION = {'evaluar': 'reducir', 'sobrestock': 'reducir'}
+
+# Criterios de orden soportados: columna y si el orden es descendente
+ORDENES = {
+    'probabilidad': ('probabilidad', True),
+    'tendencia': ('tendencia', True),
+    'volatilidad': ('volatilidad', False),
+}
+
+
+@dataclass
+class PredictionColumns:
+    """Predicciones del catálogo en columnas (una posición por producto)"""
+    producto_ids: np.ndarray
+    titles: np.ndarray
+    brands: np.ndarray
+    precio_referencia: np.ndarray
+    promedio_mensual: np.ndarray
+    ultima_cantidad: np.ndarray
+    tendencia: np.ndarray
+    volatilidad: np.ndarray
+    probabilidad: np.ndarray
+    accion_codigo: np.ndarray
+    mensajes: np.ndarray
+    motivos: np.ndarray
+    cantidad_sugerida: np.ndarray
+    stock_estimado: np.ndarray
+    disponible: np.ndarray
+    historial: np.ndarray  # Matriz producto x mes (única copia de la serie)
+    etiquetas: List[str]
+    fecha_generacion: datetime.datetime
+    marca_agua: Optional[MarcaAgua] = None
+    pronostico: Optional[np.ndarray] = None
+    pronostico_inferior: Optional[np.ndarray] = None
+    pronostico_superior: Optional[np.ndarray] = None
+    categorias1: Optional[np.ndarray] = None
+    categorias2: Optional[np.ndarray] = None
+    stock_seguridad: Optional[np.ndarray] = None
+    punto_reorden: Optional[np.ndarray] = None
+    lote_economico: Optional[np.ndarray] = None
+    cantidad_pedido: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.producto_ids)
+
+    @property
+    def sugerencias(self) -> int:
+        return int(np.count_nonzero(self.accion_codigo == _CODIGO_ACCION['comprar']))
+
+    @property
+    def sobrestock(self) -> int:
+        return int(np.count_nonzero(self.accion_codigo == _CODIGO_ACCION['reducir']))
+
+    @property
+    def promedio_probabilidad(self) -> float:
+        return float(self.probabilidad.mean()) if len(self) else 0.0
+
+    def indice(self, id_producto: int) -> Optional[int]:
+        """Posición del producto en las columnas (None si no está)"""
+        pos = int(np.searchsorted(self.producto_ids, id_producto))
+        if pos < len(self) and self.producto_ids[pos] == id_producto:
+            return pos
+        return None
+
+    def mascara_accion(self, accion: str) -> np.ndarray:
+        accion = accion.lower()
+        codigo = _CODIGO_ACCION.get(ALIAS_ACCION.get(accion, accion))
+        if codigo is None:
+            return np.zeros(len(self), dtype=bool)
+        return self.accion_codigo == codigo
+
+    def seleccionar(self, posiciones: np.ndarray) -> 'PredictionColumns':
+        """Subconjunto por posiciones o máscara booleana"""
+        valores = {}
+        for campo in fields(self):
+            valor = getattr(self, campo.name)
+            if isinstance(valor, np.ndarray):
+                valor = valor[posiciones]
+            valores[campo.name] = valor
+        return replace(self, **valores)
+
+    def filtrar(self, accion: str) -> 'PredictionColumns':
+        return self.seleccionar(self.mascara_accion(accion))
+
+    def filtrar_pedidos(self) -> 'PredictionColumns':
+        """Productos que requieren pedido según el plan de reposición"""
+        if self.cantidad_pedido is None:
+            return self.seleccionar(np.zeros(len(self), dtype=bool))
+        return self.seleccionar(self.cantidad_pedido > 0)
+
+    def ordenar(self, orden: str = 'probabilidad') -> np.ndarray:
+        """Posiciones ordenadas según el criterio (orden estable)"""
+        columna, descendente = ORDENES.get(orden, ORDENES['probabilidad'])
+        valores = getattr(self, columna)
+        return np.argsort(-valores if descendente else valores, kind='stable')
+
+    def top_k(
+        self, orden: str, k: int, candidatos: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Posiciones de los `k` mejores según el criterio, ya ordenadas.
+        Usa una partición (O(n)) y solo ordena los k seleccionados.
+        """
+        if candidatos is None:
+            candidatos = np.arange(len(self))
+        k = max(0, min(k, len(candidatos)))
+        if k == 0:
+            return candidatos[:0]
+
+        columna, descendente = ORDENES.get(orden, ORDENES['probabilidad'])
+        valores = getattr(self, columna)[candidatos]
+        claves = -valores if descendente else valores
+        if k < len(candidatos):
+            # argpartition elige al azar entre empates en el borde: se toman
+            # los menores al umbral y los empatados de menor id, como un
+            # argsort estable (los candidatos vienen en orden de id)
+            umbral = np.partition(claves, k - 1)[k - 1]
+            menores = np.flatnonzero(claves < umbral)
+            empatados = np.flatnonzero(claves == umbral)[:k - len(menores)]
+            seleccion = np.concatenate([menores, empatados])
+        else:
+            seleccion = np.arange(len(candidatos))
+        # Orden final por valor y, en empates, por id de producto
+        seleccion = seleccion[np.lexsort((candidatos[seleccion], claves[seleccion]))]
+        return candidatos[seleccion]
+
+    def fila(self, pos: int) -> 'PredictionView':
+        return PredictionView(self, int(pos))
+
+    def filas(self, posiciones: Optional[Iterable[int]] = None) -> Iterator['PredictionView']:
+        if posiciones is None:
+            posiciones = range(len(self))
+        for pos in posiciones:
+            yield PredictionView(self, int(pos))
+
+    @classmethod
+    def desde_items(
+        cls,
+        items: List[PredictionItem],
+        fecha_generacion: datetime.datetime,
+        marca_agua: Optional[MarcaAgua] = None,
+    ) -> 'PredictionColumns':
+        items = sorted(items, key=lambda item: item.producto.id_producto)
+        etiquetas = [r.period_label for r in items[0].historial] if items else []
+
+        def columna(valores, dtype):
+            return np.fromiter(valores, dtype=dtype, count=len(items))
+
+        def objetos(valores):
+            arreglo = np.empty(len(items), dtype=object)
+            arreglo[:] = list(valores)
+            return arreglo
+
+        historial = np.array(
+            [item.historial_series for item in items], dtype=np.float64
+        ).reshape(len(items), len(etiquetas))
+
+        return cls(
+            producto_ids=columna((i.producto.id_producto for i in items), np.int64),
+            titles=objetos(i.producto.title for i in items),
+            brands=objetos(i.producto.brand for i in items),
+            precio_referencia=columna((float(i.precio_referencia or 0) for i in items), np.float64),
+            promedio_mensual=columna((i.promedio_mensual for i in items), np.float64),
+            ultima_cantidad=columna((i.ultima_cantidad for i in items), np.int64),
+            tendencia=columna((i.tendencia for i in items), np.float64),
+            volatilidad=columna((i.volatilidad for i in items), np.float64),
+            probabilidad=columna((i.probabilidad for i in items), np.float64),
+            accion_codigo=columna((_CODIGO_ACCION[i.accion] for i in items), np.int8),
+            mensajes=objetos(i.mensaje for i in items),
+            motivos=objetos(i.motivo for i in items),
+            cantidad_sugerida=columna((i.cantidad_sugerida for i in items), np.int64),
+            stock_estimado=columna((i.stock_estimado for i in items), np.int64),
+            disponible=columna((bool(i.disponible) for i in items), bool),
+            historial=historial,
+            etiquetas=etiquetas,
+            fecha_generacion=fecha_generacion,
+            marca_agua=marca_agua,
+            pronostico=columna((i.pronostico for i in items), np.float64),
+            pronostico_inferior=columna((i.pronostico_inferior for i in items), np.float64),
+            pronostico_superior=columna((i.pronostico_superior for i in items), np.float64),
+            categorias1=objetos(i.producto.categoria1 for i in items),
+            categorias2=objetos(i.producto.categoria2 for i in items),
+            stock_seguridad=columna((i.stock_seguridad for i in items), np.float64),
+            punto_reorden=columna((i.punto_reorden for i in items), np.float64),
+            lote_economico=columna((i.lote_economico for i in items), np.float64),
+            cantidad_pedido=columna((i.cantidad_pedido for i in items), np.int64),
+        )
+
+    @classmethod
+    def desde_payload(cls, payload: PredictionPayload) -> 'PredictionColumns':
+        return cls.desde_items(payload.items, payload.fecha_generacion, payload.marca_agua)
+
+
+class RankingPredicciones:
+    """
+    Secuencia perezosa de predicciones rankeadas, compatible con Paginator.
+    Los filtros se aplican antes de rankear y cada página solo selecciona
+    (top-K) los elementos hasta su límite superior.
+    """
+    def __init__(
+        self,
+        columnas: PredictionColumns,
+        orden: str = 'probabilidad',
+        accion: Optional[str] = None,
+    ) -> None:
+        self.columnas = columnas
+        self.orden = orden
+        if accion:
+            self.candidatos = np.flatnonzero(columnas.mascara_accion(accion))
+        else:
+            self.candidatos = np.arange(len(columnas))
+
+    def __len__(self) -> int:
+        return len(self.candidatos)
+
+    def count(self) -> int:
+        return len(self)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            inicio, fin, paso = indice.indices(len(self))
+            posiciones = self.columnas.top_k(self.orden, fin, self.candidatos)[inicio:fin:paso]
+            return list(self.columnas.filas(posiciones))
+        if indice < 0:
+            indice += len(self)
+        if not 0 <= indice < len(self):
+            raise IndexError(indice)
+        return self[indice:indice + 1][0]
+
+
+class _ProductoRef:
+    """Referencia mínima al producto para plantillas (`item.producto.title`)"""
+    __slots__ = ('id_producto', 'title', 'brand')
+
+    def __init__(self, id_producto: int, title: str, brand: Optional[str]) -> None:
+        self.id_producto = id_producto
+        self.title = title
+        self.brand = brand
+
+    def __str__(self) -> str:
+        return f"{self.title} - {self.brand or 'Sin marca'}"
+
+
+class PredictionView:
+    """Vista de una fila de PredictionColumns con la interfaz de PredictionItem"""
+    __slots__ = ('_cols', '_pos')
+
+    def __init__(self, columnas: PredictionColumns, pos: int) -> None:
+        self._cols = columnas
+        self._pos = pos
+
+    @property
+    def producto(self) -> _ProductoRef:
+        c, i = self._cols, self._pos
+        return _ProductoRef(int(c.producto_ids[i]), c.titles[i], c.brands[i])
+
+    @property
+    def id_producto(self) -> int:
+        return int(self._cols.producto_ids[self._pos])
+
+    @property
+    def precio_referencia(self) -> float:
+        return float(self._cols.precio_referencia[self._pos])
+
+    @property
+    def promedio_mensual(self) -> float:
+        return float(self._cols.promedio_mensual[self._pos])
+
+    @property
+    def ultima_cantidad(self) -> int:
+        return int(self._cols.ultima_cantidad[self._pos])
+
+    @property
+    def tendencia(self) -> float:
+        return float(self._cols.tendencia[self._pos])
+
+    @property
+    def volatilidad(self) -> float:
+        return float(self._cols.volatilidad[self._pos])
+
+    @property
+    def probabilidad(self) -> float:
+        return float(self._cols.probabilidad[self._pos])
+
+    @property
+    def probabilidad_pct(self) -> float:
+        return self.probabilidad * 100
+
+    @property
+    def accion(self) -> str:
+        return ACCIONES[self._cols.accion_codigo[self._pos]]
+
+    @property
+    def mensaje(self) -> str:
+        return self._cols.mensajes[self._pos]
+
+    @property
+    def motivo(self) -> str:
+        return self._cols.motivos[self._pos]
+
+    @property
+    def es_sobrestock(self) -> bool:
+        return self.accion == 'reducir'
+
+    @property
+    def cantidad_sugerida(self) -> int:
+        return int(self._cols.cantidad_sugerida[self._pos])
+
+    @property
+    def stock_estimado(self) -> int:
+        return int(self._cols.stock_estimado[self._pos])
+
+    @property
+    def disponible(self) -> bool:
+        return bool(self._cols.disponible[self._pos])
+
+    @property
+    def historial_series(self) -> List[int]:
+        return [int(q) for q in self._cols.historial[self._pos]]
+
+    @property
+    def max_historial(self) -> int:
+        serie = self._cols.historial[self._pos]
+        return int(serie.max()) if len(serie) else 0
+
+    @property
+    def pronostico(self) -> float:
+        return float(self._cols.pronostico[self._pos])
+
+    @property
+    def pronostico_inferior(self) -> float:
+        return float(self._cols.pronostico_inferior[self._pos])
+
+    @property
+    def pronostico_superior(self) -> float:
+        return float(self._cols.pronostico_superior[self._pos])
+
+    @property
+    def stock_seguridad(self) -> float:
+        return float(self._cols.stock_seguridad[self._pos])
+
+    @property
+    def punto_reorden(self) -> float:
+        return float(self._cols.punto_reorden[self._pos])
+
+    @property
+    def lote_economico(self) -> float:
+        return float(self._cols.lote_economico[self._pos])
+
+    @property
+    def cantidad_pedido(self) -> int:
+        return int(self._cols.cantidad_pedido[self._pos])
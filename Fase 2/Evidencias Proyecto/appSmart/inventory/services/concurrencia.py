@@ -0,0 +1,81 @@
+"""
+Consultas concurrentes para las vistas async SmartERP (perfil ASGI).
+Cada grupo de consultas independiente corre en un hilo de un pool acotado
+(VISTAS_ASYNC_HILOS por proceso), con su propia conexión a la base de datos;
+la latencia de la vista pasa a ser la del grupo más lento y no la suma.
+
+sync_to_async por defecto (thread_sensitive=True) ejecuta todo en un único
+hilo y serializa las consultas, por eso se usa thread_sensitive=False con
+un executor propio. Al terminar cada grupo se llama a close_old_connections,
+que respeta CONN_MAX_AGE igual que el ciclo de request de Django.
+
+También el pool de procesos de predicciones y backtesting: este módulo no
+importa modelos, así los hijos (spawn) lo cargan antes de django.setup().
+"""
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'VISTAS_ASYNC_HILOS', 4),
+                    thread_name_prefix='smarterp-consultas',
+                )
+    return _pool
+
+
+def _con_conexion_propia(consulta: Callable) -> Callable:
+    def ejecutar():
+        try:
+            return consulta()
+        finally:
+            close_old_connections()
+    return ejecutar
+
+
+async def en_paralelo(*consultas: Callable) -> List:
+    """Ejecuta funciones síncronas sin argumentos a la vez; resultados en el mismo orden"""
+    return await asyncio.gather(*(
+        sync_to_async(_con_conexion_propia(consulta), thread_sensitive=False, executor=_executor())()
+        for consulta in consultas
+    ))
+
+
+def _inicializar_worker() -> None:
+    """
+    Prepara Django en el proceso hijo y cierra las conexiones que tenga:
+    cada worker abre la suya y el proceso del request no se toca.
+    """
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+    connections.close_all()
+
+
+def pool_procesos(max_workers: int) -> ProcessPoolExecutor:
+    """
+    Pool de procesos con el método spawn: los hijos no heredan las
+    conexiones ni el estado de transacción del proceso que los crea.
+    """
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_inicializar_worker,
+    )
@@ -0,0 +1,217 @@
+"""
+Estadísticas del dashboard SmartERP.
+Se leen del resumen materializado (tabla ResumenDashboard, ver
+services.resumen): una fila global y los tops por categoría y marca, sin
+recorrer Productos ni Ventas. Solo los contadores del día y de los últimos
+30 días consultan Ventas, acotados por fecha (IX_Ventas_Fecha). Mientras el
+resumen no se haya refrescado, se calculan en vivo con un aggregate() por
+tabla; dashboard, informes y reportes de ventas comparten estas funciones.
+
+El contexto del dashboard (contadores, tops y datos de gráficos) se cachea
+bajo una clave con las versiones de Productos, Ventas y SaldosStock (ver
+services.versiones); cualquier escritura en esas tablas la deja obsoleta en
+todos los workers. Bajo ASGI, acontexto_dashboard consulta los grupos
+independientes en paralelo.
+"""
+import datetime
+import json
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError
+from django.db.models import Avg, Count, Max, Min, Q, Sum
+from django.utils import timezone
+
+from catalog.models.products import Productos  # Import cross-app
+from sales.models.sales import Ventas  # Import cross-app
+from inventory.models.dashboard import ResumenDashboard
+from .concurrencia import en_paralelo
+from .resumen import CON_STOCK, SIN_STOCK, resumen_global, top_dimension
+from .versiones import PRODUCTOS, SALDOS_STOCK, VENTAS, clave_versionada
+
+
+DIAS_ULTIMO_MES = 30
+TOP_DASHBOARD = 5
+
+CONTEXTO_KEY = 'inventory:dashboard:contexto'
+
+
+def _productos_en_vivo() -> dict:
+    return Productos.objects.aggregate(
+        total_productos=Count('id_producto'),
+        productos_oferta=Count('id_producto', filter=Q(oferta=True)),
+        productos_con_stock=Count('id_producto', filter=CON_STOCK),
+        productos_sin_stock=Count('id_producto', filter=SIN_STOCK),
+        categorias_unicas=Count('categoria1', distinct=True),
+        marcas_unicas=Count('brand', distinct=True),
+        precio_promedio=Avg('normal_price'),
+        precio_max=Max('normal_price'),
+        precio_min=Min('normal_price'),
+    )
+
+
+def estadisticas_productos(resumen: Optional[ResumenDashboard] = None) -> dict:
+    """
+    Contadores del catálogo, stock y precios: la fila global del resumen o,
+    si no existe, un aggregate() con LEFT JOIN a SaldosStock.
+    """
+    resumen = resumen or resumen_global()
+    if resumen is None:
+        return _productos_en_vivo()
+    return {
+        'total_productos': resumen.productos,
+        'productos_oferta': resumen.productos_oferta,
+        'productos_con_stock': resumen.productos_con_stock,
+        'productos_sin_stock': resumen.productos_sin_stock,
+        'categorias_unicas': resumen.categorias,
+        'marcas_unicas': resumen.marcas,
+        'precio_promedio': resumen.precio_promedio,
+        'precio_max': resumen.precio_max,
+        'precio_min': resumen.precio_min,
+    }
+
+
+def estadisticas_ventas(
+    hoy: Optional[datetime.date] = None,
+    resumen: Optional[ResumenDashboard] = None,
+) -> dict:
+    """Totales de ventas (resumen) y ventas del día y de los últimos 30 días"""
+    hoy = hoy or timezone.localdate()
+    desde = hoy - datetime.timedelta(days=DIAS_ULTIMO_MES)
+    resumen = resumen or resumen_global()
+    if resumen is None:
+        stats = Ventas.objects.aggregate(
+            ventas_total=Count('id_venta'),
+            total_cantidad=Sum('cantidad_vendida'),
+            total_ingresos=Sum('total_venta'),
+            ventas_hoy=Count('id_venta', filter=Q(fecha=hoy)),
+            ventas_ultimo_mes=Count('id_venta', filter=Q(fecha__gte=desde)),
+        )
+        stats['total_cantidad'] = stats['total_cantidad'] or 0
+        stats['total_ingresos'] = stats['total_ingresos'] or 0
+        return stats
+
+    stats = Ventas.objects.filter(fecha__gte=desde).aggregate(
+        ventas_hoy=Count('id_venta', filter=Q(fecha=hoy)),
+        ventas_ultimo_mes=Count('id_venta'),
+    )
+    stats.update({
+        'ventas_total': resumen.ventas,
+        'total_cantidad': resumen.unidades_vendidas,
+        'total_ingresos': resumen.ingresos,
+    })
+    return stats
+
+
+def estadisticas_dashboard() -> dict:
+    """Productos y ventas combinados en un diccionario"""
+    resumen = resumen_global()
+    return {**estadisticas_productos(resumen), **estadisticas_ventas(resumen=resumen)}
+
+
+def _top(campo: str, largo: int, resumen: Optional[ResumenDashboard]) -> list:
+    if resumen is not None:
+        dimension = ResumenDashboard.CATEGORIA if campo == 'categoria1' else ResumenDashboard.MARCA
+        filas = [
+            {campo: fila.valor, 'count': fila.productos}
+            for fila in top_dimension(dimension, TOP_DASHBOARD)
+        ]
+    else:
+        filas = (
+            Productos.objects.filter(**{f'{campo}__isnull': False})
+            .values(campo).annotate(count=Count(campo)).order_by('-count')[:TOP_DASHBOARD]
+        )
+    return [{campo: fila[campo], 'count': fila['count'], 'etiqueta': fila[campo][:largo]} for fila in filas]
+
+
+def tops_dashboard(resumen: Optional[ResumenDashboard] = None) -> tuple:
+    """Top categorías y marcas por cantidad de productos"""
+    resumen = resumen or resumen_global()
+    return _top('categoria1', 20, resumen), _top('brand', 15, resumen)
+
+
+def total_ventas_dashboard(resumen: Optional[ResumenDashboard] = None) -> dict:
+    """Unidades e ingresos totales (ceros si Ventas no está disponible)"""
+    try:
+        ventas_stats = estadisticas_ventas(resumen=resumen)
+    except DatabaseError:
+        return {'total_cantidad': 0, 'total_ingresos': 0}
+    return {
+        'total_cantidad': ventas_stats['total_cantidad'],
+        'total_ingresos': ventas_stats['total_ingresos'],
+    }
+
+
+def armar_contexto_dashboard(stats: dict, categorias_top: list, marcas_top: list, total_ventas: dict) -> dict:
+    """Contexto cacheable del dashboard con los datos Chart.js"""
+    chart_data = {
+        'stock_distribution': {
+            'labels': ['Con Stock', 'Sin Stock'],
+            'data': [stats['productos_con_stock'], stats['productos_sin_stock']]
+        },
+        'categorias_top': {
+            'labels': [cat['etiqueta'] for cat in categorias_top],
+            'data': [cat['count'] for cat in categorias_top]
+        },
+        'marcas_top': {
+            'labels': [marca['etiqueta'] for marca in marcas_top],
+            'data': [marca['count'] for marca in marcas_top]
+        }
+    }
+    return {
+        'stats': stats,
+        'precios_stats': {
+            clave: stats[clave] for clave in ('precio_promedio', 'precio_max', 'precio_min')
+        },
+        'categorias_top': categorias_top,
+        'marcas_top': marcas_top,
+        'total_ventas': total_ventas,
+        'chart_data_json': json.dumps(chart_data),
+    }
+
+
+def calcular_contexto_dashboard() -> dict:
+    """Contadores, precios, tops y datos Chart.js del dashboard (sin cache)"""
+    resumen = resumen_global()
+    categorias_top, marcas_top = tops_dashboard(resumen)
+    return armar_contexto_dashboard(
+        estadisticas_productos(resumen), categorias_top, marcas_top, total_ventas_dashboard(resumen)
+    )
+
+
+def _cache_dashboard():
+    return caches[getattr(settings, 'DASHBOARD_CACHE_ALIAS', 'default')]
+
+
+def _ttl_dashboard() -> int:
+    return getattr(settings, 'DASHBOARD_CACHE_TTL', 300)
+
+
+def contexto_dashboard() -> dict:
+    """Contexto del dashboard desde el cache compartido; se recalcula al cambiar una versión"""
+    cache = _cache_dashboard()
+    clave = clave_versionada(CONTEXTO_KEY, PRODUCTOS, VENTAS, SALDOS_STOCK)
+    contexto = cache.get(clave)
+    if contexto is None:
+        contexto = calcular_contexto_dashboard()
+        cache.set(clave, contexto, _ttl_dashboard())
+    return contexto
+
+
+async def acontexto_dashboard() -> dict:
+    """
+    Variante async de contexto_dashboard: si no está en cache, estadísticas de
+    productos, tops y ventas se consultan a la vez (services.concurrencia).
+    """
+    cache = _cache_dashboard()
+    clave = await sync_to_async(clave_versionada)(CONTEXTO_KEY, PRODUCTOS, VENTAS, SALDOS_STOCK)
+    contexto = await cache.aget(clave)
+    if contexto is None:
+        stats, (categorias_top, marcas_top), total_ventas = await en_paralelo(
+            estadisticas_productos, tops_dashboard, total_ventas_dashboard
+        )
+        contexto = armar_contexto_dashboard(stats, categorias_top, marcas_top, total_ventas)
+        await cache.aset(clave, contexto, _ttl_dashboard())
+    return contexto
@@ -0,0 +1,59 @@
+"""
+Kernel de estadísticas de demanda SmartERP.
+Calcula en una sola pasada vectorizada sobre la matriz producto x periodo
+todas las métricas que usa el sistema de predicciones.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class EstadisticasDemanda:
+    """Métricas por producto (un elemento por fila de la matriz de historial)"""
+    promedio: np.ndarray
+    varianza: np.ndarray     # Varianza muestral (n - 1)
+    volatilidad: np.ndarray  # Coeficiente de variación
+    tendencia: np.ndarray    # Pendiente OLS sobre el índice del periodo
+    ultimo: np.ndarray
+    maximo: np.ndarray
+
+
+def calcular_estadisticas_demanda(cantidades: np.ndarray) -> EstadisticasDemanda:
+    """
+    Calcula promedio, varianza/CV, pendiente OLS, último valor y máximo de
+    todos los productos. Las sumas (Σq, Σi·q) salen de un único producto
+    matricial y Σq² de un einsum, sin recorrer la matriz por métrica.
+    """
+    cantidades = np.asarray(cantidades, dtype=np.float64)
+    filas, n = cantidades.shape
+    if n == 0:
+        ceros = np.zeros(filas)
+        return EstadisticasDemanda(ceros, ceros, ceros, ceros, ceros, ceros)
+
+    x = np.arange(n, dtype=np.float64)
+    sumas = cantidades @ np.column_stack([np.ones(n), x])  # [Σq, Σi·q]
+    suma, suma_x = sumas[:, 0], sumas[:, 1]
+    suma_cuadrados = np.einsum('ij,ij->i', cantidades, cantidades)
+
+    promedio = suma / n
+    if n > 1:
+        varianza = np.maximum(suma_cuadrados - n * promedio ** 2, 0.0) / (n - 1)
+        x_mean = (n - 1) / 2
+        sxx = n * (n * n - 1) / 12  # Σ(i - x̄)²
+        tendencia = (suma_x - x_mean * suma) / sxx
+    else:
+        varianza = np.zeros(filas)
+        tendencia = np.zeros(filas)
+
+    safe_promedio = np.where(promedio == 0, 1.0, promedio)
+    volatilidad = np.where(promedio == 0, 0.0, np.sqrt(varianza) / safe_promedio)
+
+    return EstadisticasDemanda(
+        promedio=promedio,
+        varianza=varianza,
+        volatilidad=volatilidad,
+        tendencia=tendencia,
+        ultimo=cantidades[:, -1].copy(),
+        maximo=cantidades.max(axis=1),
+    )
@@ -0,0 +1,200 @@
+"""
+Elasticidad precio-demanda SmartERP.
+Ajusta log(cantidad) = a + b·log(precio) por producto con los meses de venta
+de todo el historial (precio = ingreso / unidades del mes). Los momentos
+necesarios (n, Σx, Σy, Σx², Σxy, Σy²) se acumulan con np.bincount sobre un
+único GROUP BY (producto, mes) de Ventas, sin consultas por producto.
+
+La elasticidad de categoría es la pendiente agrupada dentro de producto
+(Σ Sxy / Σ Sxx de sus SKUs). La aplicada contrae la del SKU hacia la de su
+categoría: (Sxy + λ·b_cat) / (Sxx + λ), de modo que SKUs con poca variación
+de precio quedan cerca de la categoría.
+"""
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import numpy as np
+
+from django.db import transaction
+from django.db.models import DecimalField, F, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from catalog.models.products import Productos  # Import cross-app
+from sales.models.sales import Ventas  # Import cross-app
+from inventory.models.features import ElasticidadPrecio
+
+
+MIN_OBSERVACIONES = 6      # Meses con venta para estimar la pendiente del SKU
+PESO_CATEGORIA = 0.05      # λ: variación de log(precio) equivalente del prior de categoría
+EPSILON = 1e-9
+
+
+@dataclass
+class ResultadoElasticidad:
+    """Estimaciones por producto (alineadas con producto_ids ordenados)"""
+    producto_ids: np.ndarray
+    elasticidad: np.ndarray             # NaN sin observaciones/variación suficientes
+    r2: np.ndarray
+    observaciones: np.ndarray
+    variacion_precio: np.ndarray
+    elasticidad_categoria: np.ndarray
+    elasticidad_aplicada: np.ndarray
+    categorias: Dict[str, float]        # Elasticidad agrupada por categoría
+
+    def __len__(self) -> int:
+        return len(self.producto_ids)
+
+
+def cargar_observaciones():
+    """(id_producto, log precio, log cantidad) de cada mes con ventas"""
+    ingreso_venta = Coalesce(
+        'total_venta',
+        F('cantidad_vendida') * F('precio_unitario'),
+        output_field=DecimalField(max_digits=23, decimal_places=2),
+    )
+    filas = list(
+        Ventas.objects
+        .annotate(mes=TruncMonth('fecha'))
+        .values('id_producto', 'mes')
+        .annotate(cantidad=Sum('cantidad_vendida'), ingresos=Sum(ingreso_venta))
+        .order_by()
+        .values_list('id_producto', 'cantidad', 'ingresos')
+    )
+    ids = np.fromiter((f[0] for f in filas), dtype=np.int64, count=len(filas))
+    cantidad = np.fromiter((f[1] or 0 for f in filas), dtype=np.float64, count=len(filas))
+    ingresos = np.fromiter((float(f[2] or 0) for f in filas), dtype=np.float64, count=len(filas))
+
+    validos = (cantidad > 0) & (ingresos > 0)
+    ids, cantidad, ingresos = ids[validos], cantidad[validos], ingresos[validos]
+    return ids, np.log(ingresos / cantidad), np.log(cantidad)
+
+
+def estimar_elasticidades(
+    ids: np.ndarray,
+    log_precio: np.ndarray,
+    log_cantidad: np.ndarray,
+    categorias_por_producto: Dict[int, Optional[str]],
+    min_observaciones: int = MIN_OBSERVACIONES,
+    peso_categoria: float = PESO_CATEGORIA,
+) -> ResultadoElasticidad:
+    """Mínimos cuadrados por producto y por categoría en una pasada vectorizada"""
+    producto_ids, fila = np.unique(ids, return_inverse=True)
+    fila = fila.ravel()
+    m = len(producto_ids)
+
+    def suma(pesos=None):
+        return np.bincount(fila, weights=pesos, minlength=m)
+
+    n = suma()
+    sx, sy = suma(log_precio), suma(log_cantidad)
+    sxx, sxy, syy = suma(log_precio ** 2), suma(log_precio * log_cantidad), suma(log_cantidad ** 2)
+    n_seguro = np.where(n > 0, n, 1.0)
+    sxx_c = np.maximum(sxx - sx * sx / n_seguro, 0.0)  # Σ(x - x̄)²
+    sxy_c = sxy - sx * sy / n_seguro                    # Σ(x - x̄)(y - ȳ)
+    syy_c = np.maximum(syy - sy * sy / n_seguro, 0.0)
+
+    estimable = (n >= min_observaciones) & (sxx_c > EPSILON)
+    sxx_seguro = np.where(sxx_c > EPSILON, sxx_c, 1.0)
+    elasticidad = np.where(estimable, sxy_c / sxx_seguro, np.nan)
+    r2 = np.where(estimable & (syy_c > EPSILON), sxy_c ** 2 / (sxx_seguro * np.where(syy_c > EPSILON, syy_c, 1.0)), np.nan)
+    variacion_precio = np.sqrt(sxx_c / n_seguro)
+
+    # Pendiente agrupada dentro de producto por categoría (y global de respaldo)
+    etiquetas = np.array(
+        [categorias_por_producto.get(int(i)) or '' for i in producto_ids], dtype=object
+    ).astype(str)
+    nombres, grupo = np.unique(etiquetas, return_inverse=True)
+    grupo = grupo.ravel()
+    aporta = n >= 2
+    sxy_grupo = np.bincount(grupo, weights=np.where(aporta, sxy_c, 0.0), minlength=len(nombres))
+    sxx_grupo = np.bincount(grupo, weights=np.where(aporta, sxx_c, 0.0), minlength=len(nombres))
+    sxx_total = sxx_grupo.sum()
+    global_ = sxy_grupo.sum() / sxx_total if sxx_total > EPSILON else np.nan
+    por_categoria = np.where(sxx_grupo > EPSILON, sxy_grupo / np.where(sxx_grupo > EPSILON, sxx_grupo, 1.0), global_)
+    elasticidad_categoria = por_categoria[grupo]
+
+    # Contracción hacia la categoría; sin estimación de categoría queda la del SKU
+    prior = np.where(np.isnan(elasticidad_categoria), 0.0, elasticidad_categoria)
+    peso = np.where(np.isnan(elasticidad_categoria), 0.0, peso_categoria)
+    denominador = sxx_c + peso
+    elasticidad_aplicada = np.where(
+        denominador > EPSILON,
+        (np.where(aporta, sxy_c, 0.0) + peso * prior) / np.where(denominador > EPSILON, denominador, 1.0),
+        np.nan,
+    )
+
+    return ResultadoElasticidad(
+        producto_ids=producto_ids,
+        elasticidad=elasticidad,
+        r2=r2,
+        observaciones=n.astype(np.int64),
+        variacion_precio=variacion_precio,
+        elasticidad_categoria=elasticidad_categoria,
+        elasticidad_aplicada=elasticidad_aplicada,
+        categorias={
+            str(nombre): float(valor) for nombre, valor in zip(nombres, por_categoria)
+            if nombre and not np.isnan(valor)
+        },
+    )
+
+
+def _opcional(valor: float) -> Optional[float]:
+    return None if np.isnan(valor) else float(valor)
+
+
+def calcular_elasticidades() -> ResultadoElasticidad:
+    """Recalcula la tabla ElasticidadesPrecio con todo el historial de ventas"""
+    ids, log_precio, log_cantidad = cargar_observaciones()
+    categorias = dict(Productos.objects.values_list('id_producto', 'categoria1'))
+    resultado = estimar_elasticidades(ids, log_precio, log_cantidad, categorias)
+
+    ahora = timezone.now()
+    filas = [
+        ElasticidadPrecio(
+            id_producto_id=int(resultado.producto_ids[i]),
+            elasticidad=_opcional(resultado.elasticidad[i]),
+            r2=_opcional(resultado.r2[i]),
+            observaciones=int(resultado.observaciones[i]),
+            variacion_precio=float(resultado.variacion_precio[i]),
+            elasticidad_categoria=_opcional(resultado.elasticidad_categoria[i]),
+            elasticidad_aplicada=_opcional(resultado.elasticidad_aplicada[i]),
+            actualizado=ahora,
+        )
+        for i in range(len(resultado))
+        if int(resultado.producto_ids[i]) in categorias  # Ventas de productos eliminados
+    ]
+    with transaction.atomic():
+        ElasticidadPrecio.objects.all().delete()
+        ElasticidadPrecio.objects.bulk_create(filas, batch_size=500)
+    return resultado
+
+
+def cargar_elasticidades(producto_ids: np.ndarray) -> np.ndarray:
+    """Elasticidad aplicada alineada con `producto_ids` ordenados (NaN si no hay)"""
+    producto_ids = np.asarray(producto_ids, dtype=np.int64)
+    valores = np.full(len(producto_ids), np.nan)
+    filas = list(
+        ElasticidadPrecio.objects.filter(elasticidad_aplicada__isnull=False)
+        .order_by('id_producto').values_list('id_producto', 'elasticidad_aplicada')
+    )
+    if not filas or len(producto_ids) == 0:
+        return valores
+    ids = np.fromiter((f[0] for f in filas), dtype=np.int64, count=len(filas))
+    elasticidad = np.fromiter((f[1] for f in filas), dtype=np.float64, count=len(filas))
+    pos = np.minimum(np.searchsorted(ids, producto_ids), len(ids) - 1)
+    encontrados = ids[pos] == producto_ids
+    valores[encontrados] = elasticidad[pos[encontrados]]
+    return valores
+
+
+def factor_precio_oferta(producto: Productos) -> Optional[float]:
+    """Precio oferta / precio normal según low_price o ahorro_percent (None sin oferta)"""
+    if producto.low_price and producto.normal_price and producto.low_price < producto.normal_price:
+        return float(producto.low_price / producto.normal_price)
+    if producto.ahorro_percent:
+        descuento = float(producto.ahorro_percent)
+        descuento = descuento / 100 if descuento > 1 else descuento  # Acepta 15 o 0.15
+        if 0 < descuento < 1:
+            return 1 - descuento
+    return None
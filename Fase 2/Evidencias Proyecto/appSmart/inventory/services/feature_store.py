@@ -0,0 +1,237 @@
+"""
+Feature store de predicciones SmartERP.
+Mantiene la tabla FeaturesProducto (una fila por producto) con las features
+del regresor y agregados de ventas de 12 meses. Las actualizaciones son
+incrementales: solo se recalculan los productos con ventas o atributos
+nuevos desde el checkpoint del proceso (tabla MarcasAguaProceso, que solo
+mueven las pasadas batch), o cuya ventana quedó en un mes anterior.
+Puntuar el catálogo es entonces un único scan de esta tabla.
+"""
+from dataclasses import dataclass
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from sales.models.sales import Ventas  # Import cross-app
+from inventory.models.features import FeaturesProducto, MarcaAguaProceso
+from .demand import EstadisticasDemanda, calcular_estadisticas_demanda
+from .elasticity import cargar_elasticidades
+from .history import MAX_IDS_FILTRO, cargar_historial_ventas
+from .predictions import (
+    MarcaAgua,
+    _cargar_productos,
+    _predecir_probabilidad_compra,
+    configuracion_recomendador,
+    determinar_acciones,
+    obtener_marca_agua,
+    productos_modificados,
+)
+
+
+@dataclass
+class FeaturesCatalogo:
+    """Contenido del feature store en columnas, ordenado por id_producto"""
+    producto_ids: np.ndarray
+    precios: np.ndarray
+    sin_stock: np.ndarray
+    en_oferta: np.ndarray
+    stats: EstadisticasDemanda
+    elasticidad: Optional[np.ndarray] = None  # Elasticidad precio aplicada (NaN si no hay)
+
+    def __len__(self) -> int:
+        return len(self.producto_ids)
+
+
+def _marca_store() -> Optional[MarcaAgua]:
+    """Checkpoint de la última pasada batch (None si nunca se construyó)"""
+    fila = MarcaAguaProceso.objects.filter(proceso=MarcaAguaProceso.FEATURES).first()
+    if fila is None:
+        return None
+    return MarcaAgua(
+        id_venta=fila.id_venta,
+        fecha_venta=fila.fecha_venta,
+        datetime_producto=fila.datetime_producto,
+        id_producto=fila.id_producto,
+        periodo=fila.periodo,
+        id_movimiento=fila.id_movimiento,
+        generado=fila.actualizado,
+    )
+
+
+def _guardar_marca_store(marca: MarcaAgua) -> None:
+    MarcaAguaProceso.objects.update_or_create(
+        proceso=MarcaAguaProceso.FEATURES,
+        defaults={
+            'id_venta': marca.id_venta,
+            'fecha_venta': marca.fecha_venta,
+            'datetime_producto': marca.datetime_producto,
+            'id_producto': marca.id_producto,
+            'id_movimiento': marca.id_movimiento,
+            'periodo': marca.periodo,
+            'actualizado': marca.generado,
+        },
+    )
+
+
+def productos_pendientes() -> Optional[set]:
+    """
+    Ids a recalcular: cambios desde el checkpoint más filas de un mes
+    anterior. None = la tabla está vacía y se debe construir completa.
+    """
+    periodo = timezone.localdate().replace(day=1)
+    marca = _marca_store()
+    if marca is None:
+        return None
+    ids = productos_modificados(marca)
+    ids.update(
+        FeaturesProducto.objects.exclude(periodo=periodo).values_list('id_producto', flat=True)
+    )
+    return ids
+
+
+def actualizar_feature_store(
+    producto_ids: Optional[Iterable[int]] = None,
+    completo: bool = False,
+) -> int:
+    """
+    Recalcula las filas de los productos indicados (o los pendientes si no
+    se indican) en lotes de MAX_IDS_FILTRO. Retorna las filas escritas.
+    Solo las pasadas batch (sin `producto_ids`) leen la marca de agua global
+    y mueven el checkpoint; la actualización puntual de las señales marca
+    las filas con la hora actual y solo consulta las ventas de sus productos.
+    """
+    batch = producto_ids is None
+    if batch:
+        # La marca se lee antes que los datos: lo que llegue durante el cálculo
+        # queda sobre el checkpoint y se recalcula en la próxima pasada
+        marca = obtener_marca_agua()
+        # Las filas de la pasada quedan con la hora de la marca: no vuelven a
+        # aparecer como modificadas frente a su propio checkpoint
+        ahora, periodo = marca.generado, marca.periodo
+    else:
+        marca = None
+        ahora = timezone.now()
+        periodo = timezone.localdate().replace(day=1)
+
+    if batch and not completo:
+        producto_ids = productos_pendientes()
+    if producto_ids is None:
+        completo = True
+        ids = None
+    else:
+        ids = sorted(set(producto_ids))
+        if not ids:
+            if batch:
+                _guardar_marca_store(marca)
+            return 0
+
+    productos = _cargar_productos(ids)
+    escritas = 0
+    with transaction.atomic():
+        if completo:
+            FeaturesProducto.objects.all().delete()
+        elif ids:
+            for inicio in range(0, len(ids), MAX_IDS_FILTRO):
+                FeaturesProducto.objects.filter(
+                    id_producto__in=ids[inicio:inicio + MAX_IDS_FILTRO]
+                ).delete()
+
+        for inicio in range(0, len(productos), MAX_IDS_FILTRO):
+            lote = productos[inicio:inicio + MAX_IDS_FILTRO]
+            historial = cargar_historial_ventas([p.id_producto for p in lote])
+            stats = calcular_estadisticas_demanda(historial.cantidades)
+            ventas = historial.cantidades.sum(axis=1)
+            ingresos = historial.ingresos.sum(axis=1)
+            id_venta_max = marca.id_venta if batch else (
+                Ventas.objects.filter(id_producto__in=[p.id_producto for p in lote])
+                .aggregate(ultima=Max('id_venta'))['ultima'] or 0
+            )
+
+            filas = [
+                FeaturesProducto(
+                    id_producto_id=producto.id_producto,
+                    precio=float(producto.precio_referencia or 0),
+                    sin_stock=bool(producto.sin_stock),
+                    en_oferta=producto.oferta_activa,
+                    disponible=bool(producto.disponible),
+                    promedio=float(stats.promedio[idx]),
+                    varianza=float(stats.varianza[idx]),
+                    volatilidad=float(stats.volatilidad[idx]),
+                    tendencia=float(stats.tendencia[idx]),
+                    ultima_cantidad=int(stats.ultimo[idx]),
+                    maxima_cantidad=int(stats.maximo[idx]),
+                    ventas_12m=int(ventas[idx]),
+                    ingresos_12m=float(ingresos[idx]),
+                    periodo=periodo,
+                    id_venta_max=id_venta_max,
+                    datetime_producto=producto.datetime,
+                    actualizado=ahora,
+                )
+                for idx, producto in enumerate(lote)
+            ]
+            FeaturesProducto.objects.bulk_create(filas, batch_size=500)
+            escritas += len(filas)
+        if batch:
+            _guardar_marca_store(marca)
+    return escritas
+
+
+def cargar_features() -> FeaturesCatalogo:
+    """Lee el feature store completo con un único scan ordenado"""
+    filas = list(
+        FeaturesProducto.objects.order_by('id_producto').values_list(
+            'id_producto', 'precio', 'sin_stock', 'en_oferta', 'promedio', 'varianza',
+            'volatilidad', 'tendencia', 'ultima_cantidad', 'maxima_cantidad',
+        )
+    )
+    columnas = np.array(filas, dtype=np.float64).reshape(len(filas), 10)
+    producto_ids = columnas[:, 0].astype(np.int64)
+    return FeaturesCatalogo(
+        producto_ids=producto_ids,
+        precios=columnas[:, 1],
+        sin_stock=columnas[:, 2].astype(bool),
+        en_oferta=columnas[:, 3].astype(bool),
+        stats=EstadisticasDemanda(
+            promedio=columnas[:, 4],
+            varianza=columnas[:, 5],
+            volatilidad=columnas[:, 6],
+            tendencia=columnas[:, 7],
+            ultimo=columnas[:, 8],
+            maximo=columnas[:, 9],
+        ),
+        elasticidad=cargar_elasticidades(producto_ids),
+    )
+
+
+def puntuar_catalogo(features: Optional[FeaturesCatalogo] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """(producto_ids, probabilidad de compra) para todo el catálogo"""
+    if features is None:
+        features = cargar_features()
+    probabilidades = _predecir_probabilidad_compra(
+        features.precios, features.sin_stock, features.en_oferta, features.stats
+    )
+    return features.producto_ids, probabilidades
+
+
+def resumen_feature_store() -> Optional[dict]:
+    """
+    Contadores de sugerencias y sobrestock calculados desde el feature store
+    (regla vectorizada de determinar_acciones). None si la tabla está vacía.
+    """
+    features = cargar_features()
+    if len(features) == 0:
+        return None
+    _, probabilidades = puntuar_catalogo(features)
+    acciones, _ = determinar_acciones(
+        probabilidades, features.stats.promedio, config=configuracion_recomendador()
+    )
+    return {
+        'total_productos': len(features),
+        'sugerencias': int(np.count_nonzero(acciones == 'comprar')),
+        'sobrestock': int(np.count_nonzero(acciones == 'reducir')),
+        'fecha_generacion': timezone.now(),
+    }
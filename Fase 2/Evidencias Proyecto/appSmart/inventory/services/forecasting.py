@@ -0,0 +1,161 @@
+"""
+Motor de pronóstico de demanda SmartERP (suavizamiento exponencial).
+Ajusta suavizamiento simple, doble (Holt) y estacional aditivo
+(Holt-Winters) para todos los productos a la vez: cada paso temporal es una
+operación NumPy sobre la columna del mes, de modo que el costo crece con el
+número de meses y no con el número de SKUs.
+"""
+import itertools
+from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
+
+
+PERIODO_ESTACIONAL = 12
+NIVEL_CONFIANZA = 0.95
+_Z_CONFIANZA = {0.80: 1.2816, 0.90: 1.6449, 0.95: 1.9600, 0.99: 2.5758}
+
+# Grillas de parámetros evaluadas por producto (se elige la de menor error)
+GRILLA_ALPHA = (0.1, 0.3, 0.5, 0.8)
+GRILLA_BETA = (0.05, 0.2)
+GRILLA_GAMMA = (0.1, 0.3)
+
+MODELO_SIMPLE, MODELO_HOLT, MODELO_HOLT_WINTERS = 0, 1, 2
+MODELOS = ('simple', 'holt', 'holt_winters')
+
+
+@dataclass
+class PronosticoDemanda:
+    """Pronóstico del próximo periodo por producto con intervalo de predicción"""
+    pronostico: np.ndarray
+    limite_inferior: np.ndarray
+    limite_superior: np.ndarray
+    sigma: np.ndarray       # Desviación estándar de los errores a un paso
+    modelo: np.ndarray      # Índice en MODELOS del modelo elegido
+
+
+# Cada ajuste acumula el SSE solo desde el paso `desde`, para que todos los
+# modelos comparados por AIC se evalúen sobre los mismos meses.
+
+def _simple(y: np.ndarray, alpha: float, desde: int = 1) -> Tuple[np.ndarray, np.ndarray, int]:
+    nivel = y[:, 0].copy()
+    sse = np.zeros(len(y))
+    for t in range(1, y.shape[1]):
+        error = y[:, t] - nivel
+        if t >= desde:
+            sse += error ** 2
+        nivel = nivel + alpha * error
+    return nivel, sse, y.shape[1] - desde
+
+
+def _holt(y: np.ndarray, alpha: float, beta: float, desde: int = 1) -> Tuple[np.ndarray, np.ndarray, int]:
+    nivel = y[:, 0].copy()
+    tendencia = y[:, 1] - y[:, 0]
+    sse = np.zeros(len(y))
+    for t in range(1, y.shape[1]):
+        estimado = nivel + tendencia
+        error = y[:, t] - estimado
+        if t >= desde:
+            sse += error ** 2
+        nivel_nuevo = estimado + alpha * error
+        tendencia = tendencia + beta * (nivel_nuevo - nivel - tendencia)
+        nivel = nivel_nuevo
+    return nivel + tendencia, sse, y.shape[1] - desde
+
+
+def _holt_winters(
+    y: np.ndarray, alpha: float, beta: float, gamma: float, m: int
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    # Evalúa desde t = m: la primera temporada solo inicializa los índices
+    primera = y[:, :m].mean(axis=1)
+    segunda = y[:, m:2 * m].mean(axis=1)
+    nivel = primera.copy()
+    tendencia = (segunda - primera) / m
+    estacional = y[:, :m] - primera[:, None]
+    sse = np.zeros(len(y))
+    for t in range(m, y.shape[1]):
+        s = estacional[:, t % m]
+        estimado = nivel + tendencia + s
+        error = y[:, t] - estimado
+        sse += error ** 2
+        nivel_nuevo = nivel + tendencia + alpha * error
+        tendencia = tendencia + alpha * beta * error
+        estacional[:, t % m] = s + gamma * (1 - alpha) * error
+        nivel = nivel_nuevo
+    siguiente = nivel + tendencia + estacional[:, y.shape[1] % m]
+    return siguiente, sse, y.shape[1] - m
+
+
+def _mejor_ajuste(candidatos):
+    """Entre varios ajustes (pronóstico, sse, n) elige por producto el de menor SSE"""
+    pronosticos = np.stack([c[0] for c in candidatos])
+    sses = np.stack([c[1] for c in candidatos])
+    mejor = sses.argmin(axis=0)
+    columnas = np.arange(pronosticos.shape[1])
+    return pronosticos[mejor, columnas], sses[mejor, columnas], candidatos[0][2]
+
+
+def pronosticar_demanda(
+    cantidades: np.ndarray,
+    periodo_estacional: int = PERIODO_ESTACIONAL,
+    nivel_confianza: float = NIVEL_CONFIANZA,
+) -> PronosticoDemanda:
+    """
+    Pronostica el próximo periodo de cada fila de la matriz producto x mes.
+    Evalúa la grilla de parámetros de cada modelo, elige por producto el
+    modelo con menor AIC aproximado (n·log(SSE/n) + 2k) y construye el
+    intervalo con la desviación de los errores a un paso.
+    Holt-Winters solo se considera con al menos dos temporadas completas; en
+    ese caso todos los modelos se evalúan desde el mes m, de modo que el AIC
+    compara el mismo número de pasos.
+    """
+    y = np.asarray(cantidades, dtype=np.float64)
+    filas, n = y.shape
+    if n == 0:
+        ceros = np.zeros(filas)
+        return PronosticoDemanda(ceros, ceros, ceros, ceros, np.zeros(filas, dtype=np.int8))
+    if n < 3:
+        pronostico = y[:, -1].copy()
+        sigma = y.std(axis=1)
+        z = _Z_CONFIANZA.get(nivel_confianza, 1.96)
+        return PronosticoDemanda(
+            pronostico, np.maximum(pronostico - z * sigma, 0.0), pronostico + z * sigma,
+            sigma, np.zeros(filas, dtype=np.int8),
+        )
+
+    m = periodo_estacional
+    estacional = m > 1 and n >= 2 * m
+    desde = m if estacional else 1
+    ajustes = [
+        (_mejor_ajuste([_simple(y, a, desde) for a in GRILLA_ALPHA]), 1),
+        (_mejor_ajuste([
+            _holt(y, a, b, desde) for a, b in itertools.product(GRILLA_ALPHA, GRILLA_BETA)
+        ]), 2),
+    ]
+    if estacional:
+        ajustes.append((_mejor_ajuste([
+            _holt_winters(y, a, b, g, m)
+            for a, b, g in itertools.product(GRILLA_ALPHA, GRILLA_BETA, GRILLA_GAMMA)
+        ]), 2 + m))
+
+    criterios, pronosticos, sigmas = [], [], []
+    for (pronostico, sse, pasos), parametros in ajustes:
+        mse = sse / pasos
+        criterios.append(pasos * np.log(mse + 1e-9) + 2 * parametros)
+        pronosticos.append(pronostico)
+        sigmas.append(np.sqrt(mse))
+
+    modelo = np.stack(criterios).argmin(axis=0)
+    columnas = np.arange(filas)
+    pronostico = np.maximum(np.stack(pronosticos)[modelo, columnas], 0.0)
+    sigma = np.stack(sigmas)[modelo, columnas]
+    z = _Z_CONFIANZA.get(nivel_confianza, 1.96)
+
+    return PronosticoDemanda(
+        pronostico=pronostico,
+        limite_inferior=np.maximum(pronostico - z * sigma, 0.0),
+        limite_superior=pronostico + z * sigma,
+        sigma=sigma,
+        modelo=modelo.astype(np.int8),
+    )
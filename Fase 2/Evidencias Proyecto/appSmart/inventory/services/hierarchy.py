@@ -0,0 +1,180 @@
+"""
+Agregación jerárquica de pronósticos SmartERP (categoría → subcategoría → SKU
+y marca).
+Cada nivel es una matriz de suma S (grupos x SKUs) con un único 1 por
+columna; se guarda de forma compacta como el código de grupo de cada SKU y
+S @ y se calcula con np.bincount. Se reconcilian dos vistas coherentes:
+  - bottom-up: cada nivel es la suma de los pronósticos por SKU;
+  - top-down proporcional: se pronostica la serie agregada de cada categoría
+    y se reparte hacia subcategorías y SKUs según su participación histórica.
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from .columnar import PredictionColumns, _CODIGO_ACCION
+from .forecasting import pronosticar_demanda
+
+
+NIVELES = ('categoria', 'subcategoria', 'marca')
+SIN_CATEGORIA = 'Sin categoría'
+SIN_SUBCATEGORIA = 'Sin subcategoría'
+SIN_MARCA = 'Sin marca'
+
+
+@dataclass
+class MatrizAgregacion:
+    """Matriz de suma S en forma compacta: S[codigos[i], i] = 1"""
+    nombres: np.ndarray
+    codigos: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.nombres)
+
+    @classmethod
+    def desde_etiquetas(cls, etiquetas: np.ndarray) -> 'MatrizAgregacion':
+        nombres, codigos = np.unique(etiquetas.astype(str), return_inverse=True)
+        return cls(nombres=nombres, codigos=codigos.ravel())
+
+    def sumar(self, valores: np.ndarray) -> np.ndarray:
+        """S @ valores (vector por SKU o matriz SKU x mes)"""
+        valores = np.asarray(valores, dtype=np.float64)
+        if valores.ndim == 1:
+            return np.bincount(self.codigos, weights=valores, minlength=len(self))
+        total = np.zeros((len(self), valores.shape[1]))
+        np.add.at(total, self.codigos, valores)
+        return total
+
+    def expandir(self, por_grupo: np.ndarray) -> np.ndarray:
+        """S.T @ por_grupo: valor del grupo de cada SKU"""
+        return np.asarray(por_grupo)[self.codigos]
+
+
+@dataclass
+class NivelJerarquia:
+    """Totales de un nivel; `padres` es el grupo superior (subcategoría → categoría)"""
+    nivel: str
+    nombres: np.ndarray
+    padres: Optional[np.ndarray]
+    productos: np.ndarray
+    bottom_up: np.ndarray
+    top_down: np.ndarray
+    cantidad_sugerida: np.ndarray
+    sugerencias: np.ndarray
+
+    def filas(self) -> Iterator[dict]:
+        """Grupos ordenados por pronóstico reconciliado descendente"""
+        for pos in np.argsort(-self.top_down, kind='stable'):
+            yield {
+                'nivel': self.nivel,
+                'padre': self.padres[pos] if self.padres is not None else '',
+                'nombre': self.nombres[pos],
+                'productos': int(self.productos[pos]),
+                'bottom_up': float(self.bottom_up[pos]),
+                'top_down': float(self.top_down[pos]),
+                'cantidad_sugerida': int(self.cantidad_sugerida[pos]),
+                'sugerencias': int(self.sugerencias[pos]),
+            }
+
+
+@dataclass
+class PronosticoJerarquico:
+    niveles: Dict[str, NivelJerarquia]
+    producto_ids: np.ndarray
+    sku_top_down: np.ndarray  # Pronóstico reconciliado por SKU (alineado con producto_ids)
+
+    def filas(self, nivel: Optional[str] = None) -> List[dict]:
+        niveles = [nivel] if nivel else NIVELES
+        return [fila for n in niveles if n in self.niveles for fila in self.niveles[n].filas()]
+
+
+def _etiquetas(valores: Optional[np.ndarray], vacio: str, n: int) -> np.ndarray:
+    if valores is None:
+        return np.full(n, vacio, dtype=object)
+    return np.array([v or vacio for v in valores], dtype=object)
+
+
+def _participacion(historico: np.ndarray, base: np.ndarray, grupo: MatrizAgregacion) -> np.ndarray:
+    """
+    Proporción de cada SKU dentro de su grupo según la demanda histórica.
+    Grupos sin historia se reparten según el pronóstico base y, si también
+    es cero, en partes iguales.
+    """
+    total_hist = grupo.expandir(grupo.sumar(historico))
+    total_base = grupo.expandir(grupo.sumar(base))
+    tamano = grupo.expandir(np.bincount(grupo.codigos, minlength=len(grupo)))
+    return np.where(
+        total_hist > 0, historico / np.where(total_hist > 0, total_hist, 1.0),
+        np.where(total_base > 0, base / np.where(total_base > 0, total_base, 1.0), 1.0 / tamano),
+    )
+
+
+def reconciliar_jerarquia(columnas: PredictionColumns) -> PronosticoJerarquico:
+    """Agrega y reconcilia los pronósticos del snapshot columnar"""
+    n = len(columnas)
+    if n == 0:
+        return PronosticoJerarquico(niveles={}, producto_ids=columnas.producto_ids, sku_top_down=np.zeros(0))
+
+    categorias = _etiquetas(columnas.categorias1, SIN_CATEGORIA, n)
+    subcategorias = _etiquetas(columnas.categorias2, SIN_SUBCATEGORIA, n)
+    marcas = _etiquetas(columnas.brands, SIN_MARCA, n)
+
+    matrices = {
+        'categoria': MatrizAgregacion.desde_etiquetas(categorias),
+        # La subcategoría se identifica junto a su categoría (nombres repetidos)
+        'subcategoria': MatrizAgregacion.desde_etiquetas(
+            np.array([f'{c}\x1f{s}' for c, s in zip(categorias, subcategorias)], dtype=object)
+        ),
+        'marca': MatrizAgregacion.desde_etiquetas(marcas),
+    }
+
+    base = columnas.pronostico if columnas.pronostico is not None else np.zeros(n)
+    base = np.asarray(base, dtype=np.float64)
+    historial = np.asarray(columnas.historial, dtype=np.float64).reshape(n, -1)
+
+    # Top-down: pronóstico de la serie agregada por categoría repartido por participación
+    categoria = matrices['categoria']
+    pronostico_categoria = pronosticar_demanda(categoria.sumar(historial)).pronostico
+    sku_top_down = categoria.expandir(pronostico_categoria) * _participacion(
+        historial.sum(axis=1), base, categoria
+    )
+
+    compra = columnas.accion_codigo == _CODIGO_ACCION['comprar']
+    niveles = {}
+    for nivel, matriz in matrices.items():
+        nombres, padres = matriz.nombres, None
+        if nivel == 'subcategoria':
+            partes = [nombre.split('\x1f', 1) for nombre in nombres]
+            padres = np.array([p[0] for p in partes], dtype=object)
+            nombres = np.array([p[1] for p in partes], dtype=object)
+        niveles[nivel] = NivelJerarquia(
+            nivel=nivel,
+            nombres=nombres,
+            padres=padres,
+            productos=np.bincount(matriz.codigos, minlength=len(matriz)),
+            bottom_up=matriz.sumar(base),
+            top_down=matriz.sumar(sku_top_down),
+            cantidad_sugerida=matriz.sumar(np.where(compra, columnas.cantidad_sugerida, 0)),
+            sugerencias=np.bincount(matriz.codigos, weights=compra, minlength=len(matriz)),
+        )
+
+    return PronosticoJerarquico(
+        niveles=niveles,
+        producto_ids=columnas.producto_ids,
+        sku_top_down=sku_top_down,
+    )
+
+
+def lineas_reporte_jerarquia(jerarquia: PronosticoJerarquico) -> Iterator[List]:
+    """Filas del CSV de pronóstico por categoría, subcategoría y marca"""
+    yield [
+        'Nivel', 'Categoría', 'Nombre', 'Productos', 'Pronóstico Bottom-Up',
+        'Pronóstico Reconciliado', 'Cantidad Sugerida', 'Sugerencias de Compra',
+    ]
+    for fila in jerarquia.filas():
+        yield [
+            fila['nivel'], fila['padre'], fila['nombre'], fila['productos'],
+            f"{fila['bottom_up']:.1f}", f"{fila['top_down']:.1f}",
+            fila['cantidad_sugerida'], fila['sugerencias'],
+        ]
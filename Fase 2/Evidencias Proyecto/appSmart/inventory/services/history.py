@@ -0,0 +1,127 @@
+"""
+Historial de ventas para el sistema de predicciones SmartERP.
+Construye la matriz producto x mes (cantidad e ingresos) desde Ventas con una
+sola consulta agregada, sin consultas por producto.
+"""
+import datetime
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from django.db.models import DecimalField, F, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from sales.models.sales import Ventas  # Import cross-app
+
+
+MESES_HISTORIAL = 12
+# Meses que se cargan para pronosticar (dos temporadas para Holt-Winters)
+MESES_PRONOSTICO = 24
+# Hasta este número de productos se filtra por id en SQL (límite de
+# parámetros de SQL Server: 2100); sobre él se agrega la ventana completa
+MAX_IDS_FILTRO = 1000
+
+
+@dataclass
+class HistorialVentas:
+    """Matriz densa de ventas mensuales (filas = productos, columnas = meses)"""
+    producto_ids: np.ndarray
+    periodos: List[datetime.date]
+    cantidades: np.ndarray
+    ingresos: np.ndarray
+
+    @property
+    def etiquetas(self) -> List[str]:
+        return [periodo.strftime('%Y-%m') for periodo in self.periodos]
+
+    def ultimos(self, meses: int) -> 'HistorialVentas':
+        """Vista de los últimos `meses` periodos (sin copiar las matrices)"""
+        return HistorialVentas(
+            self.producto_ids, self.periodos[-meses:],
+            self.cantidades[:, -meses:], self.ingresos[:, -meses:],
+        )
+
+    def indice(self, id_producto: int) -> Optional[int]:
+        """Fila de la matriz correspondiente al producto (None si no está)"""
+        pos = int(np.searchsorted(self.producto_ids, id_producto))
+        if pos < len(self.producto_ids) and self.producto_ids[pos] == id_producto:
+            return pos
+        return None
+
+
+def ultimo_mes_cerrado() -> datetime.date:
+    """Último día del mes anterior (el mes en curso está incompleto)"""
+    return timezone.localdate().replace(day=1) - datetime.timedelta(days=1)
+
+
+def _mes_ordinal(fecha: datetime.date) -> int:
+    return fecha.year * 12 + fecha.month - 1
+
+
+def _ordinal_a_mes(ordinal: int) -> datetime.date:
+    return datetime.date(ordinal // 12, ordinal % 12 + 1, 1)
+
+
+def cargar_historial_ventas(
+    producto_ids: Sequence[int],
+    meses: int = MESES_HISTORIAL,
+    hasta: Optional[datetime.date] = None,
+) -> HistorialVentas:
+    """
+    Carga el historial mensual de los productos indicados con un único
+    GROUP BY (id_producto, mes) sobre Ventas.
+    Productos sin ventas en un mes quedan con 0 en esa celda.
+    """
+    ids = np.unique(np.asarray(producto_ids, dtype=np.int64))
+    hasta = hasta or timezone.localdate()
+    ultimo = _mes_ordinal(hasta)
+    primero = ultimo - meses + 1
+    periodos = [_ordinal_a_mes(o) for o in range(primero, ultimo + 1)]
+
+    cantidades = np.zeros((len(ids), meses), dtype=np.float64)
+    ingresos = np.zeros((len(ids), meses), dtype=np.float64)
+
+    if len(ids) == 0:
+        return HistorialVentas(ids, periodos, cantidades, ingresos)
+
+    ingreso_venta = Coalesce(
+        'total_venta',
+        F('cantidad_vendida') * F('precio_unitario'),
+        output_field=DecimalField(max_digits=23, decimal_places=2),
+    )
+    ventas = Ventas.objects.filter(
+        fecha__gte=periodos[0], fecha__lte=hasta,
+        id_producto__gte=int(ids[0]), id_producto__lte=int(ids[-1]),
+    )
+    if len(ids) <= MAX_IDS_FILTRO:
+        ventas = ventas.filter(id_producto__in=ids.tolist())
+    filas = (
+        ventas
+        .annotate(mes=TruncMonth('fecha'))
+        .values('id_producto', 'mes')
+        .annotate(cantidad=Sum('cantidad_vendida'), ingresos=Sum(ingreso_venta))
+        .order_by()
+        .values_list('id_producto', 'mes', 'cantidad', 'ingresos')
+    )
+
+    agregados = list(filas)
+    if not agregados:
+        return HistorialVentas(ids, periodos, cantidades, ingresos)
+
+    venta_ids = np.fromiter((f[0] for f in agregados), dtype=np.int64, count=len(agregados))
+    columnas = np.fromiter(
+        (_mes_ordinal(f[1]) - primero for f in agregados), dtype=np.int64, count=len(agregados)
+    )
+    cant = np.fromiter((f[2] or 0 for f in agregados), dtype=np.float64, count=len(agregados))
+    ingr = np.fromiter((float(f[3] or 0) for f in agregados), dtype=np.float64, count=len(agregados))
+
+    filas_idx = np.searchsorted(ids, venta_ids)
+    filas_idx = np.minimum(filas_idx, len(ids) - 1)
+    validos = (ids[filas_idx] == venta_ids) & (columnas >= 0) & (columnas < meses)
+
+    np.add.at(cantidades, (filas_idx[validos], columnas[validos]), cant[validos])
+    np.add.at(ingresos, (filas_idx[validos], columnas[validos]), ingr[validos])
+
+    return HistorialVentas(ids, periodos, cantidades, ingresos)
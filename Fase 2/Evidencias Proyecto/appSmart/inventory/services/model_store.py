@@ -0,0 +1,165 @@
+"""
+Almacén de artefactos del modelo de predicción SmartERP.
+Cada entrenamiento genera un archivo binario versionado (`regresor_vNNNN.npz`)
+con pesos, min/max de features y metadatos. El archivo `ACTUAL` apunta a la
+versión vigente y se reemplaza atómicamente (os.replace), de modo que los
+workers web nunca leen un artefacto a medio escribir.
+La versión se reserva creando su archivo con O_EXCL (dos entrenamientos
+simultáneos no obtienen el mismo número) y el puntero solo avanza.
+"""
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from django.conf import settings
+
+
+PUNTERO = 'ACTUAL'
+CANDADO_PUNTERO = 'ACTUAL.lock'
+ESPERA_CANDADO = 30  # Segundos; un candado más antiguo se considera abandonado
+_PATRON_VERSION = re.compile(r'regresor_v(\d+)\.npz$')
+
+_lock = threading.Lock()
+_cargado: Dict[str, Any] = {'nombre': None, 'artefacto': None}
+
+
+@dataclass
+class ArtefactoModelo:
+    """Estado entrenado del regresor más sus metadatos"""
+    weights: np.ndarray
+    feature_min: np.ndarray
+    feature_max: np.ndarray
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    version: int = 0
+
+
+def directorio_modelos() -> Path:
+    return Path(getattr(settings, 'MODELOS_DIR', Path(settings.BASE_DIR) / 'modelos'))
+
+
+def _siguiente_version(directorio: Path) -> int:
+    versiones = [
+        int(m.group(1)) for m in (_PATRON_VERSION.match(p.name) for p in directorio.iterdir()) if m
+    ]
+    return max(versiones, default=0) + 1
+
+
+def _reservar_version(directorio: Path) -> int:
+    """Crea vacío el archivo de la siguiente versión libre (O_EXCL)"""
+    version = _siguiente_version(directorio)
+    while True:
+        try:
+            fd = os.open(directorio / f'regresor_v{version:04d}.npz', os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            version += 1
+            continue
+        os.close(fd)
+        return version
+
+
+@contextmanager
+def _candado_puntero(directorio: Path):
+    """Exclusión entre procesos para leer y reemplazar el puntero"""
+    candado = directorio / CANDADO_PUNTERO
+    while True:
+        try:
+            fd = os.open(candado, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - candado.stat().st_mtime > ESPERA_CANDADO:
+                    candado.unlink()
+                    continue
+            except FileNotFoundError:
+                continue
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        candado.unlink(missing_ok=True)
+
+
+def _version_puntero(directorio: Path) -> int:
+    try:
+        coincidencia = _PATRON_VERSION.match((directorio / PUNTERO).read_text(encoding='utf-8').strip())
+    except OSError:
+        return 0
+    return int(coincidencia.group(1)) if coincidencia else 0
+
+
+def guardar_artefacto(artefacto: ArtefactoModelo) -> Path:
+    """
+    Escribe una nueva versión y la publica como vigente de forma atómica.
+    Si otro proceso ya publicó una versión mayor, el puntero no retrocede.
+    """
+    directorio = directorio_modelos()
+    directorio.mkdir(parents=True, exist_ok=True)
+    artefacto.version = _reservar_version(directorio)
+    destino = directorio / f'regresor_v{artefacto.version:04d}.npz'
+
+    fd, temporal = tempfile.mkstemp(dir=directorio, suffix='.npz.tmp')
+    with os.fdopen(fd, 'wb') as archivo:
+        np.savez(
+            archivo,
+            weights=artefacto.weights,
+            feature_min=artefacto.feature_min,
+            feature_max=artefacto.feature_max,
+            metadata=np.array(json.dumps({**artefacto.metadata, 'version': artefacto.version})),
+        )
+    os.replace(temporal, destino)
+
+    with _candado_puntero(directorio):
+        if _version_puntero(directorio) < artefacto.version:
+            fd, puntero_tmp = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as archivo:
+                archivo.write(destino.name)
+            os.replace(puntero_tmp, directorio / PUNTERO)
+    return destino
+
+
+def _leer_artefacto(ruta: Path) -> ArtefactoModelo:
+    with np.load(ruta, allow_pickle=False) as datos:
+        metadata = json.loads(str(datos['metadata']))
+        return ArtefactoModelo(
+            weights=datos['weights'].copy(),
+            feature_min=datos['feature_min'].copy(),
+            feature_max=datos['feature_max'].copy(),
+            metadata=metadata,
+            version=int(metadata.get('version', 0)),
+        )
+
+
+def artefacto_actual() -> Optional[ArtefactoModelo]:
+    """
+    Artefacto vigente, cargado una vez por proceso.
+    Solo se relee si el puntero ACTUAL cambió (reentrenamiento publicado).
+    """
+    puntero = directorio_modelos() / PUNTERO
+    try:
+        nombre = puntero.read_text(encoding='utf-8').strip()
+    except OSError:
+        return None
+
+    if nombre == _cargado['nombre']:
+        return _cargado['artefacto']
+
+    with _lock:
+        if nombre != _cargado['nombre']:
+            try:
+                artefacto = _leer_artefacto(puntero.parent / nombre)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"[SmartERP] Advertencia cargando modelo {nombre}: {e}")
+                return _cargado['artefacto']
+            _cargado['artefacto'] = artefacto
+            _cargado['nombre'] = nombre
+    return _cargado['artefacto']
@@ -3,18 +3,66 @@ Sistema de Predicciones ML para SmartERP Inventario.
 Migrado y adaptado desde productos.predicciones manteniendo toda la funcionalidad.
 """
 import datetime
+import hashlib
+import json
+import logging
 import math
-import statistics
-from dataclasses import dataclass
-from typing import List, Optional, Sequence
-import random
+from dataclasses import asdict, dataclass, fields
+from typing import Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
+import numpy as np
+
+from django.conf import settings
+from django.db.models import DateTimeField, Max, Q, Value
+from django.db.models.functions import Cast
 from django.utils import timezone
 from catalog.models.products import Productos  # Import cross-app
-
+from sales.models.sales import Ventas  # Import cross-app
+from inventory.models.features import FeaturesProducto
+from inventory.models.movements import MovimientoStock
+from .concurrencia import pool_procesos
+from .demand import EstadisticasDemanda, calcular_estadisticas_demanda
+from .forecasting import pronosticar_demanda
+from .history import (
+    MAX_IDS_FILTRO, MESES_HISTORIAL, MESES_PRONOSTICO, cargar_historial_ventas, ultimo_mes_cerrado,
+)
+from .model_store import ArtefactoModelo, artefacto_actual
+from .replenishment import ParametrosReposicion, PlanReposicion, calcular_reposicion, lead_times
+from .stock import stock_actual_lote
+
+logger = logging.getLogger(__name__)
 
 # Constantes del sistema de predicciones
 COMPRA_THRESHOLD = 0.50
+# Orden de las columnas de features del modelo entrenado
+FEATURES_MODELO = ('precio', 'sin_stock', 'en_oferta', 'tendencia', 'volatilidad', 'promedio')
+MIN_PRODUCTOS_POR_SHARD = 500  # Bajo este tamaño no conviene abrir procesos
+# Columnas de Productos que usa el modelo (proyección para el modo streaming)
+CAMPOS_PREDICCION = (
+    'id_producto', 'title', 'brand', 'normal_price', 'low_price', 'high_price',
+    'oferta', 'ahorro', 'ahorro_percent', 'sin_stock', 'categoria1',
+)
+
+
+@dataclass(frozen=True)
+class ConfiguracionRecomendador:
+    """
+    Umbral y multiplicadores de _determinar_accion. Los valores ajustados por
+    `manage.py buscar_hiperparametros` viajan en la metadata del artefacto.
+    """
+    umbral_compra: float = COMPRA_THRESHOLD
+    multiplicador_alta: float = 1.5         # Compra con demanda > 20 (sin pronóstico)
+    multiplicador_preventivo: float = 2.0   # Compra con demanda moderada (sin pronóstico)
+    factor_cobertura: float = 1.0           # Fracción del intervalo sobre el pronóstico a comprar
+
+    @classmethod
+    def desde_metadata(cls, metadata: Optional[dict]) -> 'ConfiguracionRecomendador':
+        valores = (metadata or {}).get('recomendador') or {}
+        nombres = {campo.name for campo in fields(cls)}
+        return cls(**{k: float(v) for k, v in valores.items() if k in nombres})
+
+    def a_dict(self) -> dict:
+        return {campo.name: getattr(self, campo.name) for campo in fields(self)}
 
 
 @dataclass
@@ -46,6 +94,104 @@ class PredictionItem:
     cantidad_sugerida: int
     stock_estimado: int
     disponible: bool
+    pronostico: float = 0.0
+    pronostico_inferior: float = 0.0
+    pronostico_superior: float = 0.0
+    stock_seguridad: float = 0.0
+    punto_reorden: float = 0.0
+    lote_economico: float = 0.0
+    cantidad_pedido: int = 0
+
+
+@dataclass(slots=True)
+class PredictionRow:
+    """Fila liviana de predicción (sin instancia de modelo ni historial)"""
+    id_producto: int
+    title: str
+    brand: Optional[str]
+    precio_referencia: float
+    promedio_mensual: float
+    ultima_cantidad: int
+    tendencia: float
+    volatilidad: float
+    probabilidad: float
+    accion: str
+    mensaje: str
+    motivo: str
+    cantidad_sugerida: int
+    stock_estimado: int
+    disponible: bool
+    pronostico: float = 0.0
+    pronostico_inferior: float = 0.0
+    pronostico_superior: float = 0.0
+    stock_seguridad: float = 0.0
+    punto_reorden: float = 0.0
+    lote_economico: float = 0.0
+    cantidad_pedido: int = 0
+
+    @property
+    def probabilidad_pct(self) -> float:
+        return self.probabilidad * 100
+
+    @property
+    def es_sobrestock(self) -> bool:
+        return self.accion == 'reducir'
+
+    @classmethod
+    def desde_item(cls, item: PredictionItem) -> 'PredictionRow':
+        return cls(
+            id_producto=item.producto.id_producto,
+            title=item.producto.title,
+            brand=item.producto.brand,
+            precio_referencia=item.precio_referencia,
+            promedio_mensual=item.promedio_mensual,
+            ultima_cantidad=item.ultima_cantidad,
+            tendencia=item.tendencia,
+            volatilidad=item.volatilidad,
+            probabilidad=item.probabilidad,
+            accion=item.accion,
+            mensaje=item.mensaje,
+            motivo=item.motivo,
+            cantidad_sugerida=item.cantidad_sugerida,
+            stock_estimado=item.stock_estimado,
+            disponible=item.disponible,
+            pronostico=item.pronostico,
+            pronostico_inferior=item.pronostico_inferior,
+            pronostico_superior=item.pronostico_superior,
+            stock_seguridad=item.stock_seguridad,
+            punto_reorden=item.punto_reorden,
+            lote_economico=item.lote_economico,
+            cantidad_pedido=item.cantidad_pedido,
+        )
+
+
+@dataclass
+class ContadoresPrediccion:
+    """Contadores acumulados mientras se consume iter_predicciones"""
+    total: int = 0
+    sugerencias: int = 0
+    sobrestock: int = 0
+
+    def registrar(self, fila: PredictionRow) -> None:
+        self.total += 1
+        if fila.accion == 'comprar':
+            self.sugerencias += 1
+        if fila.es_sobrestock:
+            self.sobrestock += 1
+
+
+@dataclass
+class MarcaAgua:
+    """Último estado de Ventas/Productos considerado por un snapshot"""
+    id_venta: int
+    fecha_venta: Optional[datetime.date]
+    datetime_producto: Optional[datetime.datetime]  # Max de Productos.datetime como fecha
+    id_producto: int
+    periodo: datetime.date  # Primer día del último mes del historial
+    id_movimiento: Optional[int] = None  # Último movimiento de stock (None = no se siguen)
+    generado: Optional[datetime.datetime] = None  # Momento de lectura (ediciones por FeaturesProducto)
+    version_modelo: Optional[int] = None  # Artefacto vigente (0 = reglas de negocio)
+    configuracion: Optional[str] = None   # Hash del recomendador y la política de reposición
 
 
 @dataclass
@@ -55,133 +201,410 @@ class PredictionPayload:
     sugerencias: int
     sobrestock: int
     fecha_generacion: datetime.datetime
+    marca_agua: Optional[MarcaAgua] = None
 
 
 class LogisticRegressor:
     """
     Implementación de regresión logística para predicciones ML.
-    Migrado desde productos.predicciones sin modificaciones.
+    Motor vectorizado con NumPy: escalado min-max por columnas, descenso de
+    gradiente por lotes (completo o mini-batch) y `predict()` matricial.
+    `paso_gradiente` multiplica el gradiente promedio del lote, así el paso
+    no depende de `batch_size`. Reemplaza al antiguo `learning_rate` (0.08),
+    que se aplicaba muestra a muestra: no son intercambiables.
     """
-    def __init__(self, learning_rate: float = 0.08, epochs: int = 450) -> None:
-        self.learning_rate = learning_rate
+    def __init__(
+        self,
+        paso_gradiente: float = 4.0,
+        epochs: int = 450,
+        batch_size: Optional[int] = 256,
+        random_state: Optional[int] = None,
+    ) -> None:
+        self.paso_gradiente = paso_gradiente
         self.epochs = epochs
-        self.weights: List[float] = []
-        self.feature_min: List[float] = []
-        self.feature_max: List[float] = []
+        self.batch_size = batch_size  # None = gradiente con el lote completo
+        self.random_state = random_state
+        self.weights: np.ndarray = np.zeros(0)
+        self.feature_min: np.ndarray = np.zeros(0)
+        self.feature_max: np.ndarray = np.zeros(0)
 
     @staticmethod
-    def _sigmoid(z: float) -> float:
-        if z < -700:
-            return 0.0
-        if z > 700:
-            return 1.0
-        return 1.0 / (1.0 + math.exp(-z))
-
-    def _scale_dataset(self, features: Sequence[Sequence[float]]) -> List[List[float]]:
-        if not features:
-            return []
-        cols = len(features[0])
-        self.feature_min = [min(row[idx] for row in features) for idx in range(cols)]
-        self.feature_max = [max(row[idx] for row in features) for idx in range(cols)]
-        scaled: List[List[float]] = []
-        for row in features:
-            scaled_row: List[float] = []
-            for idx, value in enumerate(row):
-                minimum = self.feature_min[idx]
-                maximum = self.feature_max[idx]
-                if math.isclose(maximum, minimum):
-                    scaled_row.append(0.0)
-                else:
-                    scaled_row.append((value - minimum) / (maximum - minimum))
-            scaled.append(scaled_row)
-        return scaled
-
-    def _scale_single(self, row: Sequence[float]) -> List[float]:
-        scaled: List[float] = []
-        for idx, value in enumerate(row):
-            minimum = self.feature_min[idx]
-            maximum = self.feature_max[idx]
-            if math.isclose(maximum, minimum):
-                scaled.append(0.0)
-            else:
-                scaled.append((value - minimum) / (maximum - minimum))
-        return scaled
+    def _sigmoid(z):
+        return 1.0 / (1.0 + np.exp(-np.clip(z, -700, 700)))
+
+    def _scale_dataset(self, features: Sequence[Sequence[float]]) -> np.ndarray:
+        matrix = np.asarray(features, dtype=np.float64)
+        if matrix.size == 0:
+            return matrix.reshape(0, 0)
+        self.feature_min = matrix.min(axis=0)
+        self.feature_max = matrix.max(axis=0)
+        return self._scale_matrix(matrix)
+
+    def _scale_matrix(self, matrix: np.ndarray) -> np.ndarray:
+        span = self.feature_max - self.feature_min
+        constante = np.isclose(self.feature_max, self.feature_min)
+        safe_span = np.where(constante, 1.0, span)
+        return np.where(constante, 0.0, (matrix - self.feature_min) / safe_span)
+
+    def _scale_single(self, row: Sequence[float]) -> np.ndarray:
+        return self._scale_matrix(np.asarray(row, dtype=np.float64))
 
     def fit(self, features: Sequence[Sequence[float]], labels: Sequence[int]) -> None:
-        if not features:
-            self.weights = []
+        if len(features) == 0:
+            self.weights = np.zeros(0)
             return
 
-        scaled_features = self._scale_dataset(features)
-        cols = len(scaled_features[0]) if scaled_features else 0
-        self.weights = [0.0] * (cols + 1)  # +1 para el bias
-
-        for _ in range(self.epochs):
-            for i, row in enumerate(scaled_features):
-                prediction = self.predict_single(row)
-                error = labels[i] - prediction
-                
-                # Actualizar bias
-                self.weights[0] += self.learning_rate * error * prediction * (1 - prediction)
-                
-                # Actualizar pesos de features
-                for j, feature_value in enumerate(row):
-                    self.weights[j + 1] += (
-                        self.learning_rate * error * prediction * (1 - prediction) * feature_value
-                    )
+        scaled = self._scale_dataset(features)
+        self.weights = np.zeros(scaled.shape[1] + 1)
+        self._descenso(scaled, np.asarray(labels, dtype=np.float64), self.epochs)
+
+    def partial_fit(
+        self,
+        features: Sequence[Sequence[float]],
+        labels: Sequence[int],
+        epochs: int = 1,
+    ) -> None:
+        """
+        Actualización online: amplía el min/max de las features con las
+        muestras nuevas (conservando la función de decisión aprendida) y
+        aplica `epochs` pasadas de SGD solo sobre esas muestras.
+        """
+        if len(features) == 0:
+            return
+        matrix = np.atleast_2d(np.asarray(features, dtype=np.float64))
+        if self.weights.size == 0:
+            self.feature_min = matrix.min(axis=0)
+            self.feature_max = matrix.max(axis=0)
+            self.weights = np.zeros(matrix.shape[1] + 1)
+        else:
+            self._ampliar_rango(matrix.min(axis=0), matrix.max(axis=0))
+        self._descenso(self._scale_matrix(matrix), np.asarray(labels, dtype=np.float64), epochs)
+
+    def _ampliar_rango(self, nuevo_min: np.ndarray, nuevo_max: np.ndarray) -> None:
+        """Extiende el rango de escalado reajustando pesos y bias para que
+        las probabilidades de los datos ya vistos no cambien."""
+        minimo = np.minimum(self.feature_min, nuevo_min)
+        maximo = np.maximum(self.feature_max, nuevo_max)
+        variable = ~np.isclose(self.feature_max, self.feature_min)
+        span = np.where(variable, self.feature_max - self.feature_min, 1.0)
+        w = self.weights[1:]
+        # logit = b + sum(w * (x - min) / span): con el nuevo rango se escala
+        # cada peso por span'/span y el bias absorbe el corrimiento del mínimo
+        self.weights[0] += np.sum(np.where(variable, w * (minimo - self.feature_min) / span, 0.0))
+        self.weights[1:] = np.where(variable, w * (maximo - minimo) / span, w)
+        self.feature_min, self.feature_max = minimo, maximo
+
+    def _descenso(self, scaled: np.ndarray, y: np.ndarray, epochs: int) -> None:
+        """Descenso de gradiente por lotes sobre datos ya escalados"""
+        rows = scaled.shape[0]
+        # Columna de unos para el bias (peso 0)
+        design = np.hstack([np.ones((rows, 1)), scaled])
+        batch = rows if not self.batch_size else min(self.batch_size, rows)
+        rng = np.random.default_rng(self.random_state)
+
+        for _ in range(epochs):
+            order = rng.permutation(rows) if batch < rows else np.arange(rows)
+            for start in range(0, rows, batch):
+                idx = order[start:start + batch]
+                x_batch = design[idx]
+                prediction = self._sigmoid(x_batch @ self.weights)
+                error = y[idx] - prediction
+                # Gradiente de la versión por muestra, promediado en el lote
+                gradient = x_batch.T @ (error * prediction * (1 - prediction)) / len(x_batch)
+                self.weights += self.paso_gradiente * gradient
+
+    def a_artefacto(self, metadata: Optional[dict] = None) -> ArtefactoModelo:
+        """Estado entrenado listo para persistir con model_store"""
+        return ArtefactoModelo(
+            weights=self.weights,
+            feature_min=self.feature_min,
+            feature_max=self.feature_max,
+            metadata={
+                'paso_gradiente': self.paso_gradiente,
+                'epochs': self.epochs,
+                'batch_size': self.batch_size,
+                **(metadata or {}),
+            },
+        )
+
+    @classmethod
+    def desde_artefacto(cls, artefacto: ArtefactoModelo) -> 'LogisticRegressor':
+        metadata = artefacto.metadata
+        modelo = cls(
+            paso_gradiente=metadata.get('paso_gradiente', 4.0),
+            epochs=metadata.get('epochs', 450),
+            batch_size=metadata.get('batch_size', 256),
+        )
+        modelo.weights = np.asarray(artefacto.weights, dtype=np.float64)
+        modelo.feature_min = np.asarray(artefacto.feature_min, dtype=np.float64)
+        modelo.feature_max = np.asarray(artefacto.feature_max, dtype=np.float64)
+        return modelo
 
     def predict_single(self, row: Sequence[float]) -> float:
-        if not self.weights:
+        if self.weights.size == 0:
             return 0.0
-        
-        scaled_row = self._scale_single(row) if hasattr(self, 'feature_min') else list(row)
-        
-        z = self.weights[0]  # bias
-        for i, value in enumerate(scaled_row):
-            if i + 1 < len(self.weights):
-                z += self.weights[i + 1] * value
-        
-        return self._sigmoid(z)
+        return float(self.predict([row])[0])
+
+    def predict(self, features: Sequence[Sequence[float]]) -> np.ndarray:
+        matrix = np.atleast_2d(np.asarray(features, dtype=np.float64))
+        if self.weights.size == 0:
+            return np.zeros(matrix.shape[0])
+        scaled = self._scale_matrix(matrix)
+        return self._sigmoid(self.weights[0] + scaled @ self.weights[1:])
+
+
+def _como_fecha(expresion):
+    """
+    Cast a datetime. Se aplica a ambos lados de la comparación con la marca:
+    en SQLite el cast produce texto con milisegundos y la comparación es léxica.
+    """
+    return Cast(expresion, DateTimeField())
+
+
+def _datetime_producto():
+    """Productos.datetime (NVARCHAR 'YYYY-MM-DD HH:MM:SS') como fecha comparable"""
+    return _como_fecha('datetime')
+
+
+def _hash_configuracion(artefacto: Optional[ArtefactoModelo]) -> str:
+    """Huella de los parámetros de decisión: umbrales del artefacto y settings de reposición"""
+    config = ConfiguracionRecomendador.desde_metadata(artefacto.metadata if artefacto else None)
+    contenido = json.dumps(
+        {'recomendador': config.a_dict(), 'reposicion': asdict(ParametrosReposicion.desde_settings())},
+        sort_keys=True,
+    )
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()[:16]
+
 
-    def predict(self, features: Sequence[Sequence[float]]) -> List[float]:
-        return [self.predict_single(row) for row in features]
+def obtener_marca_agua() -> MarcaAgua:
+    """
+    Lee la marca de agua actual de Ventas, Productos y movimientos de stock,
+    más la versión del modelo y la configuración con que se predice.
+    """
+    generado = timezone.now()
+    artefacto = artefacto_actual()
+    ventas = Ventas.objects.aggregate(id_venta=Max('id_venta'), fecha=Max('fecha'))
+    productos = Productos.objects.aggregate(
+        datetime=Max(_datetime_producto()), id_producto=Max('id_producto')
+    )
+    return MarcaAgua(
+        id_venta=ventas['id_venta'] or 0,
+        fecha_venta=ventas['fecha'],
+        datetime_producto=productos['datetime'],
+        id_producto=productos['id_producto'] or 0,
+        periodo=timezone.localdate().replace(day=1),
+        id_movimiento=MovimientoStock.objects.aggregate(ultimo=Max('id_movimiento'))['ultimo'] or 0,
+        generado=generado,
+        version_modelo=artefacto.version if artefacto else 0,
+        configuracion=_hash_configuracion(artefacto),
+    )
 
 
-def generar_predicciones() -> PredictionPayload:
+def productos_modificados(marca: MarcaAgua) -> Set[int]:
+    """
+    Ids de productos con ventas, movimientos de stock o atributos nuevos desde
+    la marca. Las ediciones del catálogo no cambian Productos.datetime: se
+    detectan por las filas de FeaturesProducto recalculadas (señales o
+    actualizar_features) después de `generado`.
+    """
+    ventas_nuevas = Q(id_venta__gt=marca.id_venta)
+    if marca.fecha_venta:
+        ventas_nuevas |= Q(fecha__gt=marca.fecha_venta)
+    ids = set(
+        Ventas.objects.filter(ventas_nuevas)
+        .values_list('id_producto', flat=True).distinct()
+    )
+
+    productos_nuevos = Q(id_producto__gt=marca.id_producto)
+    if marca.datetime_producto:
+        productos_nuevos |= Q(fecha_registro__gt=_como_fecha(Value(marca.datetime_producto)))
+    ids.update(
+        Productos.objects.alias(fecha_registro=_datetime_producto())
+        .filter(productos_nuevos).values_list('id_producto', flat=True)
+    )
+    if marca.generado is not None:
+        ids.update(
+            FeaturesProducto.objects.filter(actualizado__gt=marca.generado)
+            .values_list('id_producto', flat=True)
+        )
+    if marca.id_movimiento is not None:
+        ids.update(
+            MovimientoStock.objects.filter(id_movimiento__gt=marca.id_movimiento)
+            .values_list('id_producto', flat=True).distinct()
+        )
+    return ids
+
+
+def _productos_eliminados(previo: PredictionPayload) -> Set[int]:
+    """Ids del snapshot que ya no existen en Productos (un scan de la PK)"""
+    existentes = set(Productos.objects.values_list('id_producto', flat=True))
+    return {item.producto.id_producto for item in previo.items} - existentes
+
+
+def _cargar_productos(producto_ids: Optional[Iterable[int]]) -> List[Productos]:
+    if producto_ids is None:
+        return list(Productos.objects.order_by('id_producto'))
+    ids = sorted(set(producto_ids))
+    productos: List[Productos] = []
+    for inicio in range(0, len(ids), MAX_IDS_FILTRO):
+        lote = ids[inicio:inicio + MAX_IDS_FILTRO]
+        productos.extend(Productos.objects.filter(id_producto__in=lote).order_by('id_producto'))
+    return productos
+
+
+def _fusionar_predicciones(
+    previo: PredictionPayload, nuevo: PredictionPayload, recalculados: Set[int]
+) -> PredictionPayload:
+    """Reemplaza en el snapshot previo los items de los productos recalculados"""
+    por_id = {item.producto.id_producto: item for item in previo.items}
+    for id_producto in recalculados:
+        por_id.pop(id_producto, None)
+    por_id.update((item.producto.id_producto, item) for item in nuevo.items)
+
+    items = [por_id[id_producto] for id_producto in sorted(por_id)]
+    return PredictionPayload(
+        items=items,
+        sugerencias=sum(1 for item in items if item.accion == 'comprar'),
+        sobrestock=sum(1 for item in items if item.es_sobrestock),
+        fecha_generacion=nuevo.fecha_generacion,
+        marca_agua=nuevo.marca_agua,
+    )
+
+
+def generar_predicciones(
+    previo: Optional[PredictionPayload] = None,
+    producto_ids: Optional[Iterable[int]] = None,
+    workers: Optional[int] = None,
+) -> PredictionPayload:
     """
     Función principal para generar predicciones de inventario.
-    Adaptada para usar modelos modulares pero manteniendo lógica original.
+    Usa el historial real de Ventas (una consulta agregada para todo el
+    catálogo) y calcula las métricas de todos los productos a la vez.
+
+    Modo incremental: si se entrega el snapshot `previo` (con marca de agua
+    del mismo mes, modelo y configuración), solo se recalculan los productos con ventas nuevas o
+    atributos modificados y se fusionan con el resto del snapshot; los
+    productos eliminados del catálogo se quitan.
+
+    Modo paralelo: con `workers` > 1 (por defecto PREDICCIONES_WORKERS) el
+    catálogo completo se divide en rangos de id_producto que se procesan en
+    un ProcessPoolExecutor; el resultado no depende del número de workers.
     """
-    productos = list(Productos.objects.all())
-    
+    if workers is None:
+        workers = getattr(settings, 'PREDICCIONES_WORKERS', 1)
+
+    # Se lee antes de los datos para no perder filas insertadas durante el cálculo
+    marca = obtener_marca_agua()
+
+    # Snapshots anteriores a la marca tipada (sin `generado`), de otro mes, de
+    # otro modelo o con otros umbrales se recalculan completos
+    anterior = previo.marca_agua if previo is not None else None
+    if (
+        anterior is not None and getattr(anterior, 'generado', None)
+        and anterior.periodo == marca.periodo
+        and getattr(anterior, 'version_modelo', None) == marca.version_modelo
+        and getattr(anterior, 'configuracion', None) == marca.configuracion
+    ):
+        recalcular = productos_modificados(anterior) | _productos_eliminados(previo)
+        if not recalcular:
+            return PredictionPayload(
+                items=previo.items,
+                sugerencias=previo.sugerencias,
+                sobrestock=previo.sobrestock,
+                fecha_generacion=timezone.now(),
+                marca_agua=marca,
+            )
+        parcial = _predecir_productos(_cargar_productos(recalcular))
+        parcial.marca_agua = marca
+        return _fusionar_predicciones(previo, parcial, recalcular)
+
+    if producto_ids is None and workers > 1:
+        payload = _predecir_en_paralelo(workers)
+    else:
+        payload = _predecir_productos(_cargar_productos(producto_ids))
+    payload.marca_agua = marca
+    return payload
+
+
+def _rangos_por_shard(num_shards: int) -> List[Tuple[int, int]]:
+    """Divide el catálogo en rangos contiguos de id_producto de tamaño similar"""
+    ids = list(Productos.objects.order_by('id_producto').values_list('id_producto', flat=True))
+    if not ids:
+        return []
+    tamano = max(MIN_PRODUCTOS_POR_SHARD, math.ceil(len(ids) / num_shards))
+    return [
+        (ids[inicio], ids[min(inicio + tamano, len(ids)) - 1])
+        for inicio in range(0, len(ids), tamano)
+    ]
+
+
+def _predecir_shard(shard: Tuple[int, int]) -> PredictionPayload:
+    desde, hasta = shard
+    productos = list(
+        Productos.objects.filter(id_producto__gte=desde, id_producto__lte=hasta)
+        .order_by('id_producto')
+    )
+    return _predecir_productos(productos)
+
+
+def _predecir_en_paralelo(workers: int) -> PredictionPayload:
+    rangos = _rangos_por_shard(workers)
+    if len(rangos) <= 1:
+        return _predecir_productos(_cargar_productos(None))
+
+    with pool_procesos(min(workers, len(rangos))) as executor:
+        resultados = list(executor.map(_predecir_shard, rangos))
+
+    # Los shards vienen en orden de id, la concatenación conserva el orden
+    items: List[PredictionItem] = []
+    for resultado in resultados:
+        items.extend(resultado.items)
+    return PredictionPayload(
+        items=items,
+        sugerencias=sum(r.sugerencias for r in resultados),
+        sobrestock=sum(r.sobrestock for r in resultados),
+        fecha_generacion=timezone.now(),
+    )
+
+
+def _predecir_productos(productos: List[Productos]) -> PredictionPayload:
+    """Calcula las predicciones de una lista de productos ordenada por id"""
     if not productos:
         return PredictionPayload(
             items=[],
             sugerencias=0,
             sobrestock=0,
-            fecha_generacion=timezone.now()
+            fecha_generacion=timezone.now(),
         )
     
+    historial, stats, probabilidades, pronostico = _calcular_metricas(productos)
+    config = configuracion_recomendador()
+    saldos = stock_actual_lote(p.id_producto for p in productos)
+    plan = _plan_reposicion(productos, stats, saldos, ParametrosReposicion.desde_settings())
+    cantidades = historial.cantidades
+    etiquetas = historial.etiquetas
+    
     items: List[PredictionItem] = []
     sugerencias_count = 0
     sobrestock_count = 0
     
-    for producto in productos:
+    for idx, producto in enumerate(productos):
         try:
-            # Generar datos sintéticos para análisis (simulando historial de ventas)
-            historial = _generar_historial_sintetico(producto)
-            
-            # Calcular métricas de análisis
-            promedio_mensual = statistics.mean([r.quantity for r in historial]) if historial else 0
-            tendencia = _calcular_tendencia(historial)
-            volatilidad = _calcular_volatilidad(historial)
-            
-            # Predicción usando ML
-            probabilidad = _predecir_probabilidad_compra(producto, historial)
+            serie = [int(q) for q in cantidades[idx]]
+            registros = [
+                PurchaseRecord(period_label=etiqueta, quantity=cantidad, revenue=float(ingreso))
+                for etiqueta, cantidad, ingreso in zip(etiquetas, serie, historial.ingresos[idx])
+            ]
+            promedio_mensual = float(stats.promedio[idx])
+            volatilidad = float(stats.volatilidad[idx])
+            probabilidad = float(probabilidades[idx])
             
             # Determinar acción y cantidad sugerida
             accion, cantidad_sugerida, mensaje, motivo = _determinar_accion(
-                producto, probabilidad, promedio_mensual, volatilidad
+                producto, probabilidad, promedio_mensual, volatilidad,
+                pronostico=float(pronostico.pronostico[idx]),
+                limite_superior=float(pronostico.limite_superior[idx]),
+                config=config,
             )
             
             es_sobrestock = accion == 'reducir'
@@ -192,153 +615,275 @@ def generar_predicciones() -> PredictionPayload:
             
             item = PredictionItem(
                 producto=producto,
-                historial=historial,
+                historial=registros,
                 promedio_mensual=promedio_mensual,
-                ultima_cantidad=historial[-1].quantity if historial else 0,
-                tendencia=tendencia,
+                ultima_cantidad=int(stats.ultimo[idx]),
+                tendencia=float(stats.tendencia[idx]),
                 volatilidad=volatilidad,
                 probabilidad=probabilidad,
                 probabilidad_pct=probabilidad * 100,
                 accion=accion,
                 mensaje=mensaje,
                 motivo=motivo,
-                max_historial=max([r.quantity for r in historial]) if historial else 0,
-                historial_series=[r.quantity for r in historial],
+                max_historial=int(stats.maximo[idx]),
+                historial_series=serie,
                 es_sobrestock=es_sobrestock,
                 precio_referencia=producto.precio_referencia,
                 cantidad_sugerida=cantidad_sugerida,
-                stock_estimado=_estimar_stock_actual(producto),
-                disponible=producto.disponible
+                stock_estimado=saldos.get(producto.id_producto, 0),
+                disponible=producto.disponible,
+                pronostico=float(pronostico.pronostico[idx]),
+                pronostico_inferior=float(pronostico.limite_inferior[idx]),
+                pronostico_superior=float(pronostico.limite_superior[idx]),
+                stock_seguridad=float(plan.stock_seguridad[idx]),
+                punto_reorden=float(plan.punto_reorden[idx]),
+                lote_economico=float(plan.lote_economico[idx]),
+                cantidad_pedido=int(plan.cantidad_pedido[idx]),
             )
             
             items.append(item)
             
-        except Exception as e:
-            # Log error pero continúa con otros productos
-            print(f"Error procesando producto {producto.id_producto}: {e}")
+        except Exception:
+            # Registra el error y continúa con otros productos
+            logger.exception('Error procesando producto %s', producto.id_producto)
             continue
     
     return PredictionPayload(
         items=items,
         sugerencias=sugerencias_count,
         sobrestock=sobrestock_count,
-        fecha_generacion=timezone.now()
+        fecha_generacion=timezone.now(),
     )
 
 
-def _generar_historial_sintetico(producto: Productos) -> List[PurchaseRecord]:
-    """Genera historial sintético para análisis (en versión real conectaría con Ventas)"""
-    historial = []
-    base_quantity = random.randint(5, 50)
+def _calcular_metricas(
+    productos: List[Productos],
+    hasta: Optional[datetime.date] = None,
+    usar_modelo: bool = True,
+):
+    """
+    Historial (últimos 12 meses), estadísticas de demanda, probabilidad y
+    pronóstico del próximo mes de un lote de productos ordenado por id.
+    `hasta` fija el último día de historial (backtesting); por defecto el
+    cierre del mes anterior, para no tratar el mes en curso como completo.
+    """
+    # Historial producto x mes; la fila i corresponde a productos[i]
+    completo = cargar_historial_ventas(
+        [p.id_producto for p in productos], meses=MESES_PRONOSTICO,
+        hasta=hasta or ultimo_mes_cerrado(),
+    )
+    historial = completo.ultimos(MESES_HISTORIAL)
+    
+    # Todas las métricas de demanda en una sola pasada vectorizada
+    stats = calcular_estadisticas_demanda(historial.cantidades)
+    
+    # Predicción usando ML
+    probabilidades = _predecir_probabilidad_compra(
+        precios=np.array([float(p.precio_referencia or 0) for p in productos]),
+        sin_stock=np.array([bool(p.sin_stock) for p in productos]),
+        en_oferta=np.array([p.oferta_activa for p in productos]),
+        stats=stats,
+        usar_modelo=usar_modelo,
+    )
     
-    for i in range(12):  # 12 meses de historial
-        # Simular variaciones estacionales y tendencias
-        variation = random.uniform(0.7, 1.3)
-        if producto.oferta_activa:
-            variation *= 1.2  # Más ventas si está en oferta
-        if producto.sin_stock:
-            variation *= 0.3  # Menos ventas si no hay stock
-            
-        quantity = max(0, int(base_quantity * variation))
-        revenue = quantity * (producto.precio_referencia or 0)
-        
-        historial.append(PurchaseRecord(
-            period_label=f"Mes {i+1}",
-            quantity=quantity,
-            revenue=revenue
-        ))
+    # Suavizamiento exponencial / Holt-Winters sobre los 24 meses
+    pronostico = pronosticar_demanda(completo.cantidades)
     
-    return historial
+    return historial, stats, probabilidades, pronostico
 
 
-def _calcular_tendencia(historial: List[PurchaseRecord]) -> float:
-    """Calcula tendencia de ventas (positiva = creciente)"""
-    if len(historial) < 2:
-        return 0.0
-    
-    quantities = [r.quantity for r in historial]
-    n = len(quantities)
-    
-    # Regresión lineal simple para tendencia
-    x_mean = (n - 1) / 2
-    y_mean = statistics.mean(quantities)
-    
-    numerator = sum((i - x_mean) * (q - y_mean) for i, q in enumerate(quantities))
-    denominator = sum((i - x_mean) ** 2 for i in range(n))
-    
-    return numerator / denominator if denominator != 0 else 0.0
+def iter_predicciones(
+    chunk_size: int = 1000,
+    contadores: Optional[ContadoresPrediccion] = None,
+) -> Iterator[PredictionRow]:
+    """
+    Genera predicciones del catálogo en lotes de `chunk_size` productos sin
+    mantener el catálogo completo en memoria.
+    Lee solo las columnas necesarias y actualiza `contadores` (sugerencias,
+    sobrestock) a medida que se consumen las filas.
+
+    Los lotes se leen con paginación por id_producto (keyset) en vez de un
+    cursor abierto: SQL Server sin MARS no permite consultar el historial
+    mientras otro cursor tiene resultados pendientes.
+    """
+    if contadores is None:
+        contadores = ContadoresPrediccion()
+    config = configuracion_recomendador()
+    parametros = ParametrosReposicion.desde_settings()
+
+    ultimo_id = 0
+    while True:
+        lote = list(
+            Productos.objects.filter(id_producto__gt=ultimo_id)
+            .order_by('id_producto')
+            .only(*CAMPOS_PREDICCION)[:chunk_size]
+        )
+        if not lote:
+            return
+        ultimo_id = lote[-1].id_producto
+
+        _, stats, probabilidades, pronostico = _calcular_metricas(lote)
+        saldos = stock_actual_lote(p.id_producto for p in lote)
+        plan = _plan_reposicion(lote, stats, saldos, parametros)
+        for idx, producto in enumerate(lote):
+            promedio = float(stats.promedio[idx])
+            probabilidad = float(probabilidades[idx])
+            accion, cantidad_sugerida, mensaje, motivo = _determinar_accion(
+                producto, probabilidad, promedio, float(stats.volatilidad[idx]),
+                pronostico=float(pronostico.pronostico[idx]),
+                limite_superior=float(pronostico.limite_superior[idx]),
+                config=config,
+            )
+            fila = PredictionRow(
+                id_producto=producto.id_producto,
+                title=producto.title,
+                brand=producto.brand,
+                precio_referencia=producto.precio_referencia,
+                promedio_mensual=promedio,
+                ultima_cantidad=int(stats.ultimo[idx]),
+                tendencia=float(stats.tendencia[idx]),
+                volatilidad=float(stats.volatilidad[idx]),
+                probabilidad=probabilidad,
+                accion=accion,
+                mensaje=mensaje,
+                motivo=motivo,
+                cantidad_sugerida=cantidad_sugerida,
+                stock_estimado=saldos.get(producto.id_producto, 0),
+                disponible=producto.disponible,
+                pronostico=float(pronostico.pronostico[idx]),
+                pronostico_inferior=float(pronostico.limite_inferior[idx]),
+                pronostico_superior=float(pronostico.limite_superior[idx]),
+                stock_seguridad=float(plan.stock_seguridad[idx]),
+                punto_reorden=float(plan.punto_reorden[idx]),
+                lote_economico=float(plan.lote_economico[idx]),
+                cantidad_pedido=int(plan.cantidad_pedido[idx]),
+            )
+            contadores.registrar(fila)
+            yield fila
 
+        if len(lote) < chunk_size:
+            return
 
-def _calcular_volatilidad(historial: List[PurchaseRecord]) -> float:
-    """Calcula volatilidad como coeficiente de variación"""
-    if not historial:
-        return 0.0
-    
-    quantities = [r.quantity for r in historial]
-    mean = statistics.mean(quantities)
-    
-    if mean == 0:
-        return 0.0
-    
-    variance = statistics.variance(quantities) if len(quantities) > 1 else 0.0
-    std_dev = math.sqrt(variance)
-    
-    return std_dev / mean
+
+def _plan_reposicion(
+    productos: List[Productos],
+    stats: EstadisticasDemanda,
+    saldos: dict,
+    parametros: ParametrosReposicion,
+) -> PlanReposicion:
+    """Punto de reorden, stock de seguridad y EOQ del lote (una pasada)"""
+    return calcular_reposicion(
+        stats.promedio,
+        stats.varianza,
+        precios=np.array([float(p.precio_referencia or 0) for p in productos]),
+        stock=np.array([saldos.get(p.id_producto, 0) for p in productos], dtype=np.float64),
+        lead_time_dias=lead_times([p.categoria1 for p in productos], parametros),
+        parametros=parametros,
+    )
+
+
+def matriz_features(
+    precios: np.ndarray,
+    sin_stock: np.ndarray,
+    en_oferta: np.ndarray,
+    stats: EstadisticasDemanda,
+) -> np.ndarray:
+    """Features por producto en el orden FEATURES_MODELO"""
+    return np.column_stack([
+        precios, sin_stock, en_oferta, stats.tendencia, stats.volatilidad, stats.promedio,
+    ]).astype(np.float64)
+
+
+_modelo_cache = {'version': None, 'modelo': None}
+
+
+def configuracion_recomendador() -> ConfiguracionRecomendador:
+    """Configuración del artefacto vigente (valores por defecto si no hay)"""
+    artefacto = artefacto_actual()
+    return ConfiguracionRecomendador.desde_metadata(artefacto.metadata if artefacto else None)
+
+
+def _modelo_entrenado() -> Optional[LogisticRegressor]:
+    """Regresor del artefacto vigente (se reconstruye solo si cambió la versión)"""
+    artefacto = artefacto_actual()
+    if artefacto is None:
+        return None
+    if _modelo_cache['version'] != artefacto.version:
+        _modelo_cache['modelo'] = LogisticRegressor.desde_artefacto(artefacto)
+        _modelo_cache['version'] = artefacto.version
+    return _modelo_cache['modelo']
 
 
-def _predecir_probabilidad_compra(producto: Productos, historial: List[PurchaseRecord]) -> float:
-    """Predice probabilidad de necesidad de compra usando ML"""
-    # Features para ML: precio, stock, tendencia, volatilidad, etc.
-    precio = producto.precio_referencia or 0
-    sin_stock = 1.0 if producto.sin_stock else 0.0
-    en_oferta = 1.0 if producto.oferta_activa else 0.0
+def _predecir_probabilidad_compra(
+    precios: np.ndarray,
+    sin_stock: np.ndarray,
+    en_oferta: np.ndarray,
+    stats: EstadisticasDemanda,
+    usar_modelo: bool = True,
+) -> np.ndarray:
+    """
+    Predice probabilidad de necesidad de compra (vector por producto).
+    Usa el regresor entrenado si hay un artefacto publicado; si no (o con
+    `usar_modelo=False`), reglas de negocio como respaldo.
+    """
+    features = matriz_features(precios, sin_stock, en_oferta, stats)
     
-    if historial:
-        tendencia = _calcular_tendencia(historial)
-        volatilidad = _calcular_volatilidad(historial)
-        promedio = statistics.mean([r.quantity for r in historial])
-    else:
-        tendencia = 0.0
-        volatilidad = 0.0
-        promedio = 0.0
+    modelo = _modelo_entrenado() if usar_modelo else None
+    if modelo is not None:
+        return np.clip(modelo.predict(features), 0.0, 1.0)
     
-    # Modelo simplificado (en versión real se entrenaría con datos históricos reales)
-    features = [precio, sin_stock, en_oferta, tendencia, volatilidad, promedio]
+    tendencia = stats.tendencia
+    volatilidad = stats.volatilidad
     
     # Lógica de predicción basada en reglas de negocio
-    probabilidad = 0.5  # Base
+    probabilidad = np.full(len(features), 0.5)  # Base
     
     # Incrementar si hay tendencia positiva
-    if tendencia > 0:
-        probabilidad += min(tendencia * 0.1, 0.3)
+    probabilidad += np.where(tendencia > 0, np.minimum(tendencia * 0.1, 0.3), 0.0)
     
     # Incrementar si está sin stock
-    if sin_stock:
-        probabilidad += 0.3
+    probabilidad += np.where(sin_stock, 0.3, 0.0)
     
     # Reducir si está en oferta (ya se está moviendo)
-    if en_oferta:
-        probabilidad -= 0.1
+    probabilidad -= np.where(en_oferta, 0.1, 0.0)
     
     # Ajustar por volatilidad (alta volatilidad = más riesgo = más compra)
-    if volatilidad > 0.5:
-        probabilidad += 0.1
+    probabilidad += np.where(volatilidad > 0.5, 0.1, 0.0)
     
-    return max(0.0, min(1.0, probabilidad))
+    return np.clip(probabilidad, 0.0, 1.0)
 
 
-def _determinar_accion(producto: Productos, probabilidad: float, promedio: float, volatilidad: float):
-    """Determina la acción recomendada basada en análisis"""
-    if probabilidad >= COMPRA_THRESHOLD:
+def _determinar_accion(
+    producto: Productos,
+    probabilidad: float,
+    promedio: float,
+    volatilidad: float,
+    pronostico: Optional[float] = None,
+    limite_superior: Optional[float] = None,
+    config: Optional[ConfiguracionRecomendador] = None,
+):
+    """
+    Determina la acción recomendada basada en análisis.
+    Con pronóstico disponible, la cantidad a comprar cubre el pronóstico más
+    `factor_cobertura` veces el ancho del intervalo de predicción del próximo
+    mes (1.0 = límite superior) y la de mantener, el pronóstico.
+    """
+    config = config or ConfiguracionRecomendador()
+    if probabilidad >= config.umbral_compra:
         if promedio > 20:
-            cantidad = int(promedio * 1.5)
+            cantidad = int(promedio * config.multiplicador_alta)
             mensaje = "Compra recomendada - Alta demanda"
             motivo = f"Probabilidad: {probabilidad:.2%}, Promedio: {promedio:.1f}"
         else:
-            cantidad = int(promedio * 2.0) if promedio > 0 else 10
+            cantidad = int(promedio * config.multiplicador_preventivo) if promedio > 0 else 10
             mensaje = "Compra recomendada - Stock preventivo"
             motivo = f"Probabilidad: {probabilidad:.2%}, Demanda moderada"
         
+        if pronostico is not None and limite_superior:
+            cobertura = pronostico + config.factor_cobertura * (limite_superior - pronostico)
+            cantidad = math.ceil(round(cobertura, 6))  # Evita subir una unidad por redondeo
+            motivo += f", Pronóstico: {pronostico:.1f} (máx. {limite_superior:.1f})"
+        
         return "comprar", cantidad, mensaje, motivo
     
     elif probabilidad <= 0.2 and promedio < 5:
@@ -350,56 +895,98 @@ def _determinar_accion(producto: Productos, probabilidad: float, promedio: float
     
     else:
         cantidad = int(promedio) if promedio > 0 else 5
+        if pronostico:
+            cantidad = math.ceil(pronostico)
         mensaje = "Mantener stock actual"
         motivo = f"Probabilidad: {probabilidad:.2%}, Demanda estable"
         
         return "mantener", cantidad, mensaje, motivo
 
 
-def _estimar_stock_actual(producto: Productos) -> int:
-    """Estima stock actual basado en estado del producto"""
-    if producto.sin_stock:
-        return 0
-    
-    # Estimación basada en precio y disponibilidad
-    if producto.precio_referencia and producto.precio_referencia > 1000:
-        return random.randint(10, 50)  # Productos caros, menos stock
-    else:
-        return random.randint(20, 100)  # Productos baratos, más stock
+def determinar_acciones(
+    probabilidades: np.ndarray,
+    promedio: np.ndarray,
+    pronostico: Optional[np.ndarray] = None,
+    limite_superior: Optional[np.ndarray] = None,
+    config: Optional[ConfiguracionRecomendador] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Versión vectorizada de _determinar_accion (mismas reglas, sin mensajes).
+    Retorna (acciones, cantidades) por producto. Los multiplicadores solo
+    aplican sin pronóstico o con límite superior 0.
+    """
+    config = config or ConfiguracionRecomendador()
+    probabilidades = np.asarray(probabilidades, dtype=np.float64)
+    promedio = np.asarray(promedio, dtype=np.float64)
+
+    comprar = probabilidades >= config.umbral_compra
+    reducir = ~comprar & (probabilidades <= 0.2) & (promedio < 5)
+
+    compra = np.where(
+        promedio > 20,
+        np.trunc(promedio * config.multiplicador_alta),
+        np.where(promedio > 0, np.trunc(promedio * config.multiplicador_preventivo), 10),
+    )
+    mantener = np.where(promedio > 0, np.trunc(promedio), 5)
+    if pronostico is not None:
+        pronostico = np.asarray(pronostico, dtype=np.float64)
+        limite = np.asarray(limite_superior, dtype=np.float64) if limite_superior is not None \
+            else np.zeros_like(pronostico)
+        cobertura = pronostico + config.factor_cobertura * (limite - pronostico)
+        compra = np.where(limite != 0, np.ceil(np.round(cobertura, 6)), compra)
+        mantener = np.where(pronostico != 0, np.ceil(pronostico), mantener)
+
+    acciones = np.where(comprar, 'comprar', np.where(reducir, 'reducir', 'mantener'))
+    cantidades = np.where(comprar, compra, np.where(reducir, 0, mantener)).astype(np.int64)
+    return acciones, cantidades
 
 
 # Funciones de exportación (manteniendo compatibilidad con vistas originales)
+def _lineas_reporte_compras(filas: Iterable[PredictionRow]) -> Iterator[str]:
+    """Productos que requieren pedido según el plan de reposición (cantidad_pedido > 0)"""
+    yield ("ID,Producto,Marca,Cantidad Sugerida,Stock Actual,Stock Seguridad,Punto Reorden,"
+           "Lote Economico,Cantidad a Pedir,Precio Unitario,Total Estimado,Motivo\n")
+    for fila in filas:
+        if fila.cantidad_pedido <= 0:
+            continue
+        total = fila.cantidad_pedido * fila.precio_referencia
+        yield (f"{fila.id_producto},{fila.title},"
+               f"{fila.brand or 'N/A'},{fila.cantidad_sugerida},{fila.stock_estimado},"
+               f"{fila.stock_seguridad:.1f},{fila.punto_reorden:.1f},{fila.lote_economico:.1f},"
+               f"{fila.cantidad_pedido},{fila.precio_referencia},{total},{fila.motivo}\n")
+
+
+def _lineas_reporte_stock(filas: Iterable[PredictionRow]) -> Iterator[str]:
+    yield "ID,Producto,Stock Estimado,Accion,Probabilidad,Tendencia\n"
+    for fila in filas:
+        yield (f"{fila.id_producto},{fila.title},"
+               f"{fila.stock_estimado},{fila.accion},{fila.probabilidad:.2%},"
+               f"{fila.tendencia:.3f}\n")
+
+
 def exportar_reporte_compras_csv():
     """Exporta reporte de compras recomendadas en formato CSV"""
-    import io
-    
-    predicciones = generar_predicciones()
-    compras = [item for item in predicciones.items if item.accion == 'comprar']
+    from .snapshot import obtener_predicciones
     
-    output = io.StringIO()
-    output.write("ID,Producto,Marca,Cantidad Sugerida,Precio Unitario,Total Estimado,Motivo\n")
-    
-    for item in compras:
-        total = item.cantidad_sugerida * item.precio_referencia
-        output.write(f"{item.producto.id_producto},{item.producto.title},"
-                    f"{item.producto.brand or 'N/A'},{item.cantidad_sugerida},"
-                    f"{item.precio_referencia},{total},{item.motivo}\n")
-    
-    return output.getvalue()
+    predicciones = obtener_predicciones()
+    filas = (PredictionRow.desde_item(item) for item in predicciones.items)
+    return ''.join(_lineas_reporte_compras(filas))
 
 
 def exportar_reporte_stock_csv():
     """Exporta resumen de stock en formato CSV"""
-    import io
-    
-    predicciones = generar_predicciones()
-    
-    output = io.StringIO()
-    output.write("ID,Producto,Stock Estimado,Accion,Probabilidad,Tendencia\n")
-    
-    for item in predicciones.items:
-        output.write(f"{item.producto.id_producto},{item.producto.title},"
-                    f"{item.stock_estimado},{item.accion},{item.probabilidad:.2%},"
-                    f"{item.tendencia:.3f}\n")
+    from .snapshot import obtener_predicciones
     
-    return output.getvalue()
\ No newline at end of file
+    predicciones = obtener_predicciones()
+    filas = (PredictionRow.desde_item(item) for item in predicciones.items)
+    return ''.join(_lineas_reporte_stock(filas))
+
+
+def iter_reporte_compras_csv(chunk_size: int = 1000) -> Iterator[str]:
+    """Reporte de compras línea a línea, calculado en streaming (memoria acotada)"""
+    return _lineas_reporte_compras(iter_predicciones(chunk_size=chunk_size))
+
+
+def iter_reporte_stock_csv(chunk_size: int = 1000) -> Iterator[str]:
+    """Resumen de stock línea a línea, calculado en streaming (memoria acotada)"""
+    return _lineas_reporte_stock(iter_predicciones(chunk_size=chunk_size))
@@ -0,0 +1,134 @@
+"""
+Motor de reposición SmartERP: stock de seguridad, punto de reorden y lote
+económico (EOQ) de todos los SKUs en una pasada vectorizada.
+
+Con demanda mensual de media μ y varianza σ² (12 meses), lead time L días
+(con desviación σL) y nivel de servicio α:
+  - demanda diaria: μd = μ / 30, σd² = σ² / 30 (días independientes)
+  - stock de seguridad: SS = z(α) · sqrt(L · σd² + μd² · σL²)
+  - punto de reorden: ROP = μd · L + SS
+  - lote económico: EOQ = sqrt(2 · D · K / (h · precio)), D = 12 · μ
+Se pide cuando el stock actual no supera el ROP; la cantidad es el mayor
+entre el EOQ y lo necesario para volver sobre el punto de reorden.
+"""
+import json
+from dataclasses import dataclass, field
+from statistics import NormalDist
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from django.conf import settings
+
+
+DIAS_MES = 30.0
+
+
+@dataclass(frozen=True)
+class ParametrosReposicion:
+    """Lead times y costos de la política de reposición (ver settings REPOSICION_*)"""
+    lead_time_dias: float = 7.0
+    desviacion_lead_time_dias: float = 0.0
+    nivel_servicio: float = 0.95
+    costo_pedido: float = 25000.0          # Costo fijo por orden de compra (CLP)
+    tasa_mantencion_anual: float = 0.25    # Costo anual de mantener 1 unidad / precio
+    lead_time_categorias: Dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def desde_settings(cls) -> 'ParametrosReposicion':
+        por_categoria = getattr(settings, 'REPOSICION_LEAD_TIME_CATEGORIAS', None) or {}
+        if isinstance(por_categoria, str):
+            por_categoria = json.loads(por_categoria)
+        return cls(
+            lead_time_dias=float(getattr(settings, 'REPOSICION_LEAD_TIME_DIAS', cls.lead_time_dias)),
+            desviacion_lead_time_dias=float(
+                getattr(settings, 'REPOSICION_DESVIACION_LEAD_TIME_DIAS', cls.desviacion_lead_time_dias)
+            ),
+            nivel_servicio=float(getattr(settings, 'REPOSICION_NIVEL_SERVICIO', cls.nivel_servicio)),
+            costo_pedido=float(getattr(settings, 'REPOSICION_COSTO_PEDIDO', cls.costo_pedido)),
+            tasa_mantencion_anual=float(
+                getattr(settings, 'REPOSICION_TASA_MANTENCION', cls.tasa_mantencion_anual)
+            ),
+            lead_time_categorias={str(k): float(v) for k, v in por_categoria.items()},
+        )
+
+    @property
+    def factor_servicio(self) -> float:
+        """z del nivel de servicio (cuantil de la normal estándar)"""
+        return NormalDist().inv_cdf(min(max(self.nivel_servicio, 0.5), 0.9999))
+
+
+@dataclass
+class PlanReposicion:
+    """Resultado por SKU (arreglos alineados con la entrada)"""
+    lead_time_dias: np.ndarray
+    stock_seguridad: np.ndarray
+    punto_reorden: np.ndarray
+    lote_economico: np.ndarray
+    cantidad_pedido: np.ndarray
+    requiere_pedido: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.punto_reorden)
+
+
+def lead_times(categorias: Optional[Sequence], parametros: ParametrosReposicion) -> np.ndarray:
+    """Lead time por SKU: el de su categoría si está configurado, si no el general"""
+    n = len(categorias) if categorias is not None else 0
+    if not parametros.lead_time_categorias or categorias is None:
+        return np.full(n, parametros.lead_time_dias)
+    nombres, codigos = np.unique(np.asarray(categorias, dtype=object).astype(str), return_inverse=True)
+    por_grupo = np.array([
+        parametros.lead_time_categorias.get(nombre, parametros.lead_time_dias) for nombre in nombres
+    ])
+    return por_grupo[codigos.ravel()]
+
+
+def calcular_reposicion(
+    promedio: np.ndarray,
+    varianza: np.ndarray,
+    precios: np.ndarray,
+    stock: np.ndarray,
+    lead_time_dias: Optional[np.ndarray] = None,
+    parametros: Optional[ParametrosReposicion] = None,
+) -> PlanReposicion:
+    """Calcula SS, ROP, EOQ y cantidad a pedir de todos los SKUs a la vez"""
+    parametros = parametros or ParametrosReposicion.desde_settings()
+    promedio = np.maximum(np.asarray(promedio, dtype=np.float64), 0.0)
+    varianza = np.maximum(np.asarray(varianza, dtype=np.float64), 0.0)
+    precios = np.asarray(precios, dtype=np.float64)
+    stock = np.asarray(stock, dtype=np.float64)
+    if lead_time_dias is None:
+        lead_time_dias = np.full(len(promedio), parametros.lead_time_dias)
+    lead_time_dias = np.asarray(lead_time_dias, dtype=np.float64)
+
+    demanda_diaria = promedio / DIAS_MES
+    varianza_diaria = varianza / DIAS_MES
+    stock_seguridad = parametros.factor_servicio * np.sqrt(
+        lead_time_dias * varianza_diaria
+        + demanda_diaria ** 2 * parametros.desviacion_lead_time_dias ** 2
+    )
+    punto_reorden = demanda_diaria * lead_time_dias + stock_seguridad
+
+    # EOQ; sin precio no hay costo de mantención y se cubre un mes de demanda
+    mantencion = parametros.tasa_mantencion_anual * precios
+    lote_economico = np.where(
+        mantencion > 0,
+        np.sqrt(2.0 * 12.0 * promedio * parametros.costo_pedido / np.where(mantencion > 0, mantencion, 1.0)),
+        promedio,
+    )
+
+    requiere_pedido = (promedio > 0) & (stock <= punto_reorden)
+    faltante = np.ceil(np.round(punto_reorden - stock, 6))
+    cantidad_pedido = np.where(
+        requiere_pedido, np.maximum(np.ceil(np.round(lote_economico, 6)), faltante), 0.0
+    ).astype(np.int64)
+
+    return PlanReposicion(
+        lead_time_dias=lead_time_dias,
+        stock_seguridad=stock_seguridad,
+        punto_reorden=punto_reorden,
+        lote_economico=lote_economico,
+        cantidad_pedido=cantidad_pedido,
+        requiere_pedido=requiere_pedido,
+    )
@@ -0,0 +1,267 @@
+"""
+Resumen materializado del dashboard SmartERP (tabla ResumenDashboard).
+`refrescar_resumen` recalcula los conteos y precios del catálogo (global, por
+categoría y por marca) y, en la fila global, los totales de ventas. Se
+ejecuta al final de la carga StgProductosRaw → Productos y de cada ingesta
+masiva de ventas (`manage.py refrescar_resumen_dashboard`).
+
+El stock de cada producto es su saldo en SaldosStock si tiene fila y, si no,
+el flag sin_stock de Productos (CON_STOCK / SIN_STOCK).
+
+Entre refrescos, las ventas y los productos del ORM y los movimientos de
+stock suman sus deltas a las filas con UPDATE ... SET x = x + delta,
+version = version + 1. Los precios (promedio, mínimo, máximo) solo se
+recalculan en el refresco.
+El refresco agrega sin bloqueos y escribe la fila global solo si `version` no
+cambió (si no, reintenta): mantener la fila bloqueada mientras se recorre
+Ventas podría interbloquearse con una venta en curso en SQL Server.
+"""
+from collections import Counter, defaultdict
+from decimal import Decimal
+from typing import Iterable, List, Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Avg, Count, DecimalField, ExpressionWrapper, F, Max, Min, Q, Sum
+from django.utils import timezone
+
+from catalog.models.products import Productos  # Import cross-app
+from sales.models.sales import Ventas  # Import cross-app
+from inventory.models.dashboard import ResumenDashboard
+from inventory.models.movements import SaldoStock
+from .versiones import PRODUCTOS, SALDOS_STOCK, VENTAS, incrementar_version_al_confirmar
+
+
+# Stock efectivo por producto (LEFT JOIN a SaldosStock desde Productos)
+CON_STOCK = Q(saldo_stock__cantidad__gt=0) | Q(saldo_stock__isnull=True, sin_stock=False)
+SIN_STOCK = Q(saldo_stock__cantidad__lte=0) | Q(saldo_stock__isnull=True, sin_stock=True)
+
+MEDIDAS_CATALOGO = {
+    'productos': Count('id_producto'),
+    'productos_oferta': Count('id_producto', filter=Q(oferta=True)),
+    'productos_con_stock': Count('id_producto', filter=CON_STOCK),
+    'productos_sin_stock': Count('id_producto', filter=SIN_STOCK),
+    'precio_promedio': Avg('normal_price'),
+    'precio_min': Min('normal_price'),
+    'precio_max': Max('normal_price'),
+}
+
+MAX_INTENTOS = 3
+
+DIMENSIONES = (
+    (ResumenDashboard.CATEGORIA, 'categoria1'),
+    (ResumenDashboard.MARCA, 'brand'),
+)
+
+
+def ingreso_venta(venta: Ventas) -> Decimal:
+    """
+    Cantidad × precio unitario (definición de la columna calculada
+    total_venta, que en la instancia recién guardada o editada no está al día)
+    """
+    return Decimal(venta.cantidad_vendida or 0) * Decimal(venta.precio_unitario or 0)
+
+
+def _medidas(fila: dict) -> dict:
+    medidas = {clave: fila[clave] for clave in MEDIDAS_CATALOGO}
+    if medidas['precio_promedio'] is not None:
+        medidas['precio_promedio'] = float(medidas['precio_promedio'])
+    return medidas
+
+
+def _filas_dimension(dimension: str, campo: str, ahora) -> List[ResumenDashboard]:
+    filas = (
+        Productos.objects.filter(**{f'{campo}__isnull': False})
+        .values(campo).annotate(**MEDIDAS_CATALOGO).order_by()
+    )
+    return [
+        ResumenDashboard(dimension=dimension, valor=fila[campo], actualizado=ahora, **_medidas(fila))
+        for fila in filas
+    ]
+
+
+def _totales_ventas() -> dict:
+    ingreso = ExpressionWrapper(
+        F('cantidad_vendida') * F('precio_unitario'),
+        output_field=DecimalField(max_digits=23, decimal_places=2),
+    )
+    totales = Ventas.objects.aggregate(
+        ventas=Count('id_venta'),
+        unidades_vendidas=Sum('cantidad_vendida'),
+        ingresos=Sum(ingreso),
+    )
+    return {
+        'ventas': totales['ventas'],
+        'unidades_vendidas': totales['unidades_vendidas'] or 0,
+        'ingresos': totales['ingresos'] or 0,
+    }
+
+
+def _campos_globales(ventas: bool) -> dict:
+    catalogo = Productos.objects.aggregate(
+        categorias=Count('categoria1', distinct=True),
+        marcas=Count('brand', distinct=True),
+        **MEDIDAS_CATALOGO,
+    )
+    return {
+        **_medidas(catalogo),
+        'categorias': catalogo['categorias'],
+        'marcas': catalogo['marcas'],
+        **(_totales_ventas() if ventas else {}),
+    }
+
+
+def _escribir_global(campos: dict, version: Optional[int], ahora) -> bool:
+    """Escribe la fila global si nadie sumó un delta desde que se leyó `version`"""
+    if version is None:
+        try:
+            with transaction.atomic():
+                ResumenDashboard.objects.create(
+                    dimension=ResumenDashboard.GLOBAL, valor='', version=0, actualizado=ahora, **campos
+                )
+            return True
+        except IntegrityError:
+            return False
+    return bool(
+        ResumenDashboard.objects.filter(dimension=ResumenDashboard.GLOBAL, version=version)
+        .update(version=F('version') + 1, actualizado=ahora, **campos)
+    )
+
+
+def refrescar_resumen(ventas: bool = True) -> int:
+    """
+    Recalcula el resumen y retorna las filas escritas. Con `ventas=False`
+    conserva los totales de ventas de la fila global (mantenidos por deltas),
+    salvo que la fila aún no exista.
+    """
+    ahora = timezone.now()
+    for _ in range(MAX_INTENTOS):
+        version = (
+            ResumenDashboard.objects.filter(dimension=ResumenDashboard.GLOBAL)
+            .values_list('version', flat=True).first()
+        )
+        campos = _campos_globales(ventas or version is None)
+        if _escribir_global(campos, version, ahora):
+            break
+    else:
+        print("[SmartERP] Advertencia: fila global del resumen con escrituras concurrentes; se omite")
+
+    dimensiones = [
+        fila for dimension, campo in DIMENSIONES for fila in _filas_dimension(dimension, campo, ahora)
+    ]
+    with transaction.atomic():
+        ResumenDashboard.objects.exclude(dimension=ResumenDashboard.GLOBAL).delete()
+        ResumenDashboard.objects.bulk_create(dimensiones, batch_size=500)
+        incrementar_version_al_confirmar(PRODUCTOS, VENTAS, SALDOS_STOCK)
+    return len(dimensiones) + 1
+
+
+def _sumar_global(**deltas) -> None:
+    cambios = {campo: F(campo) + delta for campo, delta in deltas.items() if delta}
+    if cambios:
+        ResumenDashboard.objects.filter(dimension=ResumenDashboard.GLOBAL).update(
+            version=F('version') + 1, **cambios
+        )
+
+
+def acumular_ventas(ventas: int, unidades: int, ingresos: Decimal) -> None:
+    """Suma el delta de una venta creada, editada o eliminada a la fila global"""
+    _sumar_global(ventas=ventas, unidades_vendidas=unidades, ingresos=ingresos)
+
+
+def acumular_catalogo(deltas: Iterable[Tuple[Optional[str], Optional[str], dict]]) -> None:
+    """
+    Suma deltas de conteo (categoria1, brand, {campo: delta}) de productos
+    a la fila global y a las de su categoría y marca, en orden fijo de filas
+    """
+    por_fila = defaultdict(Counter)
+    for categoria, marca, campos in deltas:
+        for dimension, valor in (
+            (ResumenDashboard.GLOBAL, ''),
+            (ResumenDashboard.CATEGORIA, categoria),
+            (ResumenDashboard.MARCA, marca),
+        ):
+            if valor is not None:
+                por_fila[(dimension, valor)].update(campos)
+    for (dimension, valor), campos in sorted(por_fila.items()):
+        cambios = {campo: F(campo) + delta for campo, delta in campos.items() if delta}
+        if cambios:
+            ResumenDashboard.objects.filter(dimension=dimension, valor=valor).update(
+                version=F('version') + 1, **cambios
+            )
+
+
+def estado_catalogo(producto: Productos) -> Tuple[Optional[str], Optional[str], dict]:
+    """(categoria1, brand, conteos) con los que `producto` aporta al resumen"""
+    saldo = (
+        SaldoStock.objects.filter(id_producto=producto.pk).values_list('cantidad', flat=True).first()
+    )
+    if saldo is not None:
+        con_stock, sin_stock = saldo > 0, saldo <= 0
+    else:
+        con_stock, sin_stock = producto.sin_stock is False, producto.sin_stock is True
+    return producto.categoria1, producto.brand, {
+        'productos': 1,
+        'productos_oferta': int(producto.oferta is True),
+        'productos_con_stock': int(con_stock),
+        'productos_sin_stock': int(sin_stock),
+    }
+
+
+def _abrir_fila(dimension: str, valor: str, conteos: dict, campo_global: str) -> None:
+    """Crea la fila de una categoría o marca nueva y la cuenta en la fila global"""
+    try:
+        with transaction.atomic():
+            ResumenDashboard.objects.create(
+                dimension=dimension, valor=valor, actualizado=timezone.now(), **conteos
+            )
+    except IntegrityError:
+        # Otra transacción la creó a la vez: se suma como delta
+        ResumenDashboard.objects.filter(dimension=dimension, valor=valor).update(
+            version=F('version') + 1, **{campo: F(campo) + delta for campo, delta in conteos.items()}
+        )
+        return
+    _sumar_global(**{campo_global: 1})
+
+
+def acumular_producto(anterior: Optional[tuple], actual: Optional[tuple]) -> None:
+    """
+    Aplica al resumen el alta, edición o baja de un producto del ORM: resta
+    su estado anterior y suma el actual (ambos de estado_catalogo, None en
+    altas y bajas). Crea las filas de categorías y marcas nuevas y elimina
+    las que quedan sin productos. Sin fila global no hay resumen que mantener.
+    """
+    if not ResumenDashboard.objects.filter(dimension=ResumenDashboard.GLOBAL).exists():
+        return
+    deltas = []
+    if anterior is not None:
+        categoria, marca, conteos = anterior
+        deltas.append((categoria, marca, {campo: -valor for campo, valor in conteos.items()}))
+    if actual is not None:
+        deltas.append(actual)
+    acumular_catalogo(deltas)
+
+    for posicion, ((dimension, _), campo_global) in enumerate(zip(DIMENSIONES, ('categorias', 'marcas'))):
+        nuevo = actual[posicion] if actual is not None else None
+        previo = anterior[posicion] if anterior is not None else None
+        if nuevo is not None and nuevo != previo and not (
+            ResumenDashboard.objects.filter(dimension=dimension, valor=nuevo).exists()
+        ):
+            _abrir_fila(dimension, nuevo, actual[2], campo_global)
+        if previo is not None and previo != nuevo:
+            eliminadas, _ = ResumenDashboard.objects.filter(
+                dimension=dimension, valor=previo, productos__lte=0
+            ).delete()
+            if eliminadas:
+                _sumar_global(**{campo_global: -1})
+
+
+def resumen_global() -> Optional[ResumenDashboard]:
+    """Fila global del resumen (None si aún no se ha refrescado)"""
+    return ResumenDashboard.objects.filter(dimension=ResumenDashboard.GLOBAL).first()
+
+
+def top_dimension(dimension: str, limite: int) -> List[ResumenDashboard]:
+    """Categorías o marcas con más productos"""
+    return list(
+        ResumenDashboard.objects.filter(dimension=dimension).order_by('-productos', 'valor')[:limite]
+    )
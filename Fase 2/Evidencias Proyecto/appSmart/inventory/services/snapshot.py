@@ -0,0 +1,184 @@
+"""
+Snapshot de predicciones SmartERP.
+`manage.py refrescar_predicciones` (cron / tarea programada) calcula el
+PredictionPayload y lo persiste en PREDICCIONES_DIR junto con su versión
+columnar, su resumen y la jerarquía reconciliada, un archivo por entrada
+(reemplazado atómicamente con os.replace): leer el resumen no deserializa
+el catálogo. Dashboard, página de predicciones y exportaciones CSV
+sirven siempre el último snapshot persistido: el cache de Django (locmem,
+archivo o Redis según CACHES) solo evita releer el archivo durante
+PREDICCIONES_CACHE_TTL segundos, y un request nunca ejecuta el modelo.
+"""
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .columnar import PredictionColumns
+from .feature_store import resumen_feature_store
+from .hierarchy import PronosticoJerarquico, reconciliar_jerarquia
+from .predictions import PredictionPayload, generar_predicciones
+
+
+SNAPSHOT_KEY = 'inventory:predicciones:snapshot'
+COLUMNAS_KEY = 'inventory:predicciones:columnas'
+RESUMEN_KEY = 'inventory:predicciones:resumen'
+JERARQUIA_KEY = 'inventory:predicciones:jerarquia'
+CLAVES = (SNAPSHOT_KEY, COLUMNAS_KEY, RESUMEN_KEY, JERARQUIA_KEY)
+
+ARCHIVOS = {
+    SNAPSHOT_KEY: 'snapshot.pkl',
+    COLUMNAS_KEY: 'columnas.pkl',
+    RESUMEN_KEY: 'resumen.pkl',
+    JERARQUIA_KEY: 'jerarquia.pkl',
+}
+
+
+class SnapshotNoDisponible(RuntimeError):
+    """Aún no se ha generado ningún snapshot de predicciones"""
+
+    def __init__(self):
+        super().__init__(
+            'No hay snapshot de predicciones; ejecutar manage.py refrescar_predicciones'
+        )
+
+
+def _cache():
+    return caches[getattr(settings, 'PREDICCIONES_CACHE_ALIAS', 'default')]
+
+
+def _ttl() -> int:
+    return getattr(settings, 'PREDICCIONES_CACHE_TTL', 900)
+
+
+def directorio_predicciones() -> Path:
+    return Path(getattr(settings, 'PREDICCIONES_DIR', Path(settings.BASE_DIR) / 'predicciones'))
+
+
+def _resumen(payload: PredictionPayload) -> dict:
+    return {
+        'total_productos': len(payload.items),
+        'sugerencias': payload.sugerencias,
+        'sobrestock': payload.sobrestock,
+        'fecha_generacion': payload.fecha_generacion,
+    }
+
+
+def _escribir_archivo(clave: str, valor) -> None:
+    directorio = directorio_predicciones()
+    directorio.mkdir(parents=True, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=directorio, suffix='.pkl.tmp')
+    with os.fdopen(fd, 'wb') as archivo:
+        pickle.dump(valor, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporal, directorio / ARCHIVOS[clave])
+
+
+def _leer_archivo(clave: str):
+    """Última versión persistida de una entrada (None si no existe o no se puede leer)"""
+    try:
+        with open(directorio_predicciones() / ARCHIVOS[clave], 'rb') as archivo:
+            return pickle.load(archivo)
+    except FileNotFoundError:
+        return None
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+        print(f"[SmartERP] Advertencia leyendo snapshot de predicciones: {e}")
+        return None
+
+
+def _leer(clave: str, requerido: bool = True):
+    """Entrada del snapshot desde el cache o, si no está, desde su archivo (solo esa)"""
+    valor = _cache().get(clave)
+    if valor is not None:
+        return valor
+    valor = _leer_archivo(clave)
+    if valor is None:
+        if requerido:
+            raise SnapshotNoDisponible()
+        return None
+    _cache().set(clave, valor, _ttl())
+    return valor
+
+
+def guardar_predicciones(payload: PredictionPayload) -> PredictionPayload:
+    """
+    Persiste el snapshot completo, su versión columnar, su resumen liviano y
+    la agregación reconciliada por categoría/marca (archivo y cache).
+    """
+    columnas = PredictionColumns.desde_payload(payload)
+    contenido = {
+        SNAPSHOT_KEY: payload,
+        COLUMNAS_KEY: columnas,
+        RESUMEN_KEY: _resumen(payload),
+        JERARQUIA_KEY: reconciliar_jerarquia(columnas),
+    }
+    # El resumen al final: quien lo ve nuevo encuentra el resto ya escrito
+    for clave in (SNAPSHOT_KEY, COLUMNAS_KEY, JERARQUIA_KEY, RESUMEN_KEY):
+        _escribir_archivo(clave, contenido[clave])
+    _cache().set_many(contenido, _ttl())
+    return payload
+
+
+def refrescar_predicciones(incremental: bool = False) -> PredictionPayload:
+    """
+    Recalcula el modelo y reemplaza el snapshot (cron, comandos).
+    Con `incremental=True` parte del snapshot persistido y solo recalcula los
+    productos modificados desde su marca de agua.
+    """
+    previo = _leer(SNAPSHOT_KEY, requerido=False) if incremental else None
+    return guardar_predicciones(generar_predicciones(previo=previo))
+
+
+def obtener_predicciones(forzar: bool = False) -> PredictionPayload:
+    """
+    Retorna el último snapshot persistido; solo recalcula si se fuerza.
+    Sin snapshot lanza SnapshotNoDisponible.
+    """
+    if forzar:
+        return refrescar_predicciones()
+    return _leer(SNAPSHOT_KEY)
+
+
+def obtener_columnas(forzar: bool = False) -> PredictionColumns:
+    """Snapshot en formato columnar (arreglos NumPy por métrica)"""
+    if forzar:
+        return PredictionColumns.desde_payload(refrescar_predicciones())
+    return _leer(COLUMNAS_KEY)
+
+
+def obtener_jerarquia(forzar: bool = False) -> PronosticoJerarquico:
+    """Pronósticos agregados y reconciliados por categoría, subcategoría y marca"""
+    if forzar:
+        return reconciliar_jerarquia(obtener_columnas(forzar=True))
+    return _leer(JERARQUIA_KEY)
+
+
+def guardar_resumen_feature_store() -> Optional[dict]:
+    """
+    Persiste como resumen los contadores puntuados desde el feature store (un
+    scan, sin historial). Sirve al dashboard antes del primer snapshot
+    completo; no reemplaza el resumen de un snapshot existente.
+    """
+    if _leer_archivo(RESUMEN_KEY) is not None:
+        return None
+    resumen = resumen_feature_store()
+    if resumen is not None:
+        _escribir_archivo(RESUMEN_KEY, resumen)
+        _cache().set(RESUMEN_KEY, resumen, _ttl())
+    return resumen
+
+
+def obtener_resumen_predicciones() -> dict:
+    """
+    Contadores persistidos (sugerencias, sobrestock) sin deserializar los
+    items. Sin resumen lanza SnapshotNoDisponible; nunca puntúa en el request.
+    """
+    return _leer(RESUMEN_KEY)
+
+
+def invalidar_predicciones() -> None:
+    """Descarta el snapshot del cache; la próxima lectura relee el archivo"""
+    _cache().delete_many(list(CLAVES))
@@ -0,0 +1,354 @@
+"""
+Stock basado en libro de movimientos SmartERP.
+Cada recepción, venta o ajuste se inserta en MovimientosStock y actualiza el
+saldo del producto en SaldosStock dentro de la misma transacción (con la
+fila de saldo bloqueada). El stock actual es una lectura por clave. El saldo
+se abre con la primera recepción o ajuste; hasta entonces el producto se
+rige por el flag sin_stock y sus ventas no se registran en el libro.
+
+El stock a una fecha pasada se resuelve con los cierres diarios de
+CierresStock: saldo del último cierre anterior más el delta de movimientos
+posteriores, sin recorrer el libro desde el inicio.
+"""
+import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.utils import timezone
+
+from catalog.models.products import Productos  # Import cross-app
+from inventory.models.movements import CierreStock, MovimientoStock, SaldoStock
+from .history import MAX_IDS_FILTRO
+from .resumen import acumular_catalogo
+from .versiones import SALDOS_STOCK, incrementar_version_al_confirmar
+
+
+# (id_producto, tipo, cantidad con signo, id_venta, referencia)
+Movimiento = Tuple[int, str, int, Optional[int], Optional[str]]
+
+
+def _bloquear_saldos(ids: List[int]) -> Dict[int, SaldoStock]:
+    saldos: Dict[int, SaldoStock] = {}
+    for inicio in range(0, len(ids), MAX_IDS_FILTRO):
+        lote = ids[inicio:inicio + MAX_IDS_FILTRO]
+        for saldo in (
+            SaldoStock.objects.select_for_update()
+            .filter(id_producto__in=lote).order_by('id_producto')
+        ):
+            saldos[saldo.id_producto_id] = saldo
+    return saldos
+
+
+def _abrir_saldos(ids: List[int], fecha) -> Tuple[Dict[int, SaldoStock], Set[int]]:
+    """
+    Crea en 0 los saldos de productos que aún no tienen fila. Si otra
+    transacción abrió alguno a la vez (clave duplicada), se crean uno a uno y
+    los ya existentes se bloquean y se leen. Retorna los saldos y los ids
+    creados por esta transacción.
+    """
+    nuevos = [
+        SaldoStock(id_producto_id=id_producto, cantidad=0, id_ultimo_movimiento=0, actualizado=fecha)
+        for id_producto in ids
+    ]
+    try:
+        with transaction.atomic():
+            SaldoStock.objects.bulk_create(nuevos)
+        return {saldo.id_producto_id: saldo for saldo in nuevos}, set(ids)
+    except IntegrityError:
+        pass
+
+    creados: Set[int] = set()
+    for saldo in nuevos:
+        try:
+            with transaction.atomic():
+                saldo.save(force_insert=True)
+            creados.add(saldo.id_producto_id)
+        except IntegrityError:
+            pass
+    saldos = {saldo.id_producto_id: saldo for saldo in nuevos if saldo.id_producto_id in creados}
+    saldos.update(_bloquear_saldos([id_producto for id_producto in ids if id_producto not in creados]))
+    return saldos, creados
+
+
+def _ventas_en_libro(movimientos: Sequence[Movimiento]) -> Set[Tuple[int, int]]:
+    """(id_producto, id_venta) de las devoluciones cuya venta descontó stock"""
+    devoluciones = sorted({(m[0], m[3]) for m in movimientos if m[3] is not None and m[2] > 0})
+    registradas: Set[Tuple[int, int]] = set()
+    paso = MAX_IDS_FILTRO // 2
+    for inicio in range(0, len(devoluciones), paso):
+        lote = devoluciones[inicio:inicio + paso]
+        registradas.update(
+            MovimientoStock.objects.filter(
+                id_producto__in={par[0] for par in lote}, id_venta__in={par[1] for par in lote}
+            ).values_list('id_producto', 'id_venta')
+        )
+    return registradas.intersection(devoluciones)
+
+
+def _aplicables(movimientos: Sequence[Movimiento], saldos: Dict[int, SaldoStock]) -> List[Movimiento]:
+    """
+    Los movimientos de una venta solo se aplican a productos con saldo abierto
+    (el saldo se abre con una recepción o un ajuste, p. ej. el inventario
+    inicial): una venta sin apertura dejaría el saldo en -cantidad. Las
+    devoluciones (edición o eliminación) exigen además que la venta esté en
+    el libro.
+    """
+    en_libro = _ventas_en_libro([m for m in movimientos if m[0] in saldos])
+    return [
+        m for m in movimientos
+        if m[3] is None or (m[0] in saldos and (m[2] <= 0 or (m[0], m[3]) in en_libro))
+    ]
+
+
+def _deltas_stock(
+    saldos: Dict[int, SaldoStock], previos: Dict[int, int], creados: Set[int]
+) -> List[Tuple[Optional[str], Optional[str], dict]]:
+    """
+    Productos que cambiaron de con/sin stock. Antes de abrir su saldo un
+    producto contaba según el flag sin_stock; después, según el saldo.
+    """
+    candidatos = sorted(
+        id_producto for id_producto, saldo in saldos.items()
+        if id_producto in creados or (previos[id_producto] > 0) != (saldo.cantidad > 0)
+    )
+    deltas = []
+    for inicio in range(0, len(candidatos), MAX_IDS_FILTRO):
+        for id_producto, categoria, marca, sin_stock in (
+            Productos.objects.filter(id_producto__in=candidatos[inicio:inicio + MAX_IDS_FILTRO])
+            .values_list('id_producto', 'categoria1', 'brand', 'sin_stock')
+        ):
+            # Con el flag en NULL el producto no contaba en ninguno de los dos
+            if id_producto in creados:
+                antes = None if sin_stock is None else not sin_stock
+            else:
+                antes = previos[id_producto] > 0
+            despues = saldos[id_producto].cantidad > 0
+            if antes != despues:
+                deltas.append((categoria, marca, {
+                    'productos_con_stock': int(despues) - int(antes is True),
+                    'productos_sin_stock': int(not despues) - int(antes is False),
+                }))
+    return deltas
+
+
+def registrar_movimientos(movimientos: Sequence[Movimiento], fecha=None) -> List[MovimientoStock]:
+    """
+    Inserta un lote de movimientos y actualiza los saldos afectados en una
+    sola transacción. Los saldos se bloquean en orden de id_producto para
+    evitar interbloqueos entre ingestas concurrentes. Retorna los movimientos
+    registrados (las ventas sin saldo abierto se omiten, ver _aplicables).
+    """
+    if not movimientos:
+        return []
+    fecha = fecha or timezone.now()
+
+    with transaction.atomic():
+        saldos = _bloquear_saldos(sorted({m[0] for m in movimientos}))
+        movimientos = _aplicables(movimientos, saldos)
+        if not movimientos:
+            return []
+        ids = sorted({m[0] for m in movimientos})
+        creados: Set[int] = set()
+        faltantes = [id_producto for id_producto in ids if id_producto not in saldos]
+        if faltantes:
+            abiertos, creados = _abrir_saldos(faltantes, fecha)
+            saldos.update(abiertos)
+        saldos = {id_producto: saldos[id_producto] for id_producto in ids}
+        previos = {id_producto: saldo.cantidad for id_producto, saldo in saldos.items()}
+
+        registros = []
+        for id_producto, tipo, cantidad, id_venta, referencia in movimientos:
+            saldo = saldos[id_producto]
+            saldo.cantidad += cantidad
+            registros.append(MovimientoStock(
+                id_producto_id=id_producto,
+                tipo=tipo,
+                cantidad=cantidad,
+                saldo_resultante=saldo.cantidad,
+                fecha=fecha,
+                id_venta=id_venta,
+                referencia=referencia,
+            ))
+        MovimientoStock.objects.bulk_create(registros, batch_size=500)
+
+        # bulk_create no retorna ids en todos los motores: se leen por producto
+        ultimos = _ultimos_movimientos(ids)
+        for saldo in saldos.values():
+            saldo.id_ultimo_movimiento = ultimos.get(saldo.id_producto_id, saldo.id_ultimo_movimiento)
+            saldo.actualizado = fecha
+        SaldoStock.objects.bulk_update(
+            list(saldos.values()), ['cantidad', 'id_ultimo_movimiento', 'actualizado'], batch_size=500
+        )
+        # Contadores con/sin stock del resumen (global, categoría y marca)
+        acumular_catalogo(_deltas_stock(saldos, previos, creados))
+        incrementar_version_al_confirmar(SALDOS_STOCK)
+    return registros
+
+
+def _ultimos_movimientos(ids: List[int]) -> Dict[int, int]:
+    ultimos: Dict[int, int] = {}
+    for inicio in range(0, len(ids), MAX_IDS_FILTRO):
+        ultimos.update(
+            MovimientoStock.objects.filter(id_producto__in=ids[inicio:inicio + MAX_IDS_FILTRO])
+            .values('id_producto').annotate(ultimo=Max('id_movimiento'))
+            .values_list('id_producto', 'ultimo')
+        )
+    return ultimos
+
+
+def registrar_movimiento(
+    id_producto: int,
+    tipo: str,
+    cantidad: int,
+    id_venta: Optional[int] = None,
+    referencia: Optional[str] = None,
+) -> MovimientoStock:
+    return registrar_movimientos([(id_producto, tipo, cantidad, id_venta, referencia)])[0]
+
+
+def registrar_recepcion(id_producto: int, cantidad: int, referencia: Optional[str] = None) -> MovimientoStock:
+    return registrar_movimiento(id_producto, MovimientoStock.RECEPCION, abs(cantidad), referencia=referencia)
+
+
+def registrar_ajuste(id_producto: int, cantidad: int, referencia: Optional[str] = None) -> MovimientoStock:
+    return registrar_movimiento(id_producto, MovimientoStock.AJUSTE, cantidad, referencia=referencia)
+
+
+def stock_actual(id_producto: int) -> int:
+    """Saldo vigente del producto (0 si no tiene movimientos)"""
+    saldo = SaldoStock.objects.filter(id_producto=id_producto).values_list('cantidad', flat=True).first()
+    return saldo or 0
+
+
+def stock_actual_lote(producto_ids: Iterable[int]) -> Dict[int, int]:
+    """Saldos de varios productos (los que no tienen movimientos no aparecen)"""
+    ids = sorted(set(producto_ids))
+    saldos: Dict[int, int] = {}
+    for inicio in range(0, len(ids), MAX_IDS_FILTRO):
+        saldos.update(
+            SaldoStock.objects.filter(id_producto__in=ids[inicio:inicio + MAX_IDS_FILTRO])
+            .values_list('id_producto', 'cantidad')
+        )
+    return saldos
+
+
+def resumen_stock() -> dict:
+    """Unidades y productos con/sin stock según los saldos (un agregado)"""
+    return SaldoStock.objects.aggregate(
+        productos=Count('id_producto'),
+        unidades=Sum('cantidad', filter=Q(cantidad__gt=0)),
+        con_stock=Count('id_producto', filter=Q(cantidad__gt=0)),
+        agotados=Count('id_producto', filter=Q(cantidad__lte=0)),
+    )
+
+
+def movimientos_por_venta(ventas: Iterable) -> List[Movimiento]:
+    """Movimientos de salida para ventas recién insertadas (ingesta masiva)"""
+    return [
+        (venta.id_producto_id, MovimientoStock.VENTA, -int(venta.cantidad_vendida), venta.id_venta, None)
+        for venta in ventas
+    ]
+
+
+def _inicio_dia(dia: datetime.date) -> datetime.datetime:
+    return timezone.make_aware(datetime.datetime.combine(dia, datetime.time.min))
+
+
+def _filtro_productos(producto_ids: Optional[Sequence[int]], categoria: Optional[str]) -> List[Q]:
+    """Filtros por lotes de ids (MAX_IDS_FILTRO) y/o categoría"""
+    base = Q(id_producto__categoria1=categoria) if categoria else Q()
+    if producto_ids is None:
+        return [base]
+    ids = sorted(set(producto_ids))
+    return [
+        base & Q(id_producto__in=ids[inicio:inicio + MAX_IDS_FILTRO])
+        for inicio in range(0, len(ids), MAX_IDS_FILTRO)
+    ]
+
+
+def stock_a_fecha(
+    momento,
+    producto_ids: Optional[Iterable[int]] = None,
+    categoria: Optional[str] = None,
+) -> Dict[int, int]:
+    """
+    Saldo por producto al `momento` indicado (una fecha = al cierre de ese
+    día). Lee el último cierre completo y suma los movimientos posteriores.
+    Los productos sin movimientos hasta esa fecha no aparecen (saldo 0).
+    """
+    if isinstance(momento, datetime.datetime):
+        hasta = Q(fecha__lte=momento)
+        ultimo_dia = timezone.localtime(momento).date() - datetime.timedelta(days=1)
+    else:
+        hasta = Q(fecha__lt=_inicio_dia(momento + datetime.timedelta(days=1)))
+        ultimo_dia = momento
+
+    cierre = CierreStock.objects.filter(fecha__lte=ultimo_dia).aggregate(fecha=Max('fecha'))['fecha']
+    delta = hasta
+    if cierre is not None:
+        delta &= Q(fecha__gte=_inicio_dia(cierre + datetime.timedelta(days=1)))
+
+    ids = list(producto_ids) if producto_ids is not None else None
+    saldos: Dict[int, int] = {}
+    for filtro in _filtro_productos(ids, categoria):
+        if cierre is not None:
+            saldos.update(
+                CierreStock.objects.filter(filtro, fecha=cierre).values_list('id_producto', 'cantidad')
+            )
+        for id_producto, cantidad in (
+            MovimientoStock.objects.filter(filtro & delta)
+            .values('id_producto').annotate(total=Sum('cantidad'))
+            .values_list('id_producto', 'total')
+        ):
+            saldos[id_producto] = saldos.get(id_producto, 0) + cantidad
+    return saldos
+
+
+def generar_cierres(
+    desde: Optional[datetime.date] = None,
+    hasta: Optional[datetime.date] = None,
+) -> int:
+    """
+    Genera (o regenera) los cierres diarios entre `desde` y `hasta`.
+    Por defecto continúa desde el último cierre hasta ayer (solo días
+    cerrados). Un movimiento con fecha anterior a un cierre existente exige
+    regenerar desde ese día. Retorna las filas escritas.
+    """
+    hasta = hasta or timezone.localdate() - datetime.timedelta(days=1)
+    if desde is None:
+        ultimo = CierreStock.objects.aggregate(fecha=Max('fecha'))['fecha']
+        if ultimo is not None:
+            desde = ultimo + datetime.timedelta(days=1)
+        else:
+            primero = MovimientoStock.objects.aggregate(fecha=Min('fecha'))['fecha']
+            if primero is None:
+                return 0
+            desde = timezone.localtime(primero).date()
+    if desde > hasta:
+        return 0
+
+    escritas = 0
+    with transaction.atomic():
+        CierreStock.objects.filter(fecha__gte=desde, fecha__lte=hasta).delete()
+        saldos = stock_a_fecha(desde - datetime.timedelta(days=1))
+
+        dia = desde
+        while dia <= hasta:
+            # Delta del día agregado en la base (sin cursores abiertos: SQL Server sin MARS)
+            siguiente = dia + datetime.timedelta(days=1)
+            for id_producto, total in (
+                MovimientoStock.objects
+                .filter(fecha__gte=_inicio_dia(dia), fecha__lt=_inicio_dia(siguiente))
+                .values('id_producto').annotate(total=Sum('cantidad'))
+                .values_list('id_producto', 'total')
+            ):
+                saldos[id_producto] = saldos.get(id_producto, 0) + total
+
+            CierreStock.objects.bulk_create([
+                CierreStock(id_producto_id=id_producto, fecha=dia, cantidad=cantidad)
+                for id_producto, cantidad in saldos.items()
+            ], batch_size=500)
+            escritas += len(saldos)
+            dia = siguiente
+    return escritas
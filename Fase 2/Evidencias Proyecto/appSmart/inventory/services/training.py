@@ -0,0 +1,287 @@
+"""
+Pipeline de entrenamiento del modelo de predicción SmartERP.
+Construye un dataset supervisado desde el historial real de Ventas con
+ventanas deslizantes: las features se calculan con los 12 meses previos a
+cada corte y la etiqueta indica si la demanda del mes siguiente superó el
+promedio de esa ventana (necesidad de reponer). Precio, oferta y sin_stock
+se toman al cierre del último mes de cada ventana (atributos_historicos),
+no los vigentes del catálogo.
+`actualizar_modelo` aplica en cambio una actualización online (partial_fit)
+con las ventas insertadas desde el checkpoint del artefacto vigente.
+"""
+import datetime
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from catalog.models.products import Productos  # Import cross-app
+from sales.models.sales import Ventas  # Import cross-app
+from inventory.models.movements import MovimientoStock
+from .demand import calcular_estadisticas_demanda
+from .history import (
+    MAX_IDS_FILTRO, MESES_HISTORIAL, HistorialVentas, _mes_ordinal, _ordinal_a_mes,
+    cargar_historial_ventas, ultimo_mes_cerrado,
+)
+from .model_store import ArtefactoModelo, artefacto_actual, guardar_artefacto
+from .predictions import CAMPOS_PREDICCION, FEATURES_MODELO, LogisticRegressor, matriz_features
+from .stock import stock_a_fecha
+
+
+VENTANAS_ENTRENAMIENTO = 12
+DESCUENTO_OFERTA = 0.05  # Precio del mes bajo el máximo de la ventana = oferta
+
+
+def _fin_de_mes(ordinal: int) -> datetime.date:
+    return _ordinal_a_mes(ordinal + 1) - datetime.timedelta(days=1)
+
+
+def _productos_dataset(producto_ids: Optional[Iterable[int]]):
+    consulta = Productos.objects.order_by('id_producto').only(*CAMPOS_PREDICCION)
+    if producto_ids is None:
+        return list(consulta)
+    ids = sorted(set(producto_ids))
+    productos = []
+    for inicio in range(0, len(ids), MAX_IDS_FILTRO):
+        productos.extend(consulta.filter(id_producto__in=ids[inicio:inicio + MAX_IDS_FILTRO]))
+    return productos
+
+
+def construir_dataset(
+    ventanas: int = VENTANAS_ENTRENAMIENTO,
+    meses: int = MESES_HISTORIAL,
+    hasta: Optional[datetime.date] = None,
+    producto_ids: Optional[Iterable[int]] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Retorna (features, etiquetas, corte) apilando `ventanas` cortes
+    mensuales consecutivos; `corte` indica a qué ventana pertenece cada fila
+    (0 = la más antigua) para separar un holdout temporal.
+    La última ventana tiene como etiqueta el mes de `hasta`.
+    """
+    productos = _productos_dataset(producto_ids)
+    if not productos:
+        vacio = np.zeros((0, len(FEATURES_MODELO)))
+        return vacio, np.zeros(0), np.zeros(0, dtype=np.int64)
+
+    historial = cargar_historial_ventas(
+        [p.id_producto for p in productos],
+        meses=meses + ventanas,
+        hasta=hasta or ultimo_mes_cerrado(),
+    )
+    precios, sin_stock, en_oferta = atributos_historicos(productos, historial)
+    return ventanas_supervisadas(
+        historial.cantidades, precios, sin_stock, en_oferta, meses, range(meses, meses + ventanas)
+    )
+
+
+def _precios_mensuales(productos, historial: HistorialVentas) -> np.ndarray:
+    """
+    Precio unitario realizado por producto x mes (ingresos / unidades). Los
+    meses sin ventas arrastran el último precio (o el primero conocido) y
+    los productos nunca vendidos usan el precio de referencia vigente.
+    """
+    cantidades, ingresos = historial.cantidades, historial.ingresos
+    con_ventas = cantidades > 0
+    precios = np.divide(ingresos, cantidades, out=np.zeros_like(ingresos), where=con_ventas)
+
+    columnas = np.arange(cantidades.shape[1])
+    ultimo = np.maximum.accumulate(np.where(con_ventas, columnas, -1), axis=1)
+    primero = np.argmax(con_ventas, axis=1)
+    fuente = np.where(ultimo >= 0, ultimo, primero[:, None])
+    precios = np.take_along_axis(precios, fuente, axis=1)
+
+    vendidos = con_ventas.any(axis=1)
+    vigentes = np.array([float(p.precio_referencia or 0) for p in productos])
+    precios[~vendidos] = vigentes[~vendidos, None]
+    return precios
+
+
+def _sin_stock_mensual(productos, historial: HistorialVentas) -> np.ndarray:
+    """
+    Saldo del libro de movimientos al cierre de cada mes: sin stock si el
+    producto ya tenía movimientos y el saldo no era positivo. Sin libro a
+    esa fecha no hay historia del flag y se asume con stock.
+    """
+    sin_stock = np.zeros(historial.cantidades.shape, dtype=bool)
+    if not MovimientoStock.objects.exists():
+        return sin_stock
+    ids = [p.id_producto for p in productos]
+    for columna, periodo in enumerate(historial.periodos):
+        saldos = stock_a_fecha(_fin_de_mes(_mes_ordinal(periodo)), producto_ids=ids)
+        sin_stock[:, columna] = [id_producto in saldos and saldos[id_producto] <= 0 for id_producto in ids]
+    return sin_stock
+
+
+def atributos_historicos(productos, historial: HistorialVentas) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Matrices producto x mes (precio, sin_stock, en_oferta) alineadas con
+    `historial`: el valor de la columna m es el estado al cierre del mes m.
+    En oferta = precio del mes DESCUENTO_OFERTA bajo el máximo de la
+    ventana de MESES_HISTORIAL meses que termina en él.
+    """
+    precios = _precios_mensuales(productos, historial)
+    relleno = np.pad(precios, ((0, 0), (MESES_HISTORIAL - 1, 0)), mode='edge')
+    maximo = np.lib.stride_tricks.sliding_window_view(relleno, MESES_HISTORIAL, axis=1).max(axis=2)
+    en_oferta = precios < maximo * (1 - DESCUENTO_OFERTA)
+    return precios, _sin_stock_mensual(productos, historial), en_oferta
+
+
+def ventanas_supervisadas(
+    cantidades: np.ndarray,
+    precios: np.ndarray,
+    sin_stock: np.ndarray,
+    en_oferta: np.ndarray,
+    meses: int,
+    columnas_etiqueta: Iterable[int],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Apila una ventana por cada columna de etiqueta j de la matriz producto x
+    mes: features de las columnas [j - meses, j) y etiqueta = demanda de j
+    sobre el promedio de la ventana. `corte` numera las ventanas desde 0.
+    Los atributos son matrices producto x mes; se usa la columna j - 1.
+    """
+    bloques, etiquetas, cortes = [], [], []
+    for k, j in enumerate(columnas_etiqueta):
+        ventana = cantidades[:, j - meses:j]
+        stats = calcular_estadisticas_demanda(ventana)
+        bloques.append(matriz_features(precios[:, j - 1], sin_stock[:, j - 1], en_oferta[:, j - 1], stats))
+        etiquetas.append((cantidades[:, j] > stats.promedio).astype(np.float64))
+        cortes.append(np.full(len(cantidades), k, dtype=np.int64))
+
+    if not bloques:
+        return np.zeros((0, len(FEATURES_MODELO))), np.zeros(0), np.zeros(0, dtype=np.int64)
+    return np.vstack(bloques), np.concatenate(etiquetas), np.concatenate(cortes)
+
+
+def entrenar_modelo(
+    paso_gradiente: float = 4.0,
+    epochs: int = 450,
+    batch_size: Optional[int] = 256,
+    ventanas: int = VENTANAS_ENTRENAMIENTO,
+    seed: Optional[int] = None,
+    publicar: bool = True,
+    metadata: Optional[dict] = None,
+) -> ArtefactoModelo:
+    """
+    Entrena el regresor con todas las ventanas menos la última, mide la
+    exactitud sobre esa última ventana (holdout temporal) y publica el
+    artefacto como nueva versión vigente. `metadata` se agrega al artefacto
+    (p. ej. la configuración del recomendador encontrada por la búsqueda).
+    """
+    features, etiquetas, cortes = construir_dataset(ventanas=ventanas)
+    if len(features) == 0:
+        raise ValueError('No hay productos para entrenar el modelo')
+
+    holdout = cortes == cortes.max()
+    entrenamiento = ~holdout if ventanas > 1 else holdout
+
+    modelo = LogisticRegressor(
+        paso_gradiente=paso_gradiente, epochs=epochs, batch_size=batch_size, random_state=seed
+    )
+    modelo.fit(features[entrenamiento], etiquetas[entrenamiento])
+    aciertos = (modelo.predict(features[holdout]) >= 0.5) == (etiquetas[holdout] >= 0.5)
+
+    # Checkpoint para las actualizaciones online posteriores
+    checkpoint = Ventas.objects.aggregate(id_venta=Max('id_venta'))['id_venta'] or 0
+    artefacto = modelo.a_artefacto({
+        'features': list(FEATURES_MODELO),
+        'entrenado_en': timezone.now().isoformat(),
+        'hasta': ultimo_mes_cerrado().isoformat(),
+        'ventanas': ventanas,
+        'muestras': int(entrenamiento.sum()),
+        'tasa_positivos': float(etiquetas[entrenamiento].mean()),
+        'accuracy_holdout': float(aciertos.mean()) if len(aciertos) else None,
+        'checkpoint_id_venta': checkpoint,
+        'actualizaciones': 0,
+        **(metadata or {}),
+    })
+    if publicar:
+        guardar_artefacto(artefacto)
+    return artefacto
+
+
+def muestras_nuevas(metadata: dict) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    Muestras (features, etiquetas) que aportan las ventas posteriores al
+    checkpoint del artefacto, más el nuevo checkpoint (máximo id_venta).
+      - Meses cerrados después de `hasta`: un corte por mes para todo el
+        catálogo (un mes sin ventas también es una etiqueta válida).
+      - Ventas nuevas con fecha en meses ya entrenados (cargas tardías): se
+        reconstruyen solo los cortes afectados de esos productos.
+    """
+    checkpoint = metadata.get('checkpoint_id_venta')
+    if checkpoint is None:
+        raise ValueError('El artefacto vigente no tiene checkpoint; ejecute un entrenamiento completo')
+
+    cerrado = _mes_ordinal(ultimo_mes_cerrado())
+    entrenado = _mes_ordinal(datetime.date.fromisoformat(metadata['hasta']))
+    nuevas = Ventas.objects.filter(id_venta__gt=checkpoint)
+    resumen = nuevas.aggregate(id_venta=Max('id_venta'), fecha=Min('fecha'))
+    nuevo_checkpoint = resumen['id_venta'] or checkpoint
+
+    bloques, etiquetas = [], []
+    if cerrado > entrenado:
+        x, y, _ = construir_dataset(ventanas=cerrado - entrenado, hasta=_fin_de_mes(cerrado))
+        bloques.append(x)
+        etiquetas.append(y)
+
+    if resumen['fecha'] is not None and _mes_ordinal(resumen['fecha']) <= entrenado:
+        desde = _mes_ordinal(resumen['fecha'])
+        # Una venta afecta la etiqueta de su mes y las features de los 12 siguientes
+        hasta = min(entrenado, desde + MESES_HISTORIAL)
+        afectados = (
+            nuevas.filter(fecha__lte=_fin_de_mes(entrenado))
+            .values_list('id_producto', flat=True).distinct()
+        )
+        x, y, _ = construir_dataset(
+            ventanas=hasta - desde + 1, hasta=_fin_de_mes(hasta), producto_ids=list(afectados)
+        )
+        bloques.append(x)
+        etiquetas.append(y)
+
+    if not bloques:
+        return np.zeros((0, len(FEATURES_MODELO))), np.zeros(0), nuevo_checkpoint
+    return np.vstack(bloques), np.concatenate(etiquetas), nuevo_checkpoint
+
+
+def actualizar_modelo(
+    epochs: int = 1,
+    seed: Optional[int] = None,
+    publicar: bool = True,
+) -> Optional[ArtefactoModelo]:
+    """
+    Actualización online del artefacto vigente: partial_fit con las muestras
+    de `muestras_nuevas` y publicación como nueva versión con el checkpoint
+    avanzado. Retorna None si no hay ventas nuevas que aprender.
+    """
+    vigente = artefacto_actual()
+    if vigente is None:
+        raise ValueError('No hay modelo publicado; ejecute un entrenamiento completo')
+
+    features, etiquetas, checkpoint = muestras_nuevas(vigente.metadata)
+    if len(features) == 0:
+        # Ventas del mes en curso se aprenden cuando el mes cierre
+        return None
+
+    modelo = LogisticRegressor.desde_artefacto(vigente)
+    modelo.random_state = seed
+    modelo.partial_fit(features, etiquetas, epochs=epochs)
+
+    metadata = {
+        clave: valor for clave, valor in vigente.metadata.items() if clave != 'version'
+    }
+    metadata.update({
+        'actualizado_en': timezone.now().isoformat(),
+        'hasta': max(metadata['hasta'], ultimo_mes_cerrado().isoformat()),
+        'checkpoint_id_venta': checkpoint,
+        'actualizaciones': metadata.get('actualizaciones', 0) + 1,
+        'muestras_incrementales': int(len(features)),
+        'version_base': vigente.version,
+    })
+    artefacto = modelo.a_artefacto(metadata)
+    if publicar:
+        guardar_artefacto(artefacto)
+    return artefacto
@@ -0,0 +1,239 @@
+"""
+Búsqueda de hiperparámetros del modelo de predicción SmartERP.
+Evalúa combinaciones de paso de gradiente y epochs del regresor junto con el
+umbral de compra y el factor de cobertura sobre un holdout temporal: se
+entrena con las ventanas anteriores a los últimos meses cerrados y se
+puntúan las recomendaciones contra la demanda real de esos meses. Cada
+tarea del pool entrena un regresor (el costoso) y luego puntúa, con la
+regla vectorizada, todas las configuraciones de decisión que comparten
+ese modelo. Los multiplicadores no se ajustan: en el holdout siempre hay
+pronóstico y la cantidad sale del intervalo, no del promedio.
+"""
+import itertools
+import random
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from catalog.models.products import Productos  # Import cross-app
+from .backtesting import ResultadoCorte, puntuar_recomendaciones
+from .demand import calcular_estadisticas_demanda
+from .forecasting import pronosticar_demanda
+from .history import MESES_HISTORIAL, MESES_PRONOSTICO, cargar_historial_ventas
+from .model_store import ArtefactoModelo
+from .predictions import (
+    CAMPOS_PREDICCION,
+    ConfiguracionRecomendador,
+    LogisticRegressor,
+    determinar_acciones,
+)
+from .training import (
+    VENTANAS_ENTRENAMIENTO,
+    atributos_historicos,
+    entrenar_modelo,
+    ultimo_mes_cerrado,
+    ventanas_supervisadas,
+)
+
+
+MESES_HOLDOUT = 3
+PESO_QUIEBRE = 2.0  # Una unidad faltante cuesta lo que dos de sobrestock
+
+GRILLA_MODELO = {
+    'paso_gradiente': (1.0, 2.0, 4.0, 8.0),
+    'epochs': (150, 300, 450),
+}
+# El primer valor de cada lista es el vigente (gana en empates)
+GRILLA_DECISION = {
+    'umbral_compra': (0.50, 0.40, 0.45, 0.55, 0.60),
+    'factor_cobertura': (1.0, 0.0, 0.5, 1.5),
+}
+
+
+@dataclass
+class DatosBusqueda:
+    """Matrices del holdout temporal, compartidas con los procesos del pool"""
+    x_entrenamiento: np.ndarray
+    y_entrenamiento: np.ndarray
+    x_holdout: List[np.ndarray]        # Features por mes de holdout
+    y_holdout: List[np.ndarray]        # Etiqueta binaria por mes
+    promedio: List[np.ndarray]
+    pronostico: List[np.ndarray]
+    limite_superior: List[np.ndarray]
+    demanda: List[np.ndarray]          # Demanda real de cada mes de holdout
+
+
+@dataclass
+class ResultadoCandidato:
+    paso_gradiente: float
+    epochs: int
+    config: ConfiguracionRecomendador
+    metricas: ResultadoCorte
+    costo: float
+    log_loss: float
+
+
+def preparar_datos(
+    ventanas: int = VENTANAS_ENTRENAMIENTO,
+    meses_holdout: int = MESES_HOLDOUT,
+) -> DatosBusqueda:
+    """
+    Carga una vez la matriz de ventas (una consulta) y arma las ventanas de
+    entrenamiento y los meses de holdout con sus pronósticos.
+    """
+    productos = list(Productos.objects.order_by('id_producto').only(*CAMPOS_PREDICCION))
+    if not productos:
+        raise ValueError('No hay productos para ajustar el modelo')
+
+    total = MESES_PRONOSTICO + ventanas + meses_holdout
+    historial = cargar_historial_ventas(
+        [p.id_producto for p in productos], meses=total, hasta=ultimo_mes_cerrado()
+    )
+    cantidades = historial.cantidades
+    precios, sin_stock, en_oferta = atributos_historicos(productos, historial)
+
+    primera_holdout = total - meses_holdout
+    x, y, _ = ventanas_supervisadas(
+        cantidades, precios, sin_stock, en_oferta, MESES_HISTORIAL,
+        range(primera_holdout - ventanas, primera_holdout),
+    )
+    datos = DatosBusqueda(x, y, [], [], [], [], [], [])
+    for j in range(primera_holdout, total):
+        x_mes, y_mes, _ = ventanas_supervisadas(
+            cantidades, precios, sin_stock, en_oferta, MESES_HISTORIAL, [j]
+        )
+        stats = calcular_estadisticas_demanda(cantidades[:, j - MESES_HISTORIAL:j])
+        pronostico = pronosticar_demanda(cantidades[:, j - MESES_PRONOSTICO:j])
+        datos.x_holdout.append(x_mes)
+        datos.y_holdout.append(y_mes)
+        datos.promedio.append(stats.promedio)
+        datos.pronostico.append(pronostico.pronostico)
+        datos.limite_superior.append(pronostico.limite_superior)
+        datos.demanda.append(cantidades[:, j])
+    return datos
+
+
+def candidatos_grilla(
+    grilla_modelo: Dict[str, Sequence] = GRILLA_MODELO,
+    grilla_decision: Dict[str, Sequence] = GRILLA_DECISION,
+    muestras: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> Dict[Tuple[float, int], List[ConfiguracionRecomendador]]:
+    """
+    Candidatos agrupados por (paso_gradiente, epochs). Con `muestras` se
+    toma una muestra aleatoria de la grilla completa (random search).
+    """
+    decisiones = [
+        ConfiguracionRecomendador(**dict(zip(grilla_decision, valores)))
+        for valores in itertools.product(*grilla_decision.values())
+    ]
+    todos = list(itertools.product(grilla_modelo['paso_gradiente'], grilla_modelo['epochs'], decisiones))
+    if muestras and muestras < len(todos):
+        # La muestra conserva el orden de la grilla (desempate estable)
+        elegidos = sorted(random.Random(seed).sample(range(len(todos)), muestras))
+        todos = [todos[i] for i in elegidos]
+
+    grupos: Dict[Tuple[float, int], List[ConfiguracionRecomendador]] = {}
+    for paso_gradiente, epochs, config in todos:
+        grupos.setdefault((paso_gradiente, epochs), []).append(config)
+    return grupos
+
+
+_datos_worker: Dict[str, object] = {}
+
+
+def _inicializar_busqueda(datos: DatosBusqueda, batch_size, seed, peso_quiebre) -> None:
+    """Recibe las matrices una vez por proceso (no por tarea)"""
+    _datos_worker.update(datos=datos, batch_size=batch_size, seed=seed, peso_quiebre=peso_quiebre)
+
+
+def evaluar_grupo(tarea) -> List[ResultadoCandidato]:
+    """Entrena un regresor y puntúa todas las configuraciones de decisión"""
+    (paso_gradiente, epochs), configs = tarea
+    datos: DatosBusqueda = _datos_worker['datos']
+    modelo = LogisticRegressor(
+        paso_gradiente=paso_gradiente, epochs=epochs,
+        batch_size=_datos_worker['batch_size'], random_state=_datos_worker['seed'],
+    )
+    modelo.fit(datos.x_entrenamiento, datos.y_entrenamiento)
+
+    probabilidades = np.concatenate([np.clip(modelo.predict(x), 0.0, 1.0) for x in datos.x_holdout])
+    p = np.clip(probabilidades, 1e-9, 1 - 1e-9)
+    y = np.concatenate(datos.y_holdout)
+    log_loss = float(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p)))
+
+    # Los meses de holdout se puntúan juntos: los contadores son sumas
+    promedio = np.concatenate(datos.promedio)
+    pronostico = np.concatenate(datos.pronostico)
+    limite_superior = np.concatenate(datos.limite_superior)
+    demanda = np.concatenate(datos.demanda)
+
+    resultados = []
+    for config in configs:
+        acciones, cantidades = determinar_acciones(
+            probabilidades, promedio, pronostico, limite_superior, config=config
+        )
+        metricas = puntuar_recomendaciones(None, acciones, cantidades, demanda)
+        costo = _datos_worker['peso_quiebre'] * metricas.unidades_faltantes + metricas.unidades_sobrestock
+        resultados.append(ResultadoCandidato(paso_gradiente, epochs, config, metricas, costo, log_loss))
+    return resultados
+
+
+def buscar_hiperparametros(
+    workers: int = 1,
+    muestras: Optional[int] = None,
+    batch_size: Optional[int] = 256,
+    ventanas: int = VENTANAS_ENTRENAMIENTO,
+    meses_holdout: int = MESES_HOLDOUT,
+    peso_quiebre: float = PESO_QUIEBRE,
+    seed: Optional[int] = None,
+) -> List[ResultadoCandidato]:
+    """
+    Evalúa la grilla en un pool de procesos y retorna los candidatos
+    ordenados por costo (faltantes ponderados + sobrestock) y log-loss.
+    """
+    datos = preparar_datos(ventanas=ventanas, meses_holdout=meses_holdout)
+    tareas = list(candidatos_grilla(muestras=muestras, seed=seed).items())
+    argumentos = (datos, batch_size, seed, peso_quiebre)
+
+    if workers > 1 and len(tareas) > 1:
+        # Las matrices viajan una vez por proceso en el initializer
+        with ProcessPoolExecutor(max_workers=min(workers, len(tareas)),
+                                 initializer=_inicializar_busqueda, initargs=argumentos) as executor:
+            grupos = list(executor.map(evaluar_grupo, tareas))
+    else:
+        _inicializar_busqueda(*argumentos)
+        grupos = [evaluar_grupo(tarea) for tarea in tareas]
+
+    resultados = [resultado for grupo in grupos for resultado in grupo]
+    # sorted es estable: en empates conserva el orden de la grilla (vigentes primero)
+    return sorted(resultados, key=lambda r: (r.costo, r.log_loss))
+
+
+def publicar_mejor(
+    mejor: ResultadoCandidato,
+    evaluados: int,
+    batch_size: Optional[int] = 256,
+    ventanas: int = VENTANAS_ENTRENAMIENTO,
+    seed: Optional[int] = None,
+) -> ArtefactoModelo:
+    """Reentrena con los mejores hiperparámetros y guarda la configuración en el artefacto"""
+    return entrenar_modelo(
+        paso_gradiente=mejor.paso_gradiente,
+        epochs=mejor.epochs,
+        batch_size=batch_size,
+        ventanas=ventanas,
+        seed=seed,
+        metadata={
+            'recomendador': mejor.config.a_dict(),
+            'busqueda': {
+                'candidatos': evaluados,
+                'costo': mejor.costo,
+                'log_loss': mejor.log_loss,
+                'mape': mejor.metricas.mape,
+                'cobertura': mejor.metricas.tasa_cobertura,
+            },
+        },
+    )
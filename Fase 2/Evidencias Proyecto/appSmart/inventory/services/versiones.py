@@ -0,0 +1,68 @@
+"""
+Versiones por tabla para invalidar caches SmartERP.
+Cada tabla tiene un contador en el cache compartido (Redis en producción) que
+las escrituras incrementan: señales del ORM, admin, libro de stock y el
+cierre de las cargas ETL. Las claves cacheadas incluyen las versiones de las
+tablas de las que dependen, así que tras un incremento todos los workers de
+gunicorn dejan de leer la entrada anterior sin tener que borrarla.
+"""
+import time
+from typing import Dict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+PRODUCTOS = 'Productos'
+VENTAS = 'Ventas'
+SALDOS_STOCK = 'SaldosStock'
+
+VERSION_KEY = 'inventory:version:{}'
+
+
+def _cache():
+    return caches[getattr(settings, 'DASHBOARD_CACHE_ALIAS', 'default')]
+
+
+def _inicial() -> int:
+    # Si Redis pierde la clave, la nueva versión no repite una anterior
+    return time.time_ns()
+
+
+def versiones(*tablas: str) -> Dict[str, int]:
+    """Versión vigente de cada tabla (las que no existen se inicializan)"""
+    cache = _cache()
+    claves = {tabla: VERSION_KEY.format(tabla) for tabla in tablas}
+    vigentes = cache.get_many(list(claves.values()))
+    resultado = {}
+    for tabla, clave in claves.items():
+        if clave not in vigentes:
+            cache.add(clave, _inicial(), None)
+            vigentes[clave] = cache.get(clave, 0)
+        resultado[tabla] = vigentes[clave]
+    return resultado
+
+
+def clave_versionada(prefijo: str, *tablas: str) -> str:
+    """`prefijo:Tabla=v:...` con las versiones actuales de las tablas"""
+    actuales = versiones(*tablas)
+    return ':'.join([prefijo] + [f'{tabla}={actuales[tabla]}' for tabla in tablas])
+
+
+def incrementar_version(*tablas: str) -> None:
+    """Invalida las entradas que dependen de las tablas indicadas"""
+    cache = _cache()
+    for tabla in tablas:
+        clave = VERSION_KEY.format(tabla)
+        try:
+            cache.incr(clave)
+        except ValueError:
+            # incr no crea la clave; si otro worker la creó primero, add no la pisa
+            if not cache.add(clave, _inicial(), None):
+                cache.incr(clave)
+
+
+def incrementar_version_al_confirmar(*tablas: str) -> None:
+    """Incrementa tras el commit para que ningún worker cachee datos sin confirmar"""
+    transaction.on_commit(lambda: incrementar_version(*tablas))
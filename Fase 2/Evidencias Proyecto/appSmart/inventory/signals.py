@@ -0,0 +1,117 @@
+"""
+Señales del módulo Inventory.
+Mantienen el feature store de predicciones, el libro de stock, el resumen
+materializado y las versiones de cache del dashboard al día cuando una venta
+o un producto se guardan por el ORM (admin, vistas, ingesta de ventas). Las
+cargas masivas (ETL, bulk_create) no emiten señales y se sincronizan con
+`manage.py actualizar_features`, `manage.py refrescar_resumen_dashboard` y
+`inventory.services.stock.movimientos_por_venta`.
+"""
+from django.db import DatabaseError, transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from catalog.models.products import Productos  # Import cross-app
+from sales.models.sales import Ventas  # Import cross-app
+from .services.resumen import acumular_producto, acumular_ventas, estado_catalogo, ingreso_venta
+from .services.versiones import PRODUCTOS, VENTAS, incrementar_version_al_confirmar
+
+
+def _actualizar_features(id_producto):
+    from .services.feature_store import actualizar_feature_store
+
+    def actualizar():
+        try:
+            actualizar_feature_store([id_producto])
+        except DatabaseError as e:
+            print(f"[SmartERP] Advertencia actualizando features de {id_producto}: {e}")
+
+    transaction.on_commit(actualizar)
+
+
+@receiver([post_save, post_delete], sender=Ventas)
+def venta_modificada(sender, instance, **kwargs):
+    _actualizar_features(instance.id_producto_id)
+
+
+@receiver(pre_save, sender=Ventas)
+def venta_previa(sender, instance, **kwargs):
+    """Guarda producto, cantidad e ingreso anteriores para ajustar stock y resumen al editar"""
+    instance._stock_previo = None
+    if instance.pk:
+        previa = Ventas.objects.filter(pk=instance.pk).first()
+        if previa is not None:
+            instance._stock_previo = (previa.id_producto_id, previa.cantidad_vendida, ingreso_venta(previa))
+
+
+@receiver(post_save, sender=Ventas)
+def venta_stock(sender, instance, created, **kwargs):
+    """Descuenta la venta del saldo en la misma transacción que el guardado y la suma al resumen"""
+    from .models.movements import MovimientoStock
+    from .services.stock import registrar_movimientos
+
+    previo = getattr(instance, '_stock_previo', None)
+    if created or previo is None:
+        registrar_movimientos([(
+            instance.id_producto_id, MovimientoStock.VENTA,
+            -int(instance.cantidad_vendida), instance.id_venta, None,
+        )])
+        acumular_ventas(1, int(instance.cantidad_vendida), ingreso_venta(instance))
+        incrementar_version_al_confirmar(VENTAS)  # Después del delta: el cache no guarda el resumen previo
+        return
+
+    id_producto, cantidad, ingreso = previo
+    acumular_ventas(0, int(instance.cantidad_vendida) - int(cantidad), ingreso_venta(instance) - ingreso)
+    incrementar_version_al_confirmar(VENTAS)
+    referencia = f'Edición venta {instance.id_venta}'
+    if id_producto == instance.id_producto_id:
+        delta = int(cantidad) - int(instance.cantidad_vendida)
+        movimientos = [(id_producto, MovimientoStock.AJUSTE, delta, instance.id_venta, referencia)] if delta else []
+    else:
+        movimientos = [
+            (id_producto, MovimientoStock.AJUSTE, int(cantidad), instance.id_venta, referencia),
+            (instance.id_producto_id, MovimientoStock.AJUSTE, -int(instance.cantidad_vendida),
+             instance.id_venta, referencia),
+        ]
+    registrar_movimientos(movimientos)
+
+
+@receiver(post_delete, sender=Ventas)
+def venta_eliminada_stock(sender, instance, **kwargs):
+    """Devuelve al saldo las unidades de una venta eliminada"""
+    from .models.movements import MovimientoStock
+    from .services.stock import registrar_movimientos
+
+    registrar_movimientos([(
+        instance.id_producto_id, MovimientoStock.AJUSTE, int(instance.cantidad_vendida),
+        instance.id_venta, f'Venta {instance.id_venta} eliminada',
+    )])
+    acumular_ventas(-1, -int(instance.cantidad_vendida), -ingreso_venta(instance))
+    incrementar_version_al_confirmar(VENTAS)
+
+
+@receiver(pre_save, sender=Productos)
+def producto_previo(sender, instance, **kwargs):
+    """Guarda cómo contaba el producto en el resumen antes de editarlo"""
+    instance._resumen_previo = None
+    if instance.pk:
+        previo = Productos.objects.filter(pk=instance.pk).first()
+        if previo is not None:
+            instance._resumen_previo = estado_catalogo(previo)
+
+
+@receiver(post_save, sender=Productos)
+def producto_guardado(sender, instance, **kwargs):
+    """Suma al resumen el delta del producto (sin recalcularlo completo)"""
+    acumular_producto(getattr(instance, '_resumen_previo', None), estado_catalogo(instance))
+
+
+@receiver(post_delete, sender=Productos)
+def producto_eliminado(sender, instance, **kwargs):
+    acumular_producto(estado_catalogo(instance), None)
+
+
+@receiver([post_save, post_delete], sender=Productos)
+def producto_modificado(sender, instance, **kwargs):
+    _actualizar_features(instance.id_producto)
+    incrementar_version_al_confirmar(PRODUCTOS)
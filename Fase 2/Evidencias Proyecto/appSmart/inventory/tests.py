@@ -0,0 +1,1233 @@
+"""
+Tests del módulo Inventory.
+Los núcleos NumPy se prueban directamente (SimpleTestCase); las rutas ORM
+usan TestCase sobre la base de pruebas con las tablas de init_sqlite_db.
+"""
+import datetime
+import io
+import pickle
+import statistics
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import path
+from django.utils import timezone
+
+from catalog.models.products import Productos  # Import cross-app
+from inventario_web.urls import urlpatterns as urlpatterns_proyecto
+from sales.models.sales import Ventas  # Import cross-app
+from .models.dashboard import ResumenDashboard
+from .models.features import FeaturesProducto, MarcaAguaProceso
+from .models.movements import MovimientoStock, SaldoStock
+from .services.backtesting import ResultadoBacktest, ejecutar_backtest, puntuar_recomendaciones
+from .services.columnar import ACCIONES, ALIAS_ACCION, PredictionColumns, RankingPredicciones
+from .services.dashboard import _productos_en_vivo, contexto_dashboard, estadisticas_productos
+from .services.demand import calcular_estadisticas_demanda
+from .services.elasticity import (
+    PESO_CATEGORIA, calcular_elasticidades, cargar_elasticidades, estimar_elasticidades,
+)
+from .services.feature_store import actualizar_feature_store, productos_pendientes
+from .services.forecasting import MODELOS, PERIODO_ESTACIONAL, pronosticar_demanda
+from .services.hierarchy import SIN_CATEGORIA, SIN_MARCA, SIN_SUBCATEGORIA, reconciliar_jerarquia
+from .services.history import (
+    MESES_PRONOSTICO, _mes_ordinal, _ordinal_a_mes, cargar_historial_ventas, ultimo_mes_cerrado,
+)
+from .services.model_store import ArtefactoModelo, artefacto_actual, guardar_artefacto
+from .services.predictions import (
+    ConfiguracionRecomendador, ContadoresPrediccion, LogisticRegressor, PredictionRow, _determinar_accion,
+    _lineas_reporte_compras, _predecir_productos, determinar_acciones, generar_predicciones, iter_predicciones,
+)
+from .services.replenishment import ParametrosReposicion, calcular_reposicion, lead_times
+from .services.resumen import refrescar_resumen
+from .services.snapshot import (
+    CLAVES, RESUMEN_KEY, SnapshotNoDisponible, obtener_columnas, obtener_predicciones, obtener_resumen_predicciones,
+    refrescar_predicciones,
+)
+from .services.stock import (
+    _abrir_saldos, generar_cierres, registrar_movimientos, registrar_recepcion, stock_a_fecha, stock_actual,
+)
+from .services.training import (
+    actualizar_modelo, atributos_historicos, construir_dataset, entrenar_modelo, muestras_nuevas,
+)
+from .services.tuning import GRILLA_DECISION, GRILLA_MODELO, PESO_QUIEBRE, buscar_hiperparametros
+from .services.versiones import PRODUCTOS, SALDOS_STOCK, VENTAS, clave_versionada, incrementar_version
+from . import views
+
+CACHE_PRUEBAS = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# ROOT_URLCONF de VistasAsyncTests: inventory/urls.py elige las vistas al importar
+urlpatterns = [
+    path('async/', views.home_async),
+    path('async/dashboard/', views.dashboard_async),
+    path('async/informes/', views.informes_async),
+] + urlpatterns_proyecto
+
+
+def crear_producto(**campos):
+    datos = {
+        'title': 'Producto', 'brand': 'Marca', 'categoria1': 'Despensa',
+        'normal_price': Decimal('1000'), 'oferta': False, 'sin_stock': False,
+        'datetime': timezone.localtime().strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    datos.update(campos)
+    return Productos.objects.create(**datos)
+
+
+def crear_venta(producto, cantidad, fecha=None, precio=Decimal('1000')):
+    return Ventas.objects.create(
+        id_producto=producto, fecha=fecha or timezone.localdate(),
+        cantidad_vendida=cantidad, precio_unitario=precio,
+    )
+
+
+class PronosticoDemandaTests(SimpleTestCase):
+    """Selección de modelo del motor de suavizamiento exponencial"""
+
+    def _serie_estacional(self, meses):
+        t = np.arange(meses)
+        return 50 + 30 * np.sin(2 * np.pi * t / PERIODO_ESTACIONAL)
+
+    def test_holt_winters_con_historial_de_produccion(self):
+        cantidades = np.vstack([self._serie_estacional(MESES_PRONOSTICO)] * 3)
+        resultado = pronosticar_demanda(cantidades)
+        self.assertTrue((resultado.modelo == MODELOS.index('holt_winters')).all())
+        esperado = self._serie_estacional(MESES_PRONOSTICO + 1)[-1]
+        np.testing.assert_allclose(resultado.pronostico, esperado, atol=2.0)
+
+    def test_sin_dos_temporadas_no_usa_holt_winters(self):
+        cantidades = self._serie_estacional(2 * PERIODO_ESTACIONAL - 1)[None, :]
+        resultado = pronosticar_demanda(cantidades)
+        self.assertNotEqual(int(resultado.modelo[0]), MODELOS.index('holt_winters'))
+
+    def test_serie_constante_usa_modelo_simple(self):
+        resultado = pronosticar_demanda(np.full((2, MESES_PRONOSTICO), 10.0))
+        np.testing.assert_allclose(resultado.pronostico, 10.0)
+        self.assertTrue((resultado.modelo == MODELOS.index('simple')).all())
+
+
+class EstadisticasDemandaTests(SimpleTestCase):
+    """El kernel vectorizado coincide con statistics y np.polyfit fila a fila"""
+
+    def test_coincide_con_statistics_y_polyfit(self):
+        rng = np.random.default_rng(11)
+        matriz = np.vstack([
+            rng.integers(0, 200, (5, 12)),
+            np.zeros((1, 12)),           # Sin ventas
+            np.full((1, 12), 7),         # Constante
+            np.arange(12) * 3 + 1,       # Tendencia lineal exacta
+        ]).astype(np.float64)
+        stats = calcular_estadisticas_demanda(matriz)
+        x = np.arange(12)
+        for i, fila in enumerate(matriz):
+            serie = fila.tolist()
+            promedio = statistics.mean(serie)
+            varianza = statistics.variance(serie)
+            self.assertAlmostEqual(stats.promedio[i], promedio, places=9)
+            self.assertAlmostEqual(stats.varianza[i], varianza, places=6)
+            self.assertAlmostEqual(stats.tendencia[i], np.polyfit(x, fila, 1)[0], places=9)
+            volatilidad = statistics.stdev(serie) / promedio if promedio else 0.0
+            self.assertAlmostEqual(stats.volatilidad[i], volatilidad, places=9)
+            self.assertEqual(stats.ultimo[i], fila[-1])
+            self.assertEqual(stats.maximo[i], max(serie))
+        self.assertAlmostEqual(stats.tendencia[7], 3.0)
+
+    def test_filas_en_cero_y_bordes(self):
+        stats = calcular_estadisticas_demanda(np.zeros((3, 6)))
+        for valores in (stats.promedio, stats.varianza, stats.volatilidad, stats.tendencia):
+            np.testing.assert_array_equal(valores, np.zeros(3))
+        # Un solo periodo: sin varianza ni pendiente
+        stats = calcular_estadisticas_demanda(np.array([[4.0], [0.0]]))
+        np.testing.assert_array_equal(stats.promedio, [4.0, 0.0])
+        np.testing.assert_array_equal(stats.varianza, [0.0, 0.0])
+        np.testing.assert_array_equal(stats.tendencia, [0.0, 0.0])
+        # Sin periodos
+        self.assertEqual(calcular_estadisticas_demanda(np.zeros((2, 0))).promedio.tolist(), [0.0, 0.0])
+
+
+class LogisticRegressorTests(SimpleTestCase):
+    """Descenso con gradiente promedio: el paso no depende del tamaño de lote"""
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.x = rng.uniform(0, 100, (2000, 3))
+        self.y = (self.x[:, 0] - self.x[:, 1] > 0).astype(float)
+
+    def test_converge_con_lote_completo_y_mini_batch(self):
+        for batch_size in (None, 32, 256):
+            modelo = LogisticRegressor(epochs=200, batch_size=batch_size, random_state=0)
+            modelo.fit(self.x, self.y)
+            exactitud = np.mean((modelo.predict(self.x) >= 0.5) == self.y)
+            self.assertGreater(exactitud, 0.95, batch_size)
+
+    def test_paso_acotado_en_lote_grande(self):
+        modelo = LogisticRegressor(epochs=1, batch_size=None)
+        modelo.fit(self.x, self.y)
+        # Con gradiente sumado un solo paso movería los pesos cientos de unidades
+        self.assertLess(np.abs(modelo.weights).max(), modelo.paso_gradiente)
+
+    def test_partial_fit_amplia_el_rango_sin_cambiar_lo_aprendido(self):
+        modelo = LogisticRegressor(epochs=50, random_state=0)
+        modelo.fit(self.x, self.y)
+        antes = modelo.predict(self.x)
+        fuera_de_rango = np.array([[-50.0, 150.0, 20.0], [180.0, -20.0, 130.0]])
+        modelo.partial_fit(fuera_de_rango, [0, 1], epochs=0)
+        np.testing.assert_allclose(modelo.feature_min, [-50, -20, self.x[:, 2].min()])
+        np.testing.assert_allclose(modelo.feature_max, [180, 150, 130])
+        np.testing.assert_allclose(modelo.predict(self.x), antes, atol=1e-9)
+        # Una pasada de SGD sobre una muestra en la frontera sí mueve los pesos
+        pesos = modelo.weights.copy()
+        modelo.partial_fit([[50.0, 50.0, 50.0]], [1], epochs=1)
+        self.assertFalse(np.allclose(modelo.weights, pesos))
+
+
+class DeterminarAccionesTests(SimpleTestCase):
+    """La regla vectorizada coincide con _determinar_accion producto a producto"""
+
+    def _comparar(self, probabilidades, promedio, pronostico, limite, config):
+        acciones, cantidades = determinar_acciones(probabilidades, promedio, pronostico, limite, config=config)
+        for idx in range(len(probabilidades)):
+            accion, cantidad, _, _ = _determinar_accion(
+                None, float(probabilidades[idx]), float(promedio[idx]), 0.0,
+                pronostico=None if pronostico is None else float(pronostico[idx]),
+                limite_superior=None if limite is None else float(limite[idx]),
+                config=config,
+            )
+            self.assertEqual((acciones[idx], int(cantidades[idx])), (accion, cantidad), idx)
+
+    def test_coincide_con_regla_escalar(self):
+        rng = np.random.default_rng(7)
+        n = 500
+        probabilidades = rng.uniform(0, 1, n)
+        promedio = rng.choice([0.0, 2.5, 4.9, 12.3, 20.0, 35.7], n)
+        pronostico = np.where(rng.uniform(0, 1, n) < 0.2, 0.0, rng.uniform(0, 40, n))
+        limite = np.where(pronostico == 0, 0.0, pronostico + rng.uniform(0, 15, n))
+        for config in (ConfiguracionRecomendador(), ConfiguracionRecomendador(umbral_compra=0.4, factor_cobertura=0.5)):
+            self._comparar(probabilidades, promedio, pronostico, limite, config)
+            self._comparar(probabilidades, promedio, None, None, config)
+
+
+def columnas_prediccion(probabilidad, tendencia=None, volatilidad=None, acciones=None):
+    """PredictionColumns mínimo para probar orden y filtros"""
+    n = len(probabilidad)
+    ceros = np.zeros(n)
+    textos = np.array([''] * n, dtype=object)
+    return PredictionColumns(
+        producto_ids=np.arange(1, n + 1, dtype=np.int64), titles=textos, brands=textos,
+        precio_referencia=ceros, promedio_mensual=ceros, ultima_cantidad=ceros.astype(np.int64),
+        tendencia=np.asarray(ceros if tendencia is None else tendencia, dtype=np.float64),
+        volatilidad=np.asarray(ceros if volatilidad is None else volatilidad, dtype=np.float64),
+        probabilidad=np.asarray(probabilidad, dtype=np.float64),
+        accion_codigo=np.array([ACCIONES.index(a) for a in (acciones or ['mantener'] * n)], dtype=np.int8),
+        mensajes=textos, motivos=textos, cantidad_sugerida=ceros.astype(np.int64),
+        stock_estimado=ceros.astype(np.int64), disponible=np.ones(n, dtype=bool),
+        historial=np.zeros((n, 0)), etiquetas=[], fecha_generacion=timezone.now(),
+    )
+
+
+class RankingTopKTests(SimpleTestCase):
+    """top_k por partición entrega lo mismo que un argsort estable completo"""
+
+    def _referencia(self, columnas, orden, k, candidatos):
+        # argsort estable de todo el catálogo, restringido a los candidatos
+        completo = columnas.ordenar(orden)
+        return completo[np.isin(completo, candidatos)][:k].tolist()
+
+    def test_coincide_con_argsort_con_empates(self):
+        rng = np.random.default_rng(7)
+        # Pocos valores distintos: empates en el borde del k-ésimo casi siempre
+        columnas = columnas_prediccion(
+            rng.choice([0.2, 0.5, 0.8], 60), tendencia=rng.choice([-1.0, 0.0, 1.0], 60),
+            volatilidad=rng.choice([0.1, 0.3], 60),
+        )
+        todos = np.arange(len(columnas))
+        pares = np.flatnonzero(columnas.producto_ids % 2 == 0)
+        for orden in ('probabilidad', 'tendencia', 'volatilidad'):
+            for candidatos in (todos, pares):
+                for k in (0, 1, 5, 17, len(candidatos) - 1, len(candidatos), len(candidatos) + 10):
+                    self.assertEqual(
+                        columnas.top_k(orden, k, candidatos).tolist(),
+                        self._referencia(columnas, orden, k, candidatos),
+                        (orden, k, len(candidatos)),
+                    )
+
+    def test_paginas_del_ranking(self):
+        acciones = ['comprar', 'reducir', 'mantener'] * 4
+        columnas = columnas_prediccion([0.5] * 12, acciones=acciones)
+        ranking = RankingPredicciones(columnas, accion='evaluar')
+        self.assertEqual(len(ranking), 4)
+        # Todo empatado: el orden es por id de producto
+        self.assertEqual([v.id_producto for v in ranking[0:2]], [2, 5])
+        self.assertEqual([v.id_producto for v in ranking[2:10]], [8, 11])
+        self.assertEqual(ranking[-1].id_producto, 11)
+
+
+class JerarquiaTests(SimpleTestCase):
+    """Los totales reconciliados por categoría, subcategoría y marca suman los SKU"""
+
+    def setUp(self):
+        meses = 12
+        rng = np.random.default_rng(5)
+        historial = np.vstack([
+            rng.integers(5, 15, meses),   # A / X / M
+            rng.integers(20, 40, meses),  # A / Y / N
+            np.zeros(meses),              # B / X / M (sin historia: reparte por pronóstico)
+            np.zeros(meses),              # B / Z / sin marca
+            np.zeros(meses),              # sin categoría
+        ]).astype(np.float64)
+        self.base = np.array([10.0, 30.0, 4.0, 12.0, 0.0])
+        columnas = columnas_prediccion(
+            [0.9, 0.4, 0.9, 0.1, 0.4], acciones=['comprar', 'mantener', 'comprar', 'reducir', 'mantener'],
+        )
+        self.columnas = replace(
+            columnas, historial=historial, etiquetas=[str(m) for m in range(meses)], pronostico=self.base,
+            brands=np.array(['M', 'N', 'M', None, 'N'], dtype=object),
+            categorias1=np.array(['A', 'A', 'B', 'B', None], dtype=object),
+            categorias2=np.array(['X', 'Y', 'X', 'Z', None], dtype=object),
+            cantidad_sugerida=np.array([7, 5, 3, 0, 2]),
+        )
+        self.jerarquia = reconciliar_jerarquia(self.columnas)
+
+    def _totales(self, nivel, campo):
+        datos = self.jerarquia.niveles[nivel]
+        padres = datos.padres if datos.padres is not None else [''] * len(datos.nombres)
+        return {(p, n): float(v) for p, n, v in zip(padres, datos.nombres, getattr(datos, campo))}
+
+    def test_bottom_up_suma_los_pronosticos_por_sku(self):
+        self.assertEqual(self._totales('categoria', 'bottom_up'),
+                         {('', 'A'): 40.0, ('', 'B'): 16.0, ('', SIN_CATEGORIA): 0.0})
+        self.assertEqual(self._totales('subcategoria', 'bottom_up'), {
+            ('A', 'X'): 10.0, ('A', 'Y'): 30.0, ('B', 'X'): 4.0, ('B', 'Z'): 12.0,
+            (SIN_CATEGORIA, SIN_SUBCATEGORIA): 0.0,
+        })
+        self.assertEqual(self._totales('marca', 'bottom_up'), {('', 'M'): 14.0, ('', 'N'): 30.0, ('', SIN_MARCA): 12.0})
+
+    def test_top_down_reconciliado_suma_los_sku(self):
+        sku = self.jerarquia.sku_top_down
+        historial = self.columnas.historial
+        # Cada categoría recibe el pronóstico de su serie agregada, repartido por participación
+        categoria_a = pronosticar_demanda(historial[:2].sum(axis=0, keepdims=True)).pronostico[0]
+        participacion = historial[:2].sum(axis=1) / historial[:2].sum()
+        np.testing.assert_allclose(sku[:2], categoria_a * participacion)
+        categoria_b = pronosticar_demanda(np.zeros((1, 12))).pronostico[0]
+        np.testing.assert_allclose(sku[2:4], categoria_b * np.array([4.0, 12.0]) / 16.0)
+
+        esperado = {
+            'categoria': {('', 'A'): sku[0] + sku[1], ('', 'B'): sku[2] + sku[3], ('', SIN_CATEGORIA): sku[4]},
+            'subcategoria': {
+                ('A', 'X'): sku[0], ('A', 'Y'): sku[1], ('B', 'X'): sku[2], ('B', 'Z'): sku[3],
+                (SIN_CATEGORIA, SIN_SUBCATEGORIA): sku[4],
+            },
+            'marca': {('', 'M'): sku[0] + sku[2], ('', 'N'): sku[1] + sku[4], ('', SIN_MARCA): sku[3]},
+        }
+        for nivel, totales in esperado.items():
+            obtenidos = self._totales(nivel, 'top_down')
+            self.assertEqual(obtenidos.keys(), totales.keys())
+            for clave, total in totales.items():
+                self.assertAlmostEqual(obtenidos[clave], total, msg=(nivel, clave))
+            self.assertAlmostEqual(sum(obtenidos.values()), sku.sum())
+
+    def test_sugerencias_por_grupo(self):
+        categorias = self.jerarquia.niveles['categoria']
+        self.assertEqual(categorias.productos.tolist(), [2, 2, 1])
+        self.assertEqual(categorias.sugerencias.tolist(), [1, 1, 0])
+        self.assertEqual(categorias.cantidad_sugerida.tolist(), [7, 3, 0])
+        self.assertEqual(len(self.jerarquia.filas()), 3 + 5 + 3)
+
+
+class ReporteComprasTests(SimpleTestCase):
+    """El reporte de compras sigue la decisión de reposición, no la acción"""
+
+    def _fila(self, id_producto, accion, cantidad_pedido):
+        return PredictionRow(
+            id_producto=id_producto, title=f'P{id_producto}', brand=None, precio_referencia=100.0,
+            promedio_mensual=10.0, ultima_cantidad=10, tendencia=0.0, volatilidad=0.0,
+            probabilidad=0.5, accion=accion, mensaje='', motivo='', cantidad_sugerida=10,
+            stock_estimado=2, disponible=True, cantidad_pedido=cantidad_pedido,
+        )
+
+    def test_filtra_por_cantidad_a_pedir(self):
+        filas = [
+            self._fila(1, 'comprar', 0),     # Compra sugerida con stock sobre el punto de reorden
+            self._fila(2, 'mantener', 25),   # Alcanzó el punto de reorden
+            self._fila(3, 'comprar', 40),
+        ]
+        lineas = list(_lineas_reporte_compras(filas))[1:]
+        self.assertEqual([linea.split(',')[0] for linea in lineas], ['2', '3'])
+        self.assertTrue(lineas[0].startswith('2,P2,N/A,10,2,'))
+        self.assertIn(',25,100.0,2500.0,', lineas[0])
+
+
+@override_settings(CACHES=CACHE_PRUEBAS)
+class LibroStockTests(TestCase):
+    """Saldos del libro de movimientos y ventas del ORM"""
+
+    def setUp(self):
+        self.producto = crear_producto()
+
+    def test_venta_sin_saldo_abierto_no_entra_al_libro(self):
+        crear_venta(self.producto, 3)
+        self.assertFalse(SaldoStock.objects.filter(id_producto=self.producto).exists())
+        self.assertFalse(MovimientoStock.objects.exists())
+
+    def test_venta_y_eliminacion_con_saldo_abierto(self):
+        registrar_recepcion(self.producto.id_producto, 10)
+        venta = crear_venta(self.producto, 4)
+        self.assertEqual(stock_actual(self.producto.id_producto), 6)
+        venta.cantidad_vendida = 5
+        venta.save()
+        self.assertEqual(stock_actual(self.producto.id_producto), 5)
+        venta.delete()
+        self.assertEqual(stock_actual(self.producto.id_producto), 10)
+
+    def test_eliminar_venta_anterior_a_la_apertura_no_suma(self):
+        venta = crear_venta(self.producto, 4)
+        registrar_recepcion(self.producto.id_producto, 10)
+        venta.delete()
+        self.assertEqual(stock_actual(self.producto.id_producto), 10)
+
+    def test_stock_a_fecha_cruzando_un_cierre(self):
+        id_producto = self.producto.id_producto
+        hoy = timezone.localdate()
+
+        def dia(dias):
+            return timezone.make_aware(
+                datetime.datetime.combine(hoy - datetime.timedelta(days=dias), datetime.time(12))
+            )
+
+        registrar_movimientos([(id_producto, MovimientoStock.RECEPCION, 10, None, None)], fecha=dia(5))
+        registrar_movimientos([(id_producto, MovimientoStock.AJUSTE, -2, None, None)], fecha=dia(4))
+        generar_cierres(hasta=hoy - datetime.timedelta(days=3))
+        registrar_movimientos([(id_producto, MovimientoStock.AJUSTE, -3, None, None)], fecha=dia(2))
+
+        self.assertEqual(stock_a_fecha(hoy - datetime.timedelta(days=5))[id_producto], 10)
+        self.assertEqual(stock_a_fecha(hoy - datetime.timedelta(days=3))[id_producto], 8)
+        self.assertEqual(stock_a_fecha(hoy - datetime.timedelta(days=2))[id_producto], 5)
+        self.assertEqual(stock_a_fecha(dia(3))[id_producto], 8)
+        self.assertEqual(stock_a_fecha(hoy - datetime.timedelta(days=6)), {})
+
+    def test_abrir_saldo_existente_lo_bloquea_sin_crear(self):
+        registrar_recepcion(self.producto.id_producto, 7)
+        saldos, creados = _abrir_saldos([self.producto.id_producto], timezone.now())
+        self.assertEqual(creados, set())
+        self.assertEqual(saldos[self.producto.id_producto].cantidad, 7)
+
+
+@override_settings(CACHES=CACHE_PRUEBAS)
+class ContadoresStockTests(TestCase):
+    """Contadores con/sin stock: saldo si hay fila, si no el flag sin_stock"""
+
+    def setUp(self):
+        self.con_saldo = crear_producto(brand='A')
+        self.solo_flag = crear_producto(brand='B')
+        self.agotado = crear_producto(brand='B', sin_stock=True)
+        registrar_recepcion(self.con_saldo.id_producto, 2)
+        refrescar_resumen()
+
+    def _fila(self, dimension, valor):
+        return ResumenDashboard.objects.get(dimension=dimension, valor=valor)
+
+    def test_productos_sin_fila_de_saldo_usan_el_flag(self):
+        stats = estadisticas_productos()
+        self.assertEqual((stats['productos_con_stock'], stats['productos_sin_stock']), (2, 1))
+        self.assertEqual(stats, _productos_en_vivo())
+
+    def test_venta_que_agota_el_saldo_actualiza_el_resumen(self):
+        crear_venta(self.con_saldo, 2)
+        stats = estadisticas_productos()
+        self.assertEqual((stats['productos_con_stock'], stats['productos_sin_stock']), (1, 2))
+        en_vivo = _productos_en_vivo()
+        self.assertEqual(stats['productos_con_stock'], en_vivo['productos_con_stock'])
+        marca = self._fila(ResumenDashboard.MARCA, 'A')
+        self.assertEqual((marca.productos_con_stock, marca.productos_sin_stock), (0, 1))
+        categoria = self._fila(ResumenDashboard.CATEGORIA, 'Despensa')
+        self.assertEqual((categoria.productos_con_stock, categoria.productos_sin_stock), (1, 2))
+
+    def test_apertura_de_saldo_en_cero_cambia_el_flag_por_el_saldo(self):
+        registrar_recepcion(self.solo_flag.id_producto, 0)
+        stats = estadisticas_productos()
+        self.assertEqual((stats['productos_con_stock'], stats['productos_sin_stock']), (1, 2))
+        marca = self._fila(ResumenDashboard.MARCA, 'B')
+        self.assertEqual((marca.productos_con_stock, marca.productos_sin_stock), (0, 2))
+
+
+@override_settings(CACHES=CACHE_PRUEBAS)
+class CheckpointFeatureStoreTests(TestCase):
+    """El checkpoint del feature store solo lo mueven las pasadas batch"""
+
+    def setUp(self):
+        self.cargado_por_etl = crear_producto()
+        self.editado = crear_producto()
+
+    def test_actualizacion_puntual_no_oculta_ventas_del_etl(self):
+        self.assertIsNone(productos_pendientes())
+        self.assertEqual(actualizar_feature_store(), 2)
+        marca = MarcaAguaProceso.objects.get(proceso=MarcaAguaProceso.FEATURES)
+        self.assertEqual(productos_pendientes(), set())
+
+        # Ingesta masiva sin señales y luego una actualización puntual (señal)
+        Ventas.objects.bulk_create([Ventas(
+            id_producto=self.cargado_por_etl, fecha=timezone.localdate(),
+            cantidad_vendida=5, precio_unitario=Decimal('1000'),
+        )])
+        actualizar_feature_store([self.editado.id_producto])
+        self.assertEqual(
+            MarcaAguaProceso.objects.get(proceso=MarcaAguaProceso.FEATURES).id_venta, marca.id_venta
+        )
+        self.assertIn(self.cargado_por_etl.id_producto, productos_pendientes())
+
+        actualizar_feature_store()
+        self.assertEqual(productos_pendientes(), set())
+        self.assertEqual(
+            FeaturesProducto.objects.get(id_producto=self.cargado_por_etl).ventas_12m, 5
+        )
+
+    def test_actualizacion_puntual_no_lee_la_marca_global(self):
+        actualizar_feature_store()
+        crear_venta(self.editado, 3)
+        antes = timezone.now()
+        with mock.patch('inventory.services.feature_store.obtener_marca_agua') as marca:
+            self.assertEqual(actualizar_feature_store([self.editado.id_producto]), 1)
+        marca.assert_not_called()
+        fila = FeaturesProducto.objects.get(id_producto=self.editado)
+        self.assertGreaterEqual(fila.actualizado, antes)
+        self.assertEqual(fila.ventas_12m, 3)
+        self.assertEqual(fila.id_venta_max, Ventas.objects.get(id_producto=self.editado).id_venta)
+
+
+@override_settings(CACHES=CACHE_PRUEBAS)
+class DeltasResumenTests(TestCase):
+    """Altas, ediciones y bajas de productos suman deltas al resumen"""
+
+    CONTEOS = ('productos', 'productos_oferta', 'productos_con_stock', 'productos_sin_stock',
+               'categorias', 'marcas')
+
+    def setUp(self):
+        self.base = crear_producto(brand='A', categoria1='Despensa')
+        crear_producto(brand='B', categoria1='Despensa', sin_stock=True)
+        refrescar_resumen()
+
+    def _conteos(self):
+        return {
+            (fila.dimension, fila.valor): tuple(getattr(fila, campo) for campo in self.CONTEOS)
+            for fila in ResumenDashboard.objects.all()
+        }
+
+    def _assert_igual_al_refresco(self):
+        con_deltas = self._conteos()
+        refrescar_resumen()
+        self.assertEqual(con_deltas, self._conteos())
+
+    def test_alta_en_categoria_y_marca_nuevas(self):
+        crear_producto(brand='C', categoria1='Bebidas', oferta=True)
+        self.assertEqual(self._conteos()[(ResumenDashboard.GLOBAL, '')][-2:], (2, 3))
+        self._assert_igual_al_refresco()
+
+    def test_edicion_de_flags_y_marca(self):
+        self.base.oferta = True
+        self.base.sin_stock = True
+        self.base.brand = 'B'
+        self.base.save()
+        self.assertNotIn((ResumenDashboard.MARCA, 'A'), self._conteos())
+        self._assert_igual_al_refresco()
+
+    def test_baja_y_producto_con_saldo(self):
+        registrar_recepcion(self.base.id_producto, 0)
+        crear_producto(brand='A', categoria1='Bebidas').delete()
+        self._assert_igual_al_refresco()
+
+
+@override_settings(CACHES=CACHE_PRUEBAS)
+class SnapshotPrediccionesTests(TestCase):
+    """Las lecturas sirven el snapshot persistido y nunca calculan el modelo"""
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = override_settings(PREDICCIONES_DIR=directorio.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        cache.clear()
+        self.producto = crear_producto()
+        crear_producto(title='Otro')
+        crear_venta(self.producto, 4, fecha=timezone.localdate() - datetime.timedelta(days=40))
+
+    def test_sin_snapshot_no_calcula_en_el_request(self):
+        with mock.patch('inventory.services.snapshot.generar_predicciones') as generar:
+            with self.assertRaises(SnapshotNoDisponible):
+                obtener_columnas()
+            with self.assertRaises(SnapshotNoDisponible):
+                obtener_resumen_predicciones()
+        generar.assert_not_called()
+
+    def test_snapshot_persistido_sobrevive_al_cache(self):
+        payload = refrescar_predicciones()
+        cache.clear()
+        with mock.patch('inventory.services.snapshot.generar_predicciones') as generar:
+            self.assertEqual(len(obtener_columnas()), len(payload.items))
+            self.assertEqual(obtener_resumen_predicciones()['sugerencias'], payload.sugerencias)
+            self.assertEqual(
+                [item.producto.id_producto for item in obtener_predicciones().items],
+                [item.producto.id_producto for item in payload.items],
+            )
+        generar.assert_not_called()
+
+    def test_incremental_recalcula_todo_con_otro_modelo_o_configuracion(self):
+        modelos = tempfile.TemporaryDirectory()
+        self.addCleanup(modelos.cleanup)
+        with override_settings(MODELOS_DIR=modelos.name):
+            previo = generar_predicciones()
+            total = len(previo.items)
+            with mock.patch('inventory.services.predictions._predecir_productos',
+                            wraps=_predecir_productos) as predecir:
+                generar_predicciones(previo=previo)
+                predecir.assert_not_called()
+
+                guardar_artefacto(LogisticRegressor(epochs=1).a_artefacto())
+                nuevo = generar_predicciones(previo=previo)
+                self.assertEqual(len(predecir.call_args.args[0]), total)
+                self.assertEqual(nuevo.marca_agua.version_modelo, 1)
+
+                with override_settings(REPOSICION_NIVEL_SERVICIO=0.99):
+                    generar_predicciones(previo=nuevo)
+                self.assertEqual(predecir.call_count, 2)
+                self.assertEqual(len(predecir.call_args.args[0]), total)
+
+    def test_resumen_desde_features_lo_guarda_el_comando(self):
+        actualizar_feature_store()
+        with mock.patch('inventory.services.snapshot.resumen_feature_store') as puntuar:
+            with self.assertRaises(SnapshotNoDisponible):
+                obtener_resumen_predicciones()
+        puntuar.assert_not_called()
+        call_command('refrescar_predicciones', '--desde-features', stdout=io.StringIO())
+        cache.clear()
+        self.assertEqual(obtener_resumen_predicciones()['total_productos'], 2)
+
+    def test_resumen_no_deserializa_el_catalogo(self):
+        refrescar_predicciones()
+        cache.clear()
+        with mock.patch('inventory.services.snapshot.pickle.load', wraps=pickle.load) as cargar:
+            obtener_resumen_predicciones()
+        self.assertEqual(cargar.call_count, 1)
+        self.assertEqual(cache.get_many(list(CLAVES)).keys(), {RESUMEN_KEY})
+
+    def test_incremental_recoge_ediciones_y_quita_eliminados(self):
+        eliminado = crear_producto(title='Descontinuado')
+        previo = refrescar_predicciones()
+        self.assertIsInstance(previo.marca_agua.datetime_producto, datetime.datetime)
+        cache.clear()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.producto.normal_price = Decimal('1500')
+            self.producto.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            eliminado.delete()
+
+        payload = refrescar_predicciones(incremental=True)
+        por_id = {item.producto.id_producto: item for item in payload.items}
+        self.assertNotIn(eliminado.id_producto, por_id)
+        self.assertEqual(len(por_id), len(previo.items) - 1)
+        self.assertEqual(por_id[self.producto.id_producto].producto.normal_price, Decimal('1500'))
+
+
+@override_settings(CACHES=CACHE_PRUEBAS)
+class HistorialVentasTests(TestCase):
+    """La matriz del GROUP BY por mes coincide con totales calculados a mano"""
+    HASTA = datetime.date(2024, 6, 30)
+
+    def setUp(self):
+        self.a = crear_producto()
+        self.fuera = crear_producto()  # id dentro del rango de los pedidos
+        self.sin_ventas = crear_producto()
+        self.c = crear_producto()
+        crear_venta(self.a, 2, fecha=datetime.date(2024, 3, 5), precio=Decimal('1000'))
+        crear_venta(self.a, 3, fecha=datetime.date(2024, 3, 20), precio=Decimal('500'))
+        # total_venta informado manda sobre cantidad x precio
+        Ventas.objects.create(
+            id_producto=self.a, fecha=datetime.date(2024, 5, 10), cantidad_vendida=1,
+            precio_unitario=Decimal('1000'), total_venta=Decimal('900'),
+        )
+        crear_venta(self.a, 4, fecha=datetime.date(2024, 6, 1), precio=Decimal('250'))
+        crear_venta(self.c, 7, fecha=datetime.date(2024, 2, 29))  # Antes de la ventana
+        crear_venta(self.c, 2, fecha=datetime.date(2024, 6, 30))
+        crear_venta(self.c, 9, fecha=datetime.date(2024, 7, 1))   # Después de `hasta`
+        crear_venta(self.fuera, 5, fecha=datetime.date(2024, 4, 2))  # Producto no pedido
+
+    def _historial(self):
+        ids = [self.c.id_producto, self.a.id_producto, self.sin_ventas.id_producto, self.a.id_producto]
+        return cargar_historial_ventas(ids, meses=4, hasta=self.HASTA)
+
+    def _comprobar(self, historial):
+        self.assertEqual(
+            historial.producto_ids.tolist(),
+            [self.a.id_producto, self.sin_ventas.id_producto, self.c.id_producto],
+        )
+        self.assertEqual(historial.etiquetas, ['2024-03', '2024-04', '2024-05', '2024-06'])
+        np.testing.assert_array_equal(historial.cantidades, [[5, 0, 1, 4], [0, 0, 0, 0], [0, 0, 0, 2]])
+        np.testing.assert_allclose(historial.ingresos, [[3500, 0, 900, 1000], [0, 0, 0, 0], [0, 0, 0, 2000]])
+
+    def test_totales_mensuales(self):
+        self._comprobar(self._historial())
+
+    def test_sin_filtro_por_id_en_catalogos_grandes(self):
+        # Sobre MAX_IDS_FILTRO se agrega el rango completo y se descarta lo ajeno
+        with mock.patch('inventory.services.history.MAX_IDS_FILTRO', 1):
+            self._comprobar(self._historial())
+
+    def test_sin_productos(self):
+        historial = cargar_historial_ventas([], meses=4, hasta=self.HASTA)
+        self.assertEqual(historial.cantidades.shape, (0, 4))
+
+
+def crear_catalogo_mixto(productos=7):
+    """Productos con demanda alta, baja y sin ventas en los últimos meses"""
+    hoy = timezone.localdate()
+    for i in range(productos):
+        producto = crear_producto(title=f'Producto {i}', brand=f'Marca {i % 2}')
+        if i % 3 == 2:
+            continue  # Sin ventas
+        for meses_atras in range(1, 7):
+            cantidad = (i + 1) * meses_atras if i % 2 else 2 * i + 1
+            crear_venta(producto, cantidad, fecha=hoy - datetime.timedelta(days=30 * meses_atras))
+
+
+def probabilidad_por_promedio(precios, sin_stock, en_oferta, stats, usar_modelo=True):
+    """Reemplazo de _predecir_probabilidad_compra: mezcla comprar, mantener y reducir"""
+    return np.where(stats.promedio > 5, 0.9, np.where(stats.promedio == 0, 0.1, 0.4))
+
+
+class IterPrediccionesTests(TestCase):
+    """La paginación keyset recorre el catálogo una vez y cuenta igual que el lote completo"""
+
+    def setUp(self):
+        cache.clear()
+        crear_catalogo_mixto()
+
+    @mock.patch('inventory.services.predictions._predecir_probabilidad_compra', probabilidad_por_promedio)
+    def test_paginas_cubren_cada_producto_una_vez(self):
+        esperados = list(Productos.objects.order_by('id_producto').values_list('id_producto', flat=True))
+        completo = _predecir_productos(list(Productos.objects.order_by('id_producto')))
+        acciones = {item.producto.id_producto: item.accion for item in completo.items}
+        self.assertEqual(set(acciones.values()), {'comprar', 'mantener', 'reducir'})
+        for chunk_size in (1, 3, 7, 50):
+            contadores = ContadoresPrediccion()
+            filas = list(iter_predicciones(chunk_size=chunk_size, contadores=contadores))
+            self.assertEqual([f.id_producto for f in filas], esperados, chunk_size)
+            self.assertEqual({f.id_producto: f.accion for f in filas}, acciones)
+            self.assertEqual(
+                (contadores.total, contadores.sugerencias, contadores.sobrestock),
+                (len(completo.items), completo.sugerencias, completo.sobrestock),
+            )
+
+
+class ColumnasPrediccionTests(TestCase):
+    """Ida y vuelta PredictionItem -> columnas y alias de acción en los filtros"""
+    ATRIBUTOS = (
+        'precio_referencia', 'promedio_mensual', 'ultima_cantidad', 'tendencia', 'volatilidad',
+        'probabilidad', 'probabilidad_pct', 'accion', 'mensaje', 'motivo', 'es_sobrestock',
+        'cantidad_sugerida', 'stock_estimado', 'disponible', 'historial_series', 'max_historial',
+        'pronostico', 'pronostico_inferior', 'pronostico_superior', 'stock_seguridad',
+        'punto_reorden', 'lote_economico', 'cantidad_pedido',
+    )
+
+    @mock.patch('inventory.services.predictions._predecir_probabilidad_compra', probabilidad_por_promedio)
+    def setUp(self):
+        cache.clear()
+        crear_catalogo_mixto()
+        productos = list(Productos.objects.order_by('-id_producto'))  # Desordenados a propósito
+        self.payload = _predecir_productos(productos)
+        self.columnas = PredictionColumns.desde_payload(self.payload)
+
+    def test_ida_y_vuelta_desde_payload(self):
+        items = sorted(self.payload.items, key=lambda item: item.producto.id_producto)
+        self.assertEqual(self.columnas.producto_ids.tolist(), [i.producto.id_producto for i in items])
+        self.assertEqual(self.columnas.etiquetas, [r.period_label for r in items[0].historial])
+        self.assertEqual(self.columnas.fecha_generacion, self.payload.fecha_generacion)
+        for item, vista in zip(items, self.columnas.filas()):
+            self.assertEqual(str(vista.producto), str(item.producto))
+            for atributo in self.ATRIBUTOS:
+                self.assertEqual(getattr(vista, atributo), getattr(item, atributo), atributo)
+        self.assertEqual(self.columnas.sugerencias, self.payload.sugerencias)
+        self.assertEqual(self.columnas.sobrestock, self.payload.sobrestock)
+
+    def test_evaluar_es_alias_de_reducir(self):
+        self.assertEqual(ALIAS_ACCION['evaluar'], 'reducir')
+        reducir = [i.producto.id_producto for i in self.payload.items if i.es_sobrestock]
+        self.assertTrue(reducir)
+        for accion in ('reducir', 'evaluar', 'EVALUAR', 'sobrestock'):
+            filtradas = self.columnas.filtrar(accion)
+            self.assertEqual(sorted(filtradas.producto_ids.tolist()), sorted(reducir), accion)
+            self.assertEqual(len(RankingPredicciones(self.columnas, accion=accion)), len(reducir))
+        self.assertEqual(len(self.columnas.filtrar('desconocida')), 0)
+
+
+class AtributosHistoricosTests(TestCase):
+    """Precio, oferta y sin_stock al cierre de cada mes, no los vigentes"""
+
+    def setUp(self):
+        ultimo = _mes_ordinal(ultimo_mes_cerrado())
+        self.meses = [_ordinal_a_mes(ultimo - k) + datetime.timedelta(days=9) for k in (3, 2, 1, 0)]
+        self.vendido = crear_producto(normal_price=Decimal('700'), oferta=True, sin_stock=True)
+        self.nuevo = crear_producto(normal_price=Decimal('500'))
+        crear_venta(self.vendido, 2, fecha=self.meses[0], precio=Decimal('1000'))
+        crear_venta(self.vendido, 1, fecha=self.meses[2], precio=Decimal('900'))
+        crear_venta(self.vendido, 3, fecha=self.meses[3], precio=Decimal('1000'))
+
+    def _atributos(self):
+        productos = [self.vendido, self.nuevo]
+        historial = cargar_historial_ventas([p.id_producto for p in productos], meses=4, hasta=ultimo_mes_cerrado())
+        return atributos_historicos(productos, historial)
+
+    def _movimiento(self, dia, cantidad, saldo):
+        MovimientoStock.objects.create(
+            id_producto=self.vendido, tipo=MovimientoStock.AJUSTE, cantidad=cantidad, saldo_resultante=saldo,
+            fecha=timezone.make_aware(datetime.datetime.combine(dia, datetime.time(12))),
+        )
+
+    def test_precio_realizado_y_oferta_por_mes(self):
+        precios, sin_stock, en_oferta = self._atributos()
+        np.testing.assert_allclose(precios[0], [1000, 1000, 900, 1000])
+        np.testing.assert_array_equal(en_oferta[0], [False, False, True, False])
+        # Nunca vendido: precio vigente, sin historia de oferta
+        np.testing.assert_allclose(precios[1], [500] * 4)
+        self.assertFalse(en_oferta[1].any())
+        # Sin libro de movimientos el flag vigente no se proyecta al pasado
+        self.assertFalse(sin_stock.any())
+
+    def test_sin_stock_desde_el_libro(self):
+        self._movimiento(self.meses[0], 3, 3)
+        self._movimiento(self.meses[2], -3, 0)
+        _, sin_stock, _ = self._atributos()
+        np.testing.assert_array_equal(sin_stock[0], [False, False, True, True])
+        self.assertFalse(sin_stock[1].any())
+
+    def test_dataset_usa_el_cierre_del_mes_previo_a_la_etiqueta(self):
+        features, _, cortes = construir_dataset(ventanas=2, meses=2)
+        vendido = features[::2]  # Filas por corte en orden de id_producto
+        np.testing.assert_allclose(vendido[:, 0], [1000, 900])
+        np.testing.assert_array_equal(vendido[:, 2], [False, True])
+        np.testing.assert_array_equal(cortes, [0, 0, 1, 1])
+
+
+class ActualizacionIncrementalTests(TestCase):
+    """partial_fit solo con las ventas posteriores al checkpoint id_venta"""
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = override_settings(MODELOS_DIR=directorio.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        cargado = mock.patch.dict('inventory.services.model_store._cargado', {'nombre': None, 'artefacto': None})
+        cargado.start()
+        self.addCleanup(cargado.stop)
+        self.cierre = ultimo_mes_cerrado()
+        self.productos = [crear_producto(title=f'Producto {i}') for i in range(3)]
+        for i, producto in enumerate(self.productos):
+            for meses_atras in range(4):
+                fecha = _ordinal_a_mes(_mes_ordinal(self.cierre) - meses_atras) + datetime.timedelta(days=4)
+                crear_venta(producto, i + meses_atras + 1, fecha=fecha)
+        self.base = entrenar_modelo(epochs=5, ventanas=2, seed=0)
+
+    def _actualizar(self):
+        with mock.patch.object(LogisticRegressor, 'partial_fit', autospec=True,
+                               side_effect=LogisticRegressor.partial_fit) as partial_fit:
+            artefacto = actualizar_modelo(seed=0)
+        return artefacto, [len(llamada.args[1]) for llamada in partial_fit.call_args_list]
+
+    def test_consume_solo_ventas_posteriores_al_checkpoint(self):
+        ultima = Ventas.objects.order_by('-id_venta').first()
+        self.assertEqual(self.base.metadata['checkpoint_id_venta'], ultima.id_venta)
+
+        # Sin ventas nuevas no hay nada que aprender
+        self.assertEqual(self._actualizar(), (None, []))
+
+        # Carga tardía en el mes ya entrenado: solo el corte de ese producto
+        tardia = crear_venta(self.productos[1], 5, fecha=self.cierre)
+        primera, muestras = self._actualizar()
+        self.assertEqual(muestras, [1])
+        self.assertEqual(primera.metadata['checkpoint_id_venta'], tardia.id_venta)
+        self.assertEqual(primera.metadata['actualizaciones'], 1)
+        self.assertEqual(primera.metadata['version_base'], self.base.version)
+        self.assertEqual(artefacto_actual().version, primera.version)
+
+        # Una segunda corrida ya no ve esa venta
+        self.assertEqual(self._actualizar(), (None, []))
+        otra = crear_venta(self.productos[0], 2, fecha=self.cierre)
+        crear_venta(self.productos[0], 1, fecha=self.cierre)
+        segunda, muestras = self._actualizar()
+        self.assertEqual(muestras, [1])
+        self.assertEqual(segunda.metadata['checkpoint_id_venta'], otra.id_venta + 1)
+        self.assertEqual(segunda.metadata['actualizaciones'], 2)
+
+    def test_ventas_del_mes_en_curso_esperan_el_cierre(self):
+        crear_venta(self.productos[0], 3, fecha=timezone.localdate())
+        features, _, checkpoint = muestras_nuevas(self.base.metadata)
+        self.assertEqual(len(features), 0)
+        self.assertGreater(checkpoint, self.base.metadata['checkpoint_id_venta'])
+
+
+def crear_series(demanda, meses=30):
+    """Un producto por función de demanda (ordinal de mes -> unidades) hasta el último mes cerrado"""
+    cierre = _mes_ordinal(ultimo_mes_cerrado())
+    ordinales = list(range(cierre - meses + 1, cierre + 1))
+    for funcion in demanda:
+        producto = crear_producto()
+        for ordinal in ordinales:
+            if funcion(ordinal):
+                crear_venta(producto, funcion(ordinal), fecha=_ordinal_a_mes(ordinal) + datetime.timedelta(days=4))
+    return np.array([[funcion(o) for o in ordinales] for funcion in demanda], dtype=np.float64)
+
+
+class PuntuarRecomendacionesTests(SimpleTestCase):
+    """Métricas del backtest calculadas a mano"""
+
+    def test_metricas_de_un_corte(self):
+        corte = puntuar_recomendaciones(
+            datetime.date(2024, 5, 1), ['comprar', 'mantener', 'reducir', 'comprar'], [10, 4, 0, 6], [8, 6, 0, 6],
+        )
+        self.assertEqual(
+            (corte.productos, corte.comprar, corte.reducir, corte.con_demanda, corte.quiebres_evitados, corte.quiebres),
+            (4, 2, 1, 3, 2, 1),
+        )
+        self.assertEqual((corte.unidades_faltantes, corte.unidades_sobrestock), (2.0, 2.0))
+        self.assertAlmostEqual(corte.mape, (2 / 8 + 2 / 6) / 3)
+        self.assertAlmostEqual(corte.tasa_cobertura, 2 / 3)
+
+    def test_total_pondera_el_mape_por_demanda(self):
+        primero = puntuar_recomendaciones(datetime.date(2024, 5, 1), ['comprar'], [5], [10])
+        segundo = puntuar_recomendaciones(datetime.date(2024, 6, 1), ['comprar', 'comprar'], [10, 3], [10, 0])
+        total = ResultadoBacktest(cortes=[primero, segundo]).total
+        self.assertEqual(total.periodo, datetime.date(2024, 6, 1))
+        self.assertEqual((total.con_demanda, total.quiebres, total.unidades_sobrestock), (2, 1, 3.0))
+        self.assertAlmostEqual(total.mape, 0.25)
+
+
+class BacktestTests(TestCase):
+    """Walk-forward sobre series conocidas que el pronóstico reproduce exactamente"""
+
+    def setUp(self):
+        crear_series([
+            lambda o: 10,                            # Constante
+            lambda o: 5 if o % 2 == 0 else 15,       # Estacional de periodo 2
+            lambda o: 0,                             # Sin ventas
+        ])
+
+    def test_metricas_por_corte_y_totales(self):
+        resultado = ejecutar_backtest(meses=3, usar_modelo=False)
+        self.assertEqual(len(resultado.cortes), 3)
+        self.assertEqual(resultado.cortes[-1].periodo, ultimo_mes_cerrado().replace(day=1))
+        for corte in resultado.cortes:
+            # Reglas: todos con probabilidad >= 0.5; el sin ventas compra el stock preventivo (10)
+            self.assertEqual((corte.productos, corte.comprar, corte.con_demanda), (3, 3, 2))
+            self.assertEqual((corte.quiebres_evitados, corte.quiebres), (2, 0))
+            self.assertEqual((corte.unidades_faltantes, corte.unidades_sobrestock), (0.0, 10.0))
+            self.assertEqual(corte.mape, 0.0)
+        total = resultado.total
+        self.assertEqual((total.con_demanda, total.unidades_sobrestock), (6, 30.0))
+        self.assertEqual(total.tasa_cobertura, 1.0)
+
+
+class BusquedaHiperparametrosTests(TestCase):
+    """La búsqueda puntúa el holdout igual que un cálculo directo y elige el menor costo"""
+    GRILLA_MODELO = {'paso_gradiente': (4.0,), 'epochs': (20, 40)}
+    # Umbral 0: todos compran, el costo depende solo del factor de cobertura
+    GRILLA_DECISION = {'umbral_compra': (0.0,), 'factor_cobertura': (0.0, 1.5, 0.5, 1.0)}
+    HOLDOUT = 2
+
+    def setUp(self):
+        cierre = _mes_ordinal(ultimo_mes_cerrado())
+        ruido = (0, 3, -2, 1, -3, 2, -1)
+        self.series = crear_series([
+            lambda o: 10,
+            lambda o: 5 if o % 2 == 0 else 15,
+            lambda o: 0,
+            # Serie con ruido que sube en los meses de holdout
+            lambda o: 14 if o > cierre - self.HOLDOUT else 10 + ruido[o % 7],
+        ])
+        for grilla, valores in ((GRILLA_MODELO, self.GRILLA_MODELO), (GRILLA_DECISION, self.GRILLA_DECISION)):
+            parche = mock.patch.dict(grilla, valores, clear=True)
+            parche.start()
+            self.addCleanup(parche.stop)
+
+    def _costo_esperado(self, factor):
+        """Cantidad = techo(pronóstico + factor * ancho del intervalo); sin intervalo, 10 preventivo"""
+        faltantes = sobrestock = 0.0
+        meses = self.series.shape[1]
+        for j in range(meses - self.HOLDOUT, meses):
+            pronostico = pronosticar_demanda(self.series[:, j - MESES_PRONOSTICO:j])
+            cobertura = pronostico.pronostico + factor * (pronostico.limite_superior - pronostico.pronostico)
+            cantidades = np.where(pronostico.limite_superior != 0, np.ceil(np.round(cobertura, 6)), 10)
+            faltantes += np.maximum(self.series[:, j] - cantidades, 0).sum()
+            sobrestock += np.maximum(cantidades - self.series[:, j], 0).sum()
+        return faltantes, sobrestock, PESO_QUIEBRE * faltantes + sobrestock
+
+    def test_costos_y_mejor_configuracion(self):
+        resultados = buscar_hiperparametros(ventanas=2, meses_holdout=self.HOLDOUT, seed=0)
+        self.assertEqual(len(resultados), 2 * 4)
+        esperados = {f: self._costo_esperado(f) for f in self.GRILLA_DECISION['factor_cobertura']}
+        for resultado in resultados:
+            faltantes, sobrestock, costo = esperados[resultado.config.factor_cobertura]
+            self.assertEqual(resultado.metricas.unidades_faltantes, faltantes)
+            self.assertEqual(resultado.metricas.unidades_sobrestock, sobrestock)
+            self.assertAlmostEqual(resultado.costo, costo)
+            self.assertTrue(np.isfinite(resultado.log_loss))
+        self.assertEqual(resultados, sorted(resultados, key=lambda r: (r.costo, r.log_loss)))
+
+        # Menor costo; en empate gana el primero de la grilla
+        mejor_factor = min(esperados, key=lambda f: esperados[f][2])
+        self.assertEqual(resultados[0].config.factor_cobertura, mejor_factor)
+        self.assertEqual(resultados[0].costo, esperados[mejor_factor][2])
+        self.assertLess(esperados[mejor_factor][2], esperados[0.0][2])
+
+
+class VersionesModeloTests(SimpleTestCase):
+    """Publicaciones concurrentes reciben versiones distintas"""
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = override_settings(MODELOS_DIR=directorio.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def _artefacto(self):
+        return ArtefactoModelo(weights=np.zeros(3), feature_min=np.zeros(2), feature_max=np.ones(2))
+
+    def test_publicaciones_simultaneas(self):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            rutas = list(executor.map(lambda _: guardar_artefacto(self._artefacto()), range(16)))
+        self.assertEqual(len(set(rutas)), 16)
+        self.assertEqual(artefacto_actual().version, 16)
+
+    def test_puntero_no_retrocede(self):
+        guardar_artefacto(self._artefacto())
+        guardar_artefacto(self._artefacto())
+        (Path(settings.MODELOS_DIR) / 'regresor_v0002.npz').rename(Path(settings.MODELOS_DIR) / 'regresor_v0009.npz')
+        (Path(settings.MODELOS_DIR) / 'ACTUAL').write_text('regresor_v0009.npz', encoding='utf-8')
+        self.assertEqual(guardar_artefacto(self._artefacto()).name, 'regresor_v0010.npz')
+
+
+class ElasticidadesTests(SimpleTestCase):
+    """Pendiente log-log por SKU, agrupada por categoría y contraída hacia ella"""
+
+    def _serie(self, id_producto, pendiente, precios, intercepto=5.0):
+        log_precio = np.log(np.asarray(precios, dtype=np.float64))
+        return np.full(len(precios), id_producto), log_precio, intercepto + pendiente * log_precio
+
+    def _estimar(self, *series, categorias):
+        ids, x, y = (np.concatenate(partes) for partes in zip(*series))
+        return estimar_elasticidades(ids, x, y, categorias)
+
+    def test_recupera_pendiente_conocida(self):
+        precios = [800, 900, 1000, 1100, 1200, 1300]
+        resultado = self._estimar(
+            self._serie(1, -1.5, precios), self._serie(2, -0.5, precios),
+            categorias={1: 'Despensa', 2: 'Despensa'},
+        )
+        np.testing.assert_allclose(resultado.elasticidad, [-1.5, -0.5])
+        np.testing.assert_allclose(resultado.r2, [1.0, 1.0])
+        # Misma variación de precio en ambos: la agrupada es el promedio
+        self.assertAlmostEqual(resultado.categorias['Despensa'], -1.0)
+        # (Sxy + λ·b_cat) / (Sxx + λ) con Sxy = b·Sxx
+        x = np.log(precios)
+        sxx = ((x - x.mean()) ** 2).sum()
+        esperado = (-1.5 * sxx + PESO_CATEGORIA * -1.0) / (sxx + PESO_CATEGORIA)
+        self.assertAlmostEqual(resultado.elasticidad_aplicada[0], esperado)
+
+    def test_sku_con_pocas_observaciones_toma_la_categoria(self):
+        resultado = self._estimar(
+            self._serie(1, -2.0, [500, 700, 900, 1100, 1300, 1500]),
+            self._serie(2, -0.1, [1000, 1001]),
+            categorias={1: 'Bebidas', 2: 'Bebidas'},
+        )
+        self.assertTrue(np.isnan(resultado.elasticidad[1]))
+        self.assertEqual(int(resultado.observaciones[1]), 2)
+        self.assertAlmostEqual(resultado.elasticidad_aplicada[1], resultado.categorias['Bebidas'], delta=0.1)
+
+    def test_precio_constante_no_es_estimable(self):
+        resultado = self._estimar(self._serie(1, -1.0, [1000] * 8), categorias={1: 'Despensa'})
+        self.assertTrue(np.isnan(resultado.elasticidad[0]))
+        self.assertAlmostEqual(float(resultado.variacion_precio[0]), 0.0, places=6)
+
+
+@override_settings(CACHES=CACHE_PRUEBAS)
+class CalcularElasticidadesTests(TestCase):
+    """Recalculo de ElasticidadesPrecio desde Ventas"""
+
+    def test_pendiente_desde_ventas_mensuales(self):
+        producto = crear_producto()
+        ultimo = _mes_ordinal(ultimo_mes_cerrado())
+        for k, precio in enumerate([800, 900, 1000, 1100, 1200, 1300]):
+            # cantidad = 1e9 · precio^-2 → elasticidad -2
+            cantidad = round(1e9 / precio ** 2)
+            crear_venta(producto, cantidad, fecha=_ordinal_a_mes(ultimo - k), precio=Decimal(precio))
+        calcular_elasticidades()
+        elasticidad = cargar_elasticidades(np.array([producto.id_producto]))
+        self.assertAlmostEqual(float(elasticidad[0]), -2.0, delta=0.02)
+
+
+class ReposicionTests(SimpleTestCase):
+    """SS, ROP y EOQ contra la fórmula cerrada"""
+
+    PARAMETROS = ParametrosReposicion(lead_time_dias=10.0, nivel_servicio=0.95)
+    Z = 1.6448536269514722
+
+    def test_valores_conocidos(self):
+        # μ = 30/mes → 1 unidad/día, σ² = 30/mes → 1/día
+        plan = calcular_reposicion(
+            promedio=[30, 30, 30, 0], varianza=[30, 30, 30, 0], precios=[1000, 1000, 0, 1000],
+            stock=[5, 20, 0, 0], parametros=self.PARAMETROS,
+        )
+        ss = self.Z * np.sqrt(10.0)
+        np.testing.assert_allclose(plan.stock_seguridad[:3], ss)
+        np.testing.assert_allclose(plan.punto_reorden[:3], 10.0 + ss)
+        # EOQ = sqrt(2 · 360 · 25000 / (0.25 · 1000)); sin precio cubre un mes
+        np.testing.assert_allclose(plan.lote_economico[:3], [np.sqrt(72000.0), np.sqrt(72000.0), 30.0])
+        np.testing.assert_array_equal(plan.requiere_pedido, [True, False, True, False])
+        np.testing.assert_array_equal(plan.cantidad_pedido, [269, 0, 30, 0])
+
+    def test_pedido_cubre_el_faltante_sobre_el_lote(self):
+        plan = calcular_reposicion(
+            promedio=[30], varianza=[30], precios=[1e9], stock=[-40], parametros=self.PARAMETROS,
+        )
+        self.assertEqual(int(plan.cantidad_pedido[0]), int(np.ceil(10.0 + self.Z * np.sqrt(10.0) + 40)))
+
+    def test_desviacion_del_lead_time(self):
+        parametros = ParametrosReposicion(lead_time_dias=10.0, desviacion_lead_time_dias=2.0)
+        plan = calcular_reposicion(promedio=[30], varianza=[30], precios=[1000], stock=[0], parametros=parametros)
+        self.assertAlmostEqual(float(plan.stock_seguridad[0]), self.Z * np.sqrt(10.0 + 4.0))
+
+    def test_lead_time_por_categoria(self):
+        parametros = ParametrosReposicion(lead_time_dias=7.0, lead_time_categorias={'Bebidas': 14.0})
+        np.testing.assert_array_equal(lead_times(['Bebidas', 'Despensa', None], parametros), [14.0, 7.0, 7.0])
+        plan = calcular_reposicion(
+            promedio=[30, 30], varianza=[0, 0], precios=[1000, 1000], stock=[0, 0],
+            lead_time_dias=lead_times(['Bebidas', 'Despensa'], parametros), parametros=parametros,
+        )
+        np.testing.assert_allclose(plan.punto_reorden, [14.0, 7.0])
+
+
+@override_settings(CACHES=CACHE_PRUEBAS)
+class ClavesVersionadasTests(TestCase):
+    """Las claves del cache cambian con las versiones de sus tablas"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_clave_cambia_solo_con_sus_tablas(self):
+        dashboard = clave_versionada('dashboard', PRODUCTOS, VENTAS)
+        stock = clave_versionada('stock', SALDOS_STOCK)
+        self.assertEqual(clave_versionada('dashboard', PRODUCTOS, VENTAS), dashboard)
+        incrementar_version(VENTAS)
+        self.assertNotEqual(clave_versionada('dashboard', PRODUCTOS, VENTAS), dashboard)
+        self.assertEqual(clave_versionada('stock', SALDOS_STOCK), stock)
+
+    def test_incrementar_sin_version_previa(self):
+        incrementar_version(PRODUCTOS)
+        anterior = clave_versionada('catalogo', PRODUCTOS)
+        cache.clear()  # Redis perdió las claves
+        incrementar_version(PRODUCTOS)
+        self.assertNotEqual(clave_versionada('catalogo', PRODUCTOS), anterior)
+
+    def test_venta_invalida_el_dashboard_al_confirmar(self):
+        producto = crear_producto()
+        with mock.patch('inventory.services.dashboard.calcular_contexto_dashboard', return_value={}) as calcular:
+            contexto_dashboard()
+            contexto_dashboard()
+            self.assertEqual(calcular.call_count, 1)
+            with self.captureOnCommitCallbacks() as callbacks:
+                crear_venta(producto, 2)
+                contexto_dashboard()  # Sin commit la versión no cambia
+            self.assertEqual(calcular.call_count, 1)
+            for callback in callbacks:
+                callback()
+            contexto_dashboard()
+            self.assertEqual(calcular.call_count, 2)
+
+
+@override_settings(ROOT_URLCONF='inventory.tests', CACHES=CACHE_PRUEBAS)
+class VistasAsyncTests(TransactionTestCase):
+    """
+    Las vistas del perfil ASGI dan el mismo contexto que las síncronas.
+    en_paralelo consulta con conexiones propias: los datos deben estar
+    confirmados, por eso TransactionTestCase y limpieza manual de las
+    tablas managed=False (el flush no las toca).
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(self._vaciar_tablas_negocio)
+        self.usuario = User.objects.create_user('bodeguero', password='clave-segura')
+        arroz = crear_producto(title='Arroz', categoria1='Despensa', oferta=True)
+        cafe = crear_producto(title='Café', brand='Andes', categoria1='Bebidas', normal_price=Decimal('4500'))
+        crear_producto(title='Té', brand='Andes', categoria1='Bebidas', sin_stock=True)
+        hoy = timezone.localdate()
+        crear_venta(arroz, 2, hoy)
+        crear_venta(arroz, 3, hoy - datetime.timedelta(days=12))
+        crear_venta(cafe, 1, hoy - datetime.timedelta(days=40), Decimal('4500'))
+
+    def _vaciar_tablas_negocio(self):
+        modelos = [Ventas, MovimientoStock, SaldoStock, ResumenDashboard, FeaturesProducto, MarcaAguaProceso, Productos]
+        with connection.cursor() as cursor:
+            for modelo in modelos:
+                cursor.execute(f'DELETE FROM {connection.ops.quote_name(modelo._meta.db_table)}')
+        cache.clear()
+
+    async def _contexto(self, url):
+        """Contexto que la vista entrega a render (informes.html aún no existe)"""
+        with mock.patch('inventory.views.render', return_value=HttpResponse()) as render:
+            respuesta = await self.async_client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        _, plantilla, contexto = render.call_args.args
+        return plantilla, contexto
+
+    async def test_requiere_sesion(self):
+        for url in ('/async/', '/async/dashboard/', '/async/informes/'):
+            respuesta = await self.async_client.get(url)
+            self.assertEqual(respuesta.status_code, 302)
+            self.assertTrue(respuesta.url.startswith('/login/'))
+
+    async def test_dashboard_renderiza(self):
+        await self.async_client.aforce_login(self.usuario)
+        for url in ('/async/', '/async/dashboard/'):
+            respuesta = await self.async_client.get(url)
+            self.assertEqual(respuesta.status_code, 200)
+            self.assertTemplateUsed(respuesta, 'inventory/dashboard.html')
+            self.assertEqual(respuesta.context['total_productos'], 3)
+
+    async def test_dashboard_igual_a_la_vista_sincrona(self):
+        await self.async_client.aforce_login(self.usuario)
+        _, sincrono = await self._contexto('/dashboard/')
+        for url in ('/async/', '/async/dashboard/'):
+            await cache.aclear()  # cada vista calcula su contexto, no lo lee del cache
+            plantilla, asincrono = await self._contexto(url)
+            self.assertEqual(plantilla, 'inventory/dashboard.html')
+            self.assertEqual(asincrono.keys(), sincrono.keys())
+            for clave in sincrono.keys() - {'fecha_actual'}:
+                self.assertEqual(asincrono[clave], sincrono[clave], clave)
+        self.assertEqual(asincrono['total_ventas']['total_cantidad'], 6)
+        self.assertEqual(asincrono['productos_sin_stock'], 1)
+
+    async def test_informes_igual_a_la_vista_sincrona(self):
+        await self.async_client.aforce_login(self.usuario)
+        _, sincrono = await self._contexto('/informes/')
+        plantilla, asincrono = await self._contexto('/async/informes/')
+        self.assertEqual(plantilla, 'inventory/informes.html')
+        self.assertEqual(asincrono.keys(), sincrono.keys())
+        self.assertEqual(asincrono['informes_stats'], sincrono['informes_stats'])
+        self.assertEqual(asincrono['informes_stats']['productos_total'], 3)
+        self.assertEqual(asincrono['informes_stats']['ventas_total'], 3)
+        self.assertEqual(asincrono['informes_stats']['ventas_ultimo_mes'], 2)
@@ -1,22 +1,33 @@
 """
 URLs del módulo Inventory - Dashboard y Predicciones.
 """
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = 'inventory'
 
+# Perfil ASGI (uvicorn): variantes async con consultas concurrentes
+if settings.VISTAS_ASYNC:
+    home, dashboard, informes = views.home_async, views.dashboard_async, views.informes_async
+else:
+    home, dashboard, informes = views.home, views.dashboard, views.informes
+
 urlpatterns = [
     # Dashboard
-    path('', views.home, name='home'),  # Dashboard raíz
-    path('dashboard/', views.dashboard, name='dashboard'),
+    path('', home, name='home'),  # Dashboard raíz
+    path('dashboard/', dashboard, name='dashboard'),
     
     # Predicciones e Informes
     path('predicciones/', views.prediccion_productos, name='predicciones'),
-    path('movimientos/', views.informes, name='movimientos'),  # Alias para movimientos
-    path('informes/', views.informes, name='informes'),
+    path('movimientos/', informes, name='movimientos'),  # Alias para movimientos
+    path('informes/', informes, name='informes'),
     
     # Exportación de reportes
     path('informes/reporte-compras.csv', views.exportar_reporte_compras, name='reporte_compras_csv'),
     path('informes/resumen-stock.csv', views.exportar_reporte_stock, name='reporte_stock_csv'),
+    path('informes/pronostico-categorias.csv', views.exportar_reporte_categorias, name='reporte_categorias_csv'),
+    
+    # API JSON
+    path('api/stock-historico/', views.stock_historico_api, name='stock_historico_api'),
 ]
\ No newline at end of file
@@ -4,15 +4,24 @@ Views del módulo Inventory - Dashboard y Predicciones SmartERP.
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import HttpResponse
-from django.db.models import Count, Sum, Avg, Max, Min
+from django.http import HttpResponse, JsonResponse
+from django.core.paginator import Paginator
 from django.utils import timezone
+from asgiref.sync import sync_to_async
+import asyncio
 import csv
-import json
+import datetime
 
 from catalog.models.products import Productos
 from sales.models.sales import Ventas
-from .services.predictions import generar_predicciones
+from .services.columnar import ACCIONES, ALIAS_ACCION, RankingPredicciones
+from .services.hierarchy import NIVELES, lineas_reporte_jerarquia
+from .services.snapshot import obtener_columnas, obtener_jerarquia, obtener_resumen_predicciones
+from .services.concurrencia import en_paralelo
+from .services.dashboard import (
+    acontexto_dashboard, contexto_dashboard, estadisticas_productos, estadisticas_ventas,
+)
+from .services.stock import stock_a_fecha
 
 
 @login_required
@@ -24,133 +33,126 @@ def home(request):
 
 
 @login_required
-def dashboard(request):
+async def home_async(request):
     """
-    Dashboard principal con estadísticas y gráficos de inventario.
+    Vista raíz para el perfil ASGI (VISTAS_ASYNC).
     """
-    # Estadísticas básicas de productos
-    total_productos = Productos.objects.count()
-    productos_con_stock = Productos.objects.filter(sin_stock=False).count()
-    productos_sin_stock = Productos.objects.filter(sin_stock=True).count()
-    productos_oferta = Productos.objects.filter(oferta=True).count()
-    
-    # Estadísticas de precios
-    precios_stats = Productos.objects.filter(normal_price__isnull=False).aggregate(
-        precio_promedio=Avg('normal_price'),
-        precio_max=Max('normal_price'),
-        precio_min=Min('normal_price')
-    )
-    
-    # Top categorías
-    categorias_top = Productos.objects.filter(
-        categoria1__isnull=False
-    ).values('categoria1').annotate(
-        count=Count('categoria1')
-    ).order_by('-count')[:5]
-    
-    # Top marcas
-    marcas_top = Productos.objects.filter(
-        brand__isnull=False
-    ).values('brand').annotate(
-        count=Count('brand')
-    ).order_by('-count')[:5]
-    
-    # Ventas recientes (si hay datos)
+    return await dashboard_async(request)
+
+
+def _productos_recomendados():
+    """Productos con predicción de compra (0 si no hay snapshot disponible)"""
     try:
-        ventas_recientes = Ventas.objects.select_related('id_producto').order_by('-fecha')[:10]
-        total_ventas = Ventas.objects.aggregate(
-            total_cantidad=Sum('cantidad_vendida'),
-            total_ingresos=Sum('total_venta')
-        )
+        return obtener_resumen_predicciones()['sugerencias']
     except:
-        ventas_recientes = []
-        total_ventas = {'total_cantidad': 0, 'total_ingresos': 0}
-    
-    # Productos con predicción de compra
+        return 0
+
+
+def _listas_recientes():
+    """Últimas ventas y productos, evaluados (la vista async no puede consultar en el template)"""
     try:
-        predicciones_data = generar_predicciones()
-        productos_recomendados = predicciones_data.sugerencias
+        ventas_recientes = list(Ventas.objects.select_related('id_producto').order_by('-fecha')[:10])
     except:
-        productos_recomendados = 0
-    
-    # Preparar datos para gráficos (Chart.js)
-    chart_data = {
-        'stock_distribution': {
-            'labels': ['Con Stock', 'Sin Stock'],
-            'data': [productos_con_stock, productos_sin_stock]
-        },
-        'categorias_top': {
-            'labels': [cat['categoria1'][:20] for cat in categorias_top],
-            'data': [cat['count'] for cat in categorias_top]
-        },
-        'marcas_top': {
-            'labels': [marca['brand'][:15] for marca in marcas_top],
-            'data': [marca['count'] for marca in marcas_top]
-        }
-    }
-    
-    # Productos recientes
+        ventas_recientes = []
     productos_recientes = Productos.objects.order_by('-datetime')[:5] if hasattr(Productos, 'datetime') else Productos.objects.all()[:5]
+    return ventas_recientes, list(productos_recientes)
+
+
+def _contexto_dashboard(request, cacheado, productos_recomendados, ventas_recientes, productos_recientes):
+    stats = cacheado['stats']
+    productos_sin_stock = stats['productos_sin_stock']
     
     # Mostrar alertas automáticas
     if productos_sin_stock > 10:
         messages.warning(request, f'⚠️ Atención: {productos_sin_stock} productos sin stock')
     
-    context = {
-        'total_productos': total_productos,
-        'productos_con_stock': productos_con_stock,
+    return {
+        'total_productos': stats['total_productos'],
+        'productos_con_stock': stats['productos_con_stock'],
         'productos_sin_stock': productos_sin_stock,
-        'productos_oferta': productos_oferta,
+        'productos_oferta': stats['productos_oferta'],
         'productos_recomendados': productos_recomendados,
         'productos_recientes': productos_recientes,
-        'precios_stats': precios_stats,
-        'categorias_top': categorias_top,
-        'marcas_top': marcas_top,
+        'precios_stats': cacheado['precios_stats'],
+        'categorias_top': cacheado['categorias_top'],
+        'marcas_top': cacheado['marcas_top'],
         'ventas_recientes': ventas_recientes,
-        'total_ventas': total_ventas,
-        'chart_data_json': json.dumps(chart_data),
+        'total_ventas': cacheado['total_ventas'],
+        'chart_data_json': cacheado['chart_data_json'],
         'fecha_actual': timezone.now(),
     }
+
+
+@login_required
+def dashboard(request):
+    """
+    Dashboard principal con estadísticas y gráficos de inventario.
+    """
+    # Contadores, tops y datos de gráficos desde el cache versionado
+    cacheado = contexto_dashboard()
+    ventas_recientes, productos_recientes = _listas_recientes()
     
+    context = _contexto_dashboard(
+        request, cacheado, _productos_recomendados(), ventas_recientes, productos_recientes
+    )
     return render(request, 'inventory/dashboard.html', context)
 
 
+@login_required
+async def dashboard_async(request):
+    """
+    Dashboard para el perfil ASGI: contexto cacheado (o sus grupos de
+    consultas), predicciones y listas recientes se obtienen a la vez.
+    """
+    cacheado, (productos_recomendados, (ventas_recientes, productos_recientes)) = await asyncio.gather(
+        acontexto_dashboard(),
+        en_paralelo(_productos_recomendados, _listas_recientes),
+    )
+    
+    context = _contexto_dashboard(
+        request, cacheado, productos_recomendados, ventas_recientes, productos_recientes
+    )
+    # render consulta request.user y la sesión: se ejecuta en el hilo síncrono
+    return await sync_to_async(render)(request, 'inventory/dashboard.html', context)
+
+
 @login_required
 def prediccion_productos(request):
     """
     Vista de predicciones ML para recomendaciones de compra.
     """
+    accion_filter = request.GET.get('accion')
+    orden = request.GET.get('orden', 'probabilidad')
+    nivel = request.GET.get('nivel', 'categoria')
+    if nivel not in NIVELES:
+        nivel = 'categoria'
+    
     try:
-        # Obtener predicciones usando el sistema de ML
-        predicciones_data = generar_predicciones()
-        productos_prediccion = predicciones_data.items
+        # Predicciones en formato columnar: filtros, orden y resumen son operaciones NumPy
+        columnas = obtener_columnas()
         
         prediction_summary = {
-            'total_productos': len(productos_prediccion),
-            'productos_recomendados': predicciones_data.sugerencias,
-            'productos_sobrestock': predicciones_data.sobrestock,
-            'promedio_probabilidad': sum(p.probabilidad for p in productos_prediccion) / len(productos_prediccion) if productos_prediccion else 0
+            'total_productos': len(columnas),
+            'productos_recomendados': columnas.sugerencias,
+            'productos_sobrestock': columnas.sobrestock,
+            'promedio_probabilidad': columnas.promedio_probabilidad,
         }
         
-        # Filtros opcionales
-        accion_filter = request.GET.get('accion')
-        if accion_filter and accion_filter in ['comprar', 'mantener', 'evaluar']:
-            productos_prediccion = [
-                p for p in productos_prediccion 
-                if p.accion.lower() == accion_filter
-            ]
+        # Filtros (antes de rankear) y ranking top-K paginado
+        if accion_filter not in ACCIONES + tuple(ALIAS_ACCION):
+            accion_filter = None
+        ranking = RankingPredicciones(columnas, orden=orden, accion=accion_filter)
+        total_resultados = len(ranking)
+        paginator = Paginator(ranking, 50)  # 50 resultados por página
+        productos_prediccion = paginator.get_page(request.GET.get('page'))
         
-        # Ordenamiento
-        orden = request.GET.get('orden', 'probabilidad')
-        if orden == 'probabilidad':
-            productos_prediccion.sort(key=lambda x: x.probabilidad, reverse=True)
-        elif orden == 'tendencia':
-            productos_prediccion.sort(key=lambda x: x.tendencia, reverse=True)
-        elif orden == 'volatilidad':
-            productos_prediccion.sort(key=lambda x: x.volatilidad)
+        # Pronóstico agregado y reconciliado por categoría / subcategoría / marca
+        pronostico_jerarquia = obtener_jerarquia().filas(nivel)
     
     except Exception as e:
         productos_prediccion = []
+        pronostico_jerarquia = []
+        total_resultados = 0
         prediction_summary = {
             'total_productos': 0,
             'productos_recomendados': 0,
@@ -159,50 +161,59 @@ def prediccion_productos(request):
         }
     
     context = {
-        'productos_prediccion': productos_prediccion[:50],  # Limitar a 50 resultados
+        'productos_prediccion': productos_prediccion,
         'prediction_summary': prediction_summary,
         'accion_filter': accion_filter,
         'orden': orden,
-        'total_resultados': len(productos_prediccion),
+        'total_resultados': total_resultados,
+        'nivel': nivel,
+        'pronostico_jerarquia': pronostico_jerarquia,
     }
     
     return render(request, 'inventory/predicciones.html', context)
 
 
+def _estadisticas_ventas_informes():
+    try:
+        return estadisticas_ventas()
+    except:
+        return {'ventas_total': 0, 'ventas_ultimo_mes': 0}
+
+
+def _contexto_informes(stats, ventas_stats):
+    return {
+        'informes_stats': {
+            'productos_total': stats['total_productos'],
+            'productos_activos': stats['productos_con_stock'],
+            'categorias_unicas': stats['categorias_unicas'],
+            'marcas_unicas': stats['marcas_unicas'],
+            'ventas_total': ventas_stats['ventas_total'],
+            'ventas_ultimo_mes': ventas_stats['ventas_ultimo_mes'],
+        },
+        'fecha_generacion': timezone.now(),
+    }
+
+
 @login_required
 def informes(request):
     """
     Panel de informes y reportes descargables.
     """
-    # Estadísticas para los informes
-    informes_stats = {
-        'productos_total': Productos.objects.count(),
-        'productos_activos': Productos.objects.filter(sin_stock=False).count(),
-        'categorias_unicas': Productos.objects.values('categoria1').distinct().count(),
-        'marcas_unicas': Productos.objects.values('brand').distinct().count(),
-    }
-    
-    try:
-        informes_stats.update({
-            'ventas_total': Ventas.objects.count(),
-            'ventas_ultimo_mes': Ventas.objects.filter(
-                fecha__gte=timezone.now().date() - timezone.timedelta(days=30)
-            ).count(),
-        })
-    except:
-        informes_stats.update({
-            'ventas_total': 0,
-            'ventas_ultimo_mes': 0,
-        })
-    
-    context = {
-        'informes_stats': informes_stats,
-        'fecha_generacion': timezone.now(),
-    }
-    
+    # Estadísticas para los informes (servicio compartido con el dashboard)
+    context = _contexto_informes(estadisticas_productos(), _estadisticas_ventas_informes())
     return render(request, 'inventory/informes.html', context)
 
 
+@login_required
+async def informes_async(request):
+    """
+    Panel de informes para el perfil ASGI: productos y ventas a la vez.
+    """
+    stats, ventas_stats = await en_paralelo(estadisticas_productos, _estadisticas_ventas_informes)
+    context = _contexto_informes(stats, ventas_stats)
+    return await sync_to_async(render)(request, 'inventory/informes.html', context)
+
+
 @login_required
 def exportar_reporte_compras(request):
     """
@@ -216,13 +227,13 @@ def exportar_reporte_compras(request):
     writer.writerow([
         'ID Producto', 'Título', 'Marca', 'Precio Referencia',
         'Probabilidad Compra', 'Tendencia', 'Acción', 'Motivo',
-        'Cantidad Sugerida', 'Stock Estimado'
+        'Cantidad Sugerida', 'Stock Actual', 'Stock Seguridad', 'Punto Reorden',
+        'Lote Económico', 'Cantidad a Pedir', 'Total Estimado'
     ])
     
     try:
-        predicciones_data = generar_predicciones()
-        # Solo productos con acción de compra
-        productos_compra = [p for p in predicciones_data.items if p.accion.lower() == 'comprar']
+        # Solo productos que requieren pedido (punto de reorden alcanzado)
+        productos_compra = obtener_columnas().filtrar_pedidos().filas()
         
         for producto in productos_compra:
             writer.writerow([
@@ -236,6 +247,11 @@ def exportar_reporte_compras(request):
                 producto.motivo,
                 producto.cantidad_sugerida,
                 producto.stock_estimado,
+                f"{producto.stock_seguridad:.1f}",
+                f"{producto.punto_reorden:.1f}",
+                f"{producto.lote_economico:.1f}",
+                producto.cantidad_pedido,
+                producto.cantidad_pedido * producto.precio_referencia,
             ])
             
     except Exception as e:
@@ -244,6 +260,25 @@ def exportar_reporte_compras(request):
     return response
 
 
+@login_required
+def exportar_reporte_categorias(request):
+    """
+    Exportar pronóstico agregado por categoría, subcategoría y marca en CSV
+    (bottom-up y reconciliado top-down).
+    """
+    response = HttpResponse(content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="pronostico_categorias.csv"'
+    response.write('\ufeff')  # BOM para UTF-8
+    
+    writer = csv.writer(response)
+    try:
+        writer.writerows(lineas_reporte_jerarquia(obtener_jerarquia()))
+    except Exception as e:
+        writer.writerow(['Error al generar reporte:', str(e)])
+    
+    return response
+
+
 @login_required
 def exportar_reporte_stock(request):
     """
@@ -277,5 +312,38 @@ def exportar_reporte_stock(request):
     return response
 
 
-# Importar modelo faltante para dashboard
-from django.db.models import Max, Min
\ No newline at end of file
+@login_required
+def stock_historico_api(request):
+    """
+    API JSON de stock a una fecha (cierre diario + delta de movimientos).
+    Parámetros: fecha (AAAA-MM-DD o fecha-hora ISO), producto (repetible)
+    y/o categoria.
+    """
+    try:
+        valor = request.GET.get('fecha', '')
+        momento = datetime.datetime.fromisoformat(valor) if 'T' in valor else datetime.date.fromisoformat(valor)
+        if isinstance(momento, datetime.datetime) and timezone.is_naive(momento):
+            momento = timezone.make_aware(momento)
+        producto_ids = [int(v) for v in request.GET.getlist('producto')] or None
+    except ValueError:
+        return JsonResponse(
+            {'success': False, 'error': 'Parámetros inválidos: fecha AAAA-MM-DD y producto numérico'},
+            status=400,
+        )
+
+    categoria = request.GET.get('categoria') or None
+    saldos = stock_a_fecha(momento, producto_ids=producto_ids, categoria=categoria)
+    if producto_ids:
+        # Los productos consultados sin movimientos tenían saldo 0
+        saldos = {id_producto: saldos.get(id_producto, 0) for id_producto in producto_ids}
+
+    return JsonResponse({
+        'success': True,
+        'fecha': momento.isoformat(),
+        'categoria': categoria,
+        'total_unidades': sum(saldos.values()),
+        'productos': [
+            {'id_producto': id_producto, 'cantidad': cantidad}
+            for id_producto, cantidad in sorted(saldos.items())
+        ],
+    })
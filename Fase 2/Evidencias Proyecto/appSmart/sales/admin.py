@@ -3,6 +3,7 @@ Administración de modelos del módulo Sales en Django Admin.
 """
 from django.contrib import admin
 from .models.sales import Ventas
+from catalog.services.search import ids_productos  # Import cross-app
 
 
 @admin.register(Ventas)
@@ -40,6 +41,12 @@ class VentasAdmin(admin.ModelAdmin):
     get_producto_title.short_description = 'Producto'
     get_producto_title.admin_order_field = 'id_producto__title'
     
+    def get_search_results(self, request, queryset, search_term):
+        """Ventas de los productos que coinciden en el índice de texto completo"""
+        if not search_term.strip():
+            return queryset, False
+        return queryset.filter(id_producto__in=ids_productos(search_term)), False
+    
     def save_model(self, request, obj, form, change):
         """Calcular total_venta automáticamente"""
         if obj.cantidad_vendida and obj.precio_unitario:
@@ -0,0 +1,109 @@
+"""
+Tests del módulo Sales.
+Las plantillas de reportes aún no existen: las vistas se llaman con
+RequestFactory y se inspecciona el contexto que reciben.
+"""
+import datetime
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from catalog.models.products import Productos  # Import cross-app
+from inventory.models.dashboard import ResumenDashboard  # Import cross-app
+from inventory.services.dashboard import estadisticas_ventas  # Import cross-app
+from inventory.services.resumen import refrescar_resumen  # Import cross-app
+from .models.sales import Ventas
+from .views import reportes_ventas
+
+
+def crear_producto(**campos):
+    datos = {
+        'title': 'Producto', 'brand': 'Marca', 'categoria1': 'Despensa',
+        'normal_price': Decimal('1000'), 'oferta': False, 'sin_stock': False,
+        'datetime': timezone.localtime().strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    datos.update(campos)
+    return Productos.objects.create(**datos)
+
+
+def crear_venta(producto, cantidad, fecha, precio):
+    # total_venta es columna calculada en SQL Server; en SQLite se informa a mano
+    return Ventas.objects.create(
+        id_producto=producto, fecha=fecha, cantidad_vendida=cantidad,
+        precio_unitario=precio, total_venta=cantidad * precio,
+    )
+
+
+class EstadisticasVentasTests(TestCase):
+    """Totales, ventas del día y de los últimos 30 días calculados a mano"""
+
+    def setUp(self):
+        self.hoy = timezone.localdate()
+        self.arroz = crear_producto(title='Arroz')
+        self.cafe = crear_producto(title='Café')
+        crear_venta(self.arroz, 2, self.hoy, Decimal('1000'))
+        crear_venta(self.cafe, 1, self.hoy, Decimal('4500'))
+        crear_venta(self.arroz, 3, self.hoy - datetime.timedelta(days=10), Decimal('1000'))
+        crear_venta(self.arroz, 4, self.hoy - datetime.timedelta(days=30), Decimal('900'))
+        crear_venta(self.cafe, 5, self.hoy - datetime.timedelta(days=45), Decimal('4000'))
+        self.esperado = {
+            'ventas_total': 5,
+            'total_cantidad': 2 + 1 + 3 + 4 + 5,
+            'total_ingresos': Decimal('2000') + Decimal('4500') + Decimal('3000') + Decimal('3600') + Decimal('20000'),
+            'ventas_hoy': 2,
+            'ventas_ultimo_mes': 4,
+        }
+
+    def test_sin_resumen_materializado(self):
+        self.assertFalse(ResumenDashboard.objects.exists())
+        self.assertEqual(estadisticas_ventas(), self.esperado)
+
+    def test_desde_el_resumen_materializado(self):
+        refrescar_resumen()
+        self.assertEqual(estadisticas_ventas(), self.esperado)
+
+
+class ReportesVentasTests(TestCase):
+    """El contexto del reporte coincide con los agregados de Ventas"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.usuario = User.objects.create_user('vendedor', password='clave-segura')
+        hoy = timezone.localdate()
+        arroz = crear_producto(title='Arroz')
+        cafe = crear_producto(title='Café')
+        crear_venta(arroz, 2, hoy, Decimal('1000'))
+        crear_venta(arroz, 6, hoy - datetime.timedelta(days=3), Decimal('1000'))
+        crear_venta(cafe, 5, hoy, Decimal('4000'))
+
+    def _contexto(self):
+        request = self.factory.get('/ventas/reportes/')
+        request.user = self.usuario
+        with mock.patch('sales.views.render', return_value=HttpResponse()) as render:
+            reportes_ventas(request)
+        _, plantilla, contexto = render.call_args.args
+        self.assertEqual(plantilla, 'sales/reportes_ventas.html')
+        return contexto
+
+    def test_contexto_con_los_agregados(self):
+        stats = self._contexto()['stats']
+        self.assertEqual(stats['total_ventas'], 3)
+        self.assertEqual(stats['ventas_hoy'], 2)
+        self.assertEqual(stats['ingresos_total'], Decimal('28000'))
+        self.assertEqual(stats['producto_mas_vendido'], {'id_producto__title': 'Arroz', 'total_cantidad': 8})
+
+    def test_resumen_materializado_da_el_mismo_contexto(self):
+        sin_resumen = self._contexto()['stats']
+        refrescar_resumen()
+        self.assertEqual(self._contexto()['stats'], sin_resumen)
+
+    def test_requiere_sesion(self):
+        request = self.factory.get('/ventas/reportes/')
+        request.user = AnonymousUser()
+        respuesta = reportes_ventas(request)
+        self.assertEqual(respuesta.status_code, 302)
+        self.assertTrue(respuesta.url.startswith('/login/'))
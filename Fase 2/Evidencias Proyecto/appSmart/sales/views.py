@@ -4,10 +4,10 @@ Views del módulo Sales - Ventas y transacciones SmartERP.
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.db.models import Sum, Count, Avg
-from django.utils import timezone
 
 from .models.sales import Ventas
 from catalog.models.products import Productos
+from inventory.services.dashboard import estadisticas_ventas  # Import cross-app
 
 
 # =================================================================
@@ -60,10 +60,11 @@ def reportes_ventas(request):
     PLACEHOLDER: Preparado para análisis avanzado futuro.
     """
     try:
+        ventas_stats = estadisticas_ventas()
         stats = {
-            'total_ventas': Ventas.objects.count(),
-            'ventas_hoy': Ventas.objects.filter(fecha=timezone.now().date()).count(),
-            'ingresos_total': Ventas.objects.aggregate(total=Sum('total_venta'))['total'] or 0,
+            'total_ventas': ventas_stats['ventas_total'],
+            'ventas_hoy': ventas_stats['ventas_hoy'],
+            'ingresos_total': ventas_stats['total_ingresos'],
             'producto_mas_vendido': Ventas.objects.values(
                 'id_producto__title'
             ).annotate(
@@ -0,0 +1,134 @@
+"""
+Benchmark - LogisticRegressor vectorizado (NumPy) vs implementación con bucles
+Compara tiempos de entrenamiento y predicción sobre un dataset sintético.
+
+Uso:
+    python scripts/benchmark_regresor.py --filas 20000 --epochs 50
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+import django
+
+# Setup Django
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inventario_web.settings')
+django.setup()
+
+import numpy as np
+
+from inventory.services.predictions import LogisticRegressor
+
+
+class LegacyLogisticRegressor:
+    """Implementación original por muestra (referencia para el benchmark)"""
+    def __init__(self, learning_rate=0.08, epochs=450):
+        self.learning_rate = learning_rate
+        self.epochs = epochs
+        self.weights = []
+        self.feature_min = []
+        self.feature_max = []
+
+    @staticmethod
+    def _sigmoid(z):
+        if z < -700:
+            return 0.0
+        if z > 700:
+            return 1.0
+        return 1.0 / (1.0 + math.exp(-z))
+
+    def _scale_single(self, row):
+        scaled = []
+        for idx, value in enumerate(row):
+            minimum = self.feature_min[idx]
+            maximum = self.feature_max[idx]
+            if math.isclose(maximum, minimum):
+                scaled.append(0.0)
+            else:
+                scaled.append((value - minimum) / (maximum - minimum))
+        return scaled
+
+    def fit(self, features, labels):
+        cols = len(features[0])
+        self.feature_min = [min(row[idx] for row in features) for idx in range(cols)]
+        self.feature_max = [max(row[idx] for row in features) for idx in range(cols)]
+        scaled_features = [self._scale_single(row) for row in features]
+        self.weights = [0.0] * (cols + 1)
+        for _ in range(self.epochs):
+            for i, row in enumerate(scaled_features):
+                prediction = self.predict_single(row)
+                error = labels[i] - prediction
+                self.weights[0] += self.learning_rate * error * prediction * (1 - prediction)
+                for j, feature_value in enumerate(row):
+                    self.weights[j + 1] += (
+                        self.learning_rate * error * prediction * (1 - prediction) * feature_value
+                    )
+
+    def predict_single(self, row):
+        scaled_row = self._scale_single(row)
+        z = self.weights[0]
+        for i, value in enumerate(scaled_row):
+            z += self.weights[i + 1] * value
+        return self._sigmoid(z)
+
+    def predict(self, features):
+        return [self.predict_single(row) for row in features]
+
+
+def _dataset(filas, columnas, seed):
+    rng = np.random.default_rng(seed)
+    features = rng.normal(size=(filas, columnas)) * rng.uniform(1, 1000, size=columnas)
+    coef = rng.normal(size=columnas)
+    labels = (features @ coef / np.abs(features).mean() > 0).astype(int)
+    return features, labels
+
+
+def _medir(func, *args):
+    inicio = time.perf_counter()
+    resultado = func(*args)
+    return time.perf_counter() - inicio, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark LogisticRegressor')
+    parser.add_argument('--filas', type=int, default=20000)
+    parser.add_argument('--columnas', type=int, default=6)
+    parser.add_argument('--epochs', type=int, default=50)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    features, labels = _dataset(args.filas, args.columnas, args.seed)
+    features_list = features.tolist()
+    labels_list = labels.tolist()
+
+    print("=" * 60)
+    print(f"Benchmark LogisticRegressor - {args.filas} filas x {args.columnas} features, "
+          f"{args.epochs} epochs")
+    print("=" * 60)
+
+    legacy = LegacyLogisticRegressor(epochs=args.epochs)
+    t_fit_legacy, _ = _medir(legacy.fit, features_list, labels_list)
+    t_pred_legacy, pred_legacy = _medir(legacy.predict, features_list)
+
+    vectorizado = LogisticRegressor(
+        epochs=args.epochs, batch_size=args.batch_size, random_state=args.seed
+    )
+    t_fit_np, _ = _medir(vectorizado.fit, features, labels)
+    t_pred_np, pred_np = _medir(vectorizado.predict, features)
+
+    acc_legacy = np.mean((np.asarray(pred_legacy) >= 0.5) == labels)
+    acc_np = np.mean((pred_np >= 0.5) == labels)
+
+    print(f"{'':<14}{'fit (s)':>12}{'predict (s)':>14}{'accuracy':>12}")
+    print(f"{'Bucles':<14}{t_fit_legacy:>12.3f}{t_pred_legacy:>14.3f}{acc_legacy:>12.3f}")
+    print(f"{'NumPy':<14}{t_fit_np:>12.3f}{t_pred_np:>14.3f}{acc_np:>12.3f}")
+    print(f"\nSpeedup fit: {t_fit_legacy / t_fit_np:.1f}x | "
+          f"predict: {t_pred_legacy / max(t_pred_np, 1e-9):.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -73,6 +73,164 @@ def crear_tablas_sqlite():
         """)
         print("  ✅ Tabla StgProductosRaw creada")
 
+        # Tabla FeaturesProducto (feature store de predicciones)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS FeaturesProducto (
+                id_producto INTEGER PRIMARY KEY,
+                precio REAL NOT NULL,
+                sin_stock BOOLEAN NOT NULL,
+                en_oferta BOOLEAN NOT NULL,
+                disponible BOOLEAN NOT NULL,
+                promedio REAL NOT NULL,
+                varianza REAL NOT NULL,
+                volatilidad REAL NOT NULL,
+                tendencia REAL NOT NULL,
+                ultima_cantidad INTEGER NOT NULL,
+                maxima_cantidad INTEGER NOT NULL,
+                ventas_12m INTEGER NOT NULL,
+                ingresos_12m REAL NOT NULL,
+                periodo DATE NOT NULL,
+                id_venta_max INTEGER NOT NULL,
+                datetime_producto TEXT,
+                actualizado TIMESTAMP NOT NULL,
+                FOREIGN KEY (id_producto) REFERENCES Productos(id_producto)
+            )
+        """)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS IX_FeaturesProducto_Periodo ON FeaturesProducto(periodo)"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS IX_FeaturesProducto_Actualizado ON FeaturesProducto(actualizado)"
+        )
+        print("  ✅ Tabla FeaturesProducto creada")
+
+        # Checkpoints de procesos batch (feature store)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS MarcasAguaProceso (
+                proceso TEXT PRIMARY KEY,
+                id_venta INTEGER NOT NULL,
+                fecha_venta DATE,
+                datetime_producto TIMESTAMP,
+                id_producto INTEGER NOT NULL,
+                id_movimiento INTEGER,
+                periodo DATE NOT NULL,
+                actualizado TIMESTAMP NOT NULL
+            )
+        """)
+        print("  ✅ Tabla MarcasAguaProceso creada")
+
+        # Tabla ElasticidadesPrecio (elasticidad precio-demanda por producto)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS ElasticidadesPrecio (
+                id_producto INTEGER PRIMARY KEY,
+                elasticidad REAL,
+                r2 REAL,
+                observaciones INTEGER NOT NULL,
+                variacion_precio REAL NOT NULL,
+                elasticidad_categoria REAL,
+                elasticidad_aplicada REAL,
+                actualizado TIMESTAMP NOT NULL,
+                FOREIGN KEY (id_producto) REFERENCES Productos(id_producto)
+            )
+        """)
+        print("  ✅ Tabla ElasticidadesPrecio creada")
+
+        # Libro de movimientos de stock y saldo vigente por producto
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS MovimientosStock (
+                id_movimiento INTEGER PRIMARY KEY AUTOINCREMENT,
+                id_producto INTEGER NOT NULL,
+                tipo TEXT NOT NULL,
+                cantidad INTEGER NOT NULL,
+                saldo_resultante INTEGER NOT NULL,
+                fecha TIMESTAMP NOT NULL,
+                id_venta INTEGER,
+                referencia TEXT,
+                FOREIGN KEY (id_producto) REFERENCES Productos(id_producto)
+            )
+        """)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS IX_MovimientosStock_Producto_Fecha "
+            "ON MovimientosStock(id_producto, fecha)"
+        )
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS SaldosStock (
+                id_producto INTEGER PRIMARY KEY,
+                cantidad INTEGER NOT NULL,
+                id_ultimo_movimiento INTEGER NOT NULL,
+                actualizado TIMESTAMP NOT NULL,
+                FOREIGN KEY (id_producto) REFERENCES Productos(id_producto)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS CierresStock (
+                id_cierre INTEGER PRIMARY KEY AUTOINCREMENT,
+                id_producto INTEGER NOT NULL,
+                fecha DATE NOT NULL,
+                cantidad INTEGER NOT NULL,
+                UNIQUE (fecha, id_producto),
+                FOREIGN KEY (id_producto) REFERENCES Productos(id_producto)
+            )
+        """)
+        print("  ✅ Tablas MovimientosStock, SaldosStock y CierresStock creadas")
+
+        # Resumen materializado del dashboard (manage.py refrescar_resumen_dashboard)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS ResumenDashboard (
+                id_resumen INTEGER PRIMARY KEY AUTOINCREMENT,
+                dimension TEXT NOT NULL,
+                valor TEXT NOT NULL,
+                productos INTEGER NOT NULL,
+                productos_oferta INTEGER NOT NULL,
+                productos_con_stock INTEGER NOT NULL,
+                productos_sin_stock INTEGER NOT NULL,
+                precio_promedio REAL,
+                precio_min DECIMAL(12,2),
+                precio_max DECIMAL(12,2),
+                categorias INTEGER NOT NULL DEFAULT 0,
+                marcas INTEGER NOT NULL DEFAULT 0,
+                ventas INTEGER NOT NULL DEFAULT 0,
+                unidades_vendidas INTEGER NOT NULL DEFAULT 0,
+                ingresos DECIMAL(23,2) NOT NULL DEFAULT 0,
+                version INTEGER NOT NULL DEFAULT 0,
+                actualizado TIMESTAMP NOT NULL,
+                UNIQUE (dimension, valor)
+            )
+        """)
+        print("  ✅ Tabla ResumenDashboard creada")
+
+        # Índice FTS5 del catálogo (contenido externo, sincronizado por triggers)
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS ProductosFTS USING fts5(
+                title, brand, categoria1, categoria2,
+                content='Productos', content_rowid='id_producto',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS ProductosFTS_ai AFTER INSERT ON Productos BEGIN
+                INSERT INTO ProductosFTS(rowid, title, brand, categoria1, categoria2)
+                VALUES (new.id_producto, new.title, new.brand, new.categoria1, new.categoria2);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS ProductosFTS_ad AFTER DELETE ON Productos BEGIN
+                INSERT INTO ProductosFTS(ProductosFTS, rowid, title, brand, categoria1, categoria2)
+                VALUES ('delete', old.id_producto, old.title, old.brand, old.categoria1, old.categoria2);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS ProductosFTS_au AFTER UPDATE ON Productos BEGIN
+                INSERT INTO ProductosFTS(ProductosFTS, rowid, title, brand, categoria1, categoria2)
+                VALUES ('delete', old.id_producto, old.title, old.brand, old.categoria1, old.categoria2);
+                INSERT INTO ProductosFTS(rowid, title, brand, categoria1, categoria2)
+                VALUES (new.id_producto, new.title, new.brand, new.categoria1, new.categoria2);
+            END
+        """)
+        # Indexa los productos que existían antes de crear la tabla
+        cursor.execute("INSERT INTO ProductosFTS(ProductosFTS) VALUES ('rebuild')")
+        print("  ✅ Índice de búsqueda ProductosFTS creado")
+
 
 def insertar_datos_prueba():
     """Insertar productos de ejemplo para pruebas"""